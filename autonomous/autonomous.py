@@ -3,8 +3,10 @@ from components.driveTrain import DriveTrain
 from components.shooterLogic import ShooterLogic
 from components.shooterMotors import ShooterMotorCreation
 from components.pneumatics import Pneumatics
+from utils.stateTracing import TracedStateMachine
+from utils.eventBus import EventBus, StateChanged
 
-class Autonomous(AutonomousStateMachine):
+class Autonomous(TracedStateMachine, AutonomousStateMachine):
     """Creates the autonomous code"""
     time = 1.4
     MODE_NAME = "Basic Autonomous"
@@ -13,8 +15,17 @@ class Autonomous(AutonomousStateMachine):
     shooter: ShooterLogic
     shooterMotors: ShooterMotorCreation
     pneumatics: Pneumatics
+    eventBus: EventBus
     drive_speed = tunable(.25)
 
+    def setup(self):
+        self.eventBus.subscribe(StateChanged, self.shooterIdle, key = ("ShooterLogic", "idling"))
+
+    def shooterIdle(self, event):
+        """Moves on once the shooter has finished"""
+        if self.current_state == 'shooter_wait':
+            self.next_state('drive_backwards')
+
     @state(first = True)
     def engage_shooter(self):
         """Starts shooter and fires"""
@@ -23,9 +34,9 @@ class Autonomous(AutonomousStateMachine):
         self.next_state('shooter_wait')
 
     @state
-    def shooter_wait(self):
-        """Waits for shooter to finish, then next state"""
-        if self.shooter.current_state == 'idling':
+    def shooter_wait(self, initial_call):
+        """Waits for shooter to finish, shooterIdle moves on. Moves on straight away if it never started"""
+        if initial_call and self.shooter.current_state == 'idling':
             self.next_state_now('drive_backwards')
 
     @timed_state(duration = time, next_state = 'turn')
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the robot control loop. Run with `python -m benchmarks.robotLoop`
+"""
@@ -0,0 +1,157 @@
+"""
+Measures the per tick cost of the teleop loop and its components and the
+boot cost of the config and device creation, using the simulation stand-ins
+instead of the HAL.
+
+python -m benchmarks.robotLoop --save      record benchmarks/baseline.json
+python -m benchmarks.robotLoop             compare against the baseline
+
+Baselines only mean something on the machine that recorded them.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+from simulation import devices
+from simulation.runner import HeadlessRunner
+from simulation.scenarios import Scenario
+
+defaultBaseline = os.path.dirname(__file__) + os.path.sep + "baseline.json"
+
+def measure(func, calls = 200, samples = 15):
+    """
+    Returns the median and minimum cost of one call to func in microseconds.
+    Each sample times a batch of calls so timer resolution doesn't matter.
+    """
+    func()
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            func()
+        times.append((time.perf_counter_ns() - start) / calls / 1000)
+    return {"median": statistics.median(times), "min": min(times)}
+
+class BootTarget:
+    """
+    Just enough of MyRobot for instantiateSubsystemGroup
+    """
+    def __init__(self, robotMap):
+        self.map = robotMap
+        self.logger = logging.getLogger("bench")
+
+def bootBenchmarks(robotModule, calls, samples):
+    from robotMap import RobotMap
+    from utils.configMapper import ConfigMapper, findConfig
+    from utils.motorHelper import createMotor
+
+    configFile, configPath = findConfig()
+    target = BootTarget(RobotMap())
+
+    def bootMotors():
+        robotModule.MyRobot.instantiateSubsystemGroup(target, "motors", createMotor)
+        devices.resetDevices()
+
+    return {
+        "boot.ConfigMapper": lambda: ConfigMapper(configFile, configPath),
+        "boot.instantiateSubsystemGroup.motors": bootMotors,
+    }
+
+def loopBenchmarks(sim):
+    robot = sim.robot
+    robot._on_mode_enable_components()
+    robot.teleopInit()
+
+    def teleopTick():
+        robot.teleopPeriodic()
+        robot._execute_components()
+        robot._update_feedback()
+        robot.robotPeriodic()
+
+    return {
+        "tick.ButtonManager.execute": robot.buttonManager.execute,
+        "tick.XboxMap.controllerInput": robot.xboxMap.controllerInput,
+        "tick.ShooterLogic.execute": robot.shooter.execute,
+        "tick.LoaderLogic.execute": robot.loader.execute,
+        "tick.DriveTrain.execute": robot.driveTrain.execute,
+        # has to stay well inside the fast loop period, not the 20 ms tick
+        "fast.ShooterFastLoop.fastStep": lambda: robot.shooterFastLoop.fastStep(0.0),
+        "tick.teleopPeriodic": teleopTick,
+    }
+
+def runBenchmarks(calls, samples):
+    sim = HeadlessRunner(Scenario())
+    sim.boot()
+    import robot
+
+    # boot is orders of magnitude slower than a tick
+    bootCalls = max(1, calls // 50)
+    results = {}
+    for name, func in loopBenchmarks(sim).items():
+        results[name] = measure(func, calls, samples)
+    for name, func in bootBenchmarks(robot, bootCalls, samples).items():
+        results[name] = measure(func, bootCalls, samples)
+    sim.clock.uninstall()
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Returns the names of measurements whose median grew by more than threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result["median"] > baseline[name]["median"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the robot control loop")
+    parser.add_argument("--baseline", default = defaultBaseline)
+    parser.add_argument("--save", action = "store_true", help = "write the results as the new baseline")
+    parser.add_argument("--threshold", type = float, default = 0.25,
+                        help = "allowed slowdown as a fraction of the baseline median")
+    parser.add_argument("--calls", type = int, default = 200)
+    parser.add_argument("--samples", type = int, default = 15)
+    parser.add_argument("--config", help = "config file in configs/ to benchmark")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level = logging.CRITICAL)
+    if args.config:
+        os.environ["ROBOT_CONFIG"] = args.config
+    results = runBenchmarks(args.calls, args.samples)
+
+    baseline = {}
+    if os.path.isfile(args.baseline) and not args.save:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    for name, result in results.items():
+        line = f"{name:<40} {result['median']:10.2f}us  (min {result['min']:.2f}us)"
+        if name in baseline:
+            change = result["median"] / baseline[name]["median"] - 1
+            line += f"  {change:+.0%} vs baseline"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent = 1, sort_keys = True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}, run with --save to record one")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(f"REGRESSION {name}: {results[name]['median']:.2f}us vs {baseline[name]['median']:.2f}us")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,3 @@
 class Dummy:
     def execute(self):
         pass
-
-def dummyFunc(self):
-    pass
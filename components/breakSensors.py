@@ -1,7 +1,9 @@
 from enum import IntEnum
+from utils.eventBus import EventBus, BallEntered
 
 class SensorKey(IntEnum):
     kLoadingSensor = 0
+    kStagingSensor = 3
     kShootingSensor = 4
 
 class State:
@@ -9,14 +11,19 @@ class State:
     kNotTripped = True
 
 class Sensors:
+    compatString = ["doof"]
+    isSource = True
 
     digitalInput_breaksensors: dict
+    eventBus: EventBus
 
     def on_enable(self):
         self.SensorArray = []
         for x in range(1, 6):
             self.SensorArray.append(self.digitalInput_breaksensors["sensor" + str(x)])
         self.logger.info("Break sensor component created")
+        # a ball already sitting at the sensor didn't just enter
+        self.ballAtLoading = self.isTripped(SensorKey.kLoadingSensor)
 
     def loadingSensor(self, state):
         """Gets the loading sensor state and checks if it matches the requested state."""
@@ -30,5 +37,17 @@ class Sensors:
             return True
         return False
 
+    def isTripped(self, key):
+        """Checks if the sensor at index key (a SensorKey or 0-4 from the bottom) is broken."""
+        return self.SensorArray[key].get() == State.kTripped
+
+    def getTripped(self):
+        """List of which sensors are broken, bottom first."""
+        return [sensor.get() == State.kTripped for sensor in self.SensorArray]
+
     def execute(self):
-        pass
+        """Publishes BallEntered when the loading sensor trips."""
+        ballAtLoading = self.isTripped(SensorKey.kLoadingSensor)
+        if ballAtLoading and not self.ballAtLoading:
+            self.eventBus.publish(BallEntered())
+        self.ballAtLoading = ballAtLoading
@@ -2,10 +2,13 @@
 Manager class to turn HID buttons into events
 """
 import wpilib
+from wpilib import Timer
 from enum import Flag, auto
 import inspect
 import traceback
 
+from components.scheduler import Scheduler
+
 class ButtonEvent(Flag):
     """
     Supported button actions
@@ -14,13 +17,103 @@ class ButtonEvent(Flag):
     kOnRelease = auto()
     kWhilePressed = auto()
     kWhileReleased = auto()
+    kOnLongPress = auto()
+    kOnDoubleTap = auto()
+    kOnSequence = auto()
     kNone = 0
 
+def readButtons(hidDevice):
+    """
+    Every button of hidDevice as a bitmask, bit n - 1 is button n
+    """
+    return wpilib.DriverStation.getInstance().getStickButtons(hidDevice.getPort())
+
+def buttonBits(mask):
+    """
+    Button ids of the bits set in mask, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length()
+        mask ^= low
+
+def buttonMask(buttonIds):
+    mask = 0
+    for buttonId in buttonIds:
+        mask |= 1 << (int(buttonId) - 1)
+    return mask
+
+class SequenceNode:
+    """
+    One step into the registered sequences of a HID. Entries are the
+    sequences that end here.
+    """
+    __slots__ = ("next", "entries")
+
+    def __init__(self):
+        self.next = {}
+        self.entries = []
+
+class DeviceGestures:
+    """
+    Per HID lookup tables and state. The masks say which buttons have
+    something registered for an event, so each loop only the buttons that
+    changed or are being timed are looked at.
+    """
+    def __init__(self):
+        self.last = 0
+        # button id as an int: the entrys registered for it
+        self.buttons = {}
+        self.pressMask = 0
+        self.releaseMask = 0
+        self.whilePressedMask = 0
+        self.whileReleasedMask = 0
+        self.longPressMask = 0
+        self.doubleTapMask = 0
+        # chord mask: [entries]
+        self.chords = {}
+        self.chordBits = 0
+        self.sequences = SequenceNode()
+        # presses of chord buttons held back until they can't be a chord
+        self.pending = 0
+        self.pressTimes = {}
+        # buttons taken by a chord until they are released
+        self.consumed = 0
+        self.activeChords = []
+        # button id: [(threshold, entry)], and the Scheduler calls firing them while it is held
+        self.longPresses = {}
+        self.longPressCalls = {}
+        # button id: Scheduler call ending the window for its second tap
+        self.tapWindows = {}
+        self.cursors = []
+        self.lastStep = 0.0
+
 class ButtonManager(object):
     """
     Class manages the buttons on a HID device. If a HID device is registered users should not
     use any registered buttons directly.
+
+    Each HID's buttons are read once per loop as a bitmask. Presses and releases are the bits
+    that changed since the last loop, and every gesture is found by mask and dict lookups, so
+    a loop costs the same however many events are registered.
+
+    A chord wins over its buttons. Presses of any button in a chord are held back for up to
+    chordWindow seconds, and if the rest of a chord's buttons go down in that time only the
+    chord fires. Its buttons then fire nothing of their own until they are released.
+    Long-press, double-tap and sequences don't hold anything back, a button's press still
+    fires on the way to them. Long-presses and double-tap windows are timed by the Scheduler.
     """
+    # callbacks make requests of other components, so it runs before them
+    isSource = True
+
+    scheduler: Scheduler
+
+    # seconds between the first and last button of a chord going down
+    chordWindow = .06
+    # seconds between the two presses of a double-tap
+    doubleTapWindow = .3
+    # seconds between presses of a sequence
+    sequenceTimeout = 1.0
 
     def setup(self):
         """
@@ -31,6 +124,7 @@ class ButtonManager(object):
         
         self.entrys = {}
         self.enabledTypes = {}
+        self.gestures = {}
 
     def registerButtonEvent(self, hidDevice: wpilib.interfaces.GenericHID, buttonId: int, eventTypes: ButtonEvent, callback : callable):
         """
@@ -41,11 +135,62 @@ class ButtonManager(object):
         assert isinstance(hidDevice, wpilib.interfaces.GenericHID), f"{str(hidDevice)} is not a HID"
         #assert buttonId > 0 and buttonId < 16, f"Invalid button ID {str(buttonId)}"
         assert isinstance(eventTypes, ButtonEvent), f"{eventTypes} is not an eventTypes"
+        assert not eventTypes & ButtonEvent.kOnLongPress, "Use registerLongPress for kOnLongPress, it needs a threshold"
+        assert not eventTypes & ButtonEvent.kOnSequence, "Use registerSequence for kOnSequence, it needs the buttons in order"
         assert callable(callback), f"{str(callback)} must be callable"
         
         entry = self.__createCallbackEntry(hidDevice, buttonId, eventTypes, callback)
         self.logger.info(f"Registering event [{self.__entryStr(entry)}]")
 
+    def registerLongPress(self, hidDevice: wpilib.interfaces.GenericHID, buttonId: int, threshold: float, callback : callable):
+        """
+        Invokes callback once when buttonId has been held for threshold seconds
+        """
+        assert isinstance(hidDevice, wpilib.interfaces.GenericHID), f"{str(hidDevice)} is not a HID"
+        assert threshold > 0, f"Invalid threshold {threshold}"
+        assert callable(callback), f"{str(callback)} must be callable"
+
+        entry = self.__createCallbackEntry(hidDevice, buttonId, ButtonEvent.kOnLongPress, callback)
+        entry["threshold"] = threshold
+        self.gestures[hidDevice].longPresses.setdefault(int(buttonId), []).append((threshold, entry))
+        self.logger.info(f"Registering event [{self.__entryStr(entry)}] after {threshold}s")
+
+    def registerChord(self, hidDevice: wpilib.interfaces.GenericHID, buttonIds, eventTypes: ButtonEvent, callback : callable):
+        """
+        Registers buttonIds pressed together as one button. eventTypes may be
+        kOnPress, kOnRelease and kWhilePressed. The chord is released as soon
+        as any of its buttons is.
+        """
+        assert isinstance(hidDevice, wpilib.interfaces.GenericHID), f"{str(hidDevice)} is not a HID"
+        assert len(set(buttonIds)) > 1, f"A chord needs at least two buttons, not {buttonIds}"
+        assert isinstance(eventTypes, ButtonEvent), f"{eventTypes} is not an eventTypes"
+        assert not eventTypes & ~(ButtonEvent.kOnPress | ButtonEvent.kOnRelease | ButtonEvent.kWhilePressed), \
+            f"{eventTypes} is not supported for chords"
+        assert callable(callback), f"{str(callback)} must be callable"
+
+        gestures = self.__getGestures(hidDevice)
+        mask = buttonMask(buttonIds)
+        entry = self.__newEntry(hidDevice, tuple(buttonIds), eventTypes, callback)
+        gestures.chords.setdefault(mask, []).append(entry)
+        gestures.chordBits |= mask
+        self.logger.info(f"Registering chord [{self.__entryStr(entry)}]")
+
+    def registerSequence(self, hidDevice: wpilib.interfaces.GenericHID, buttonIds, callback : callable):
+        """
+        Invokes callback when buttonIds are pressed one after another, each
+        within sequenceTimeout seconds of the one before
+        """
+        assert isinstance(hidDevice, wpilib.interfaces.GenericHID), f"{str(hidDevice)} is not a HID"
+        assert len(buttonIds) > 1, f"A sequence needs at least two presses, not {buttonIds}"
+        assert callable(callback), f"{str(callback)} must be callable"
+
+        node = self.__getGestures(hidDevice).sequences
+        for buttonId in buttonIds:
+            node = node.next.setdefault(int(buttonId), SequenceNode())
+        entry = self.__newEntry(hidDevice, tuple(buttonIds), ButtonEvent.kOnSequence, callback)
+        node.entries.append(entry)
+        self.logger.info(f"Registering sequence [{self.__entryStr(entry)}]")
+
     def getregisteredEvent(self, hidDevice: wpilib.interfaces.GenericHID , buttonId: int, callback: callable):
         """
         Finds matching callback for a given hidDevice, buttonId, and callback
@@ -63,6 +208,26 @@ class ButtonManager(object):
 
     #### Everything below this is private
 
+    def __getGestures(self, hidDevice):
+        """
+        Private: returns the lookup tables of hidDevice, creating them the first time
+        """
+        if hidDevice not in self.gestures:
+            self.gestures[hidDevice] = DeviceGestures()
+        return self.gestures[hidDevice]
+
+    def __newEntry(self, hidDevice, buttonId, eventTypes, callback):
+        """
+        Private: returns a callback entry not yet registered anywhere
+        """
+        entry = {}
+        entry["hidDevice"] = hidDevice
+        entry["buttonId"] = buttonId
+        entry["eventTypes"] = eventTypes
+        entry["callback"] = callback
+        entry["triggerCount"] = {}
+        return entry
+
     def __createCallbackEntry(self, hidDevice, buttonId, eventTypes, callback):
         """
         Private method for creating a callback entry
@@ -75,15 +240,26 @@ class ButtonManager(object):
             self.enabledTypes[hidDevice][buttonId] = ButtonEvent.kNone
         
 
-        entry = {}
-        entry["hidDevice"] = hidDevice
-        entry["buttonId"] = buttonId
-        entry["eventTypes"] = eventTypes
-        entry["callback"] = callback
-        entry["triggerCount"] = {}
+        entry = self.__newEntry(hidDevice, buttonId, eventTypes, callback)
         #TODO validate entry does not exist
         self.entrys[hidDevice][buttonId].append(entry)
         self.enabledTypes[hidDevice][buttonId] |= eventTypes
+
+        gestures = self.__getGestures(hidDevice)
+        gestures.buttons[int(buttonId)] = self.entrys[hidDevice][buttonId]
+        bit = buttonMask((buttonId,))
+        if eventTypes & ButtonEvent.kOnPress:
+            gestures.pressMask |= bit
+        if eventTypes & ButtonEvent.kOnRelease:
+            gestures.releaseMask |= bit
+        if eventTypes & ButtonEvent.kWhilePressed:
+            gestures.whilePressedMask |= bit
+        if eventTypes & ButtonEvent.kWhileReleased:
+            gestures.whileReleasedMask |= bit
+        if eventTypes & ButtonEvent.kOnLongPress:
+            gestures.longPressMask |= bit
+        if eventTypes & ButtonEvent.kOnDoubleTap:
+            gestures.doubleTapMask |= bit
         return entry
 
     def __entryStr(self, entry):
@@ -130,62 +306,171 @@ class ButtonManager(object):
                 self.logger.error(f"{str(callback)} crashed. E is {str(e)}")
                 traceback.print_exc()
 
-    def __runOnPressed(self, hidDevice: wpilib.interfaces.GenericHID, button, enabledActions, entrys):
+    def __runButtons(self, hidDevice, mask, action):
         """
-        Private: checks button pressed
+        Private: processes action for every button in mask
         """
-        if not enabledActions & ButtonEvent.kOnPress:
-            return
-        #note that when getRawButtonPressed is called it resets the value
-        wasButtonPressed = hidDevice.getRawButtonPressed(button)
-        if wasButtonPressed:
-            self.logger.debug("__runOnPressed: %s:%s", hidDevice.getName, str(button))
-            self.__processEvent(entrys, ButtonEvent.kOnPress)
+        entrys = self.gestures[hidDevice].buttons
+        for button in buttonBits(mask):
+            self.logger.debug("%s: %s:%s", action, hidDevice.getName(), button)
+            self.__processEvent(entrys[button], action)
 
-    def __runOnReleased(self, hidDevice: wpilib.interfaces.GenericHID, button, enabledActions, entrys):
+    def __runChords(self, hidDevice, gestures, mask, pressed, released, now):
         """
-        Private Processes event type
+        Private: releases broken chords and presses the one just completed
         """
-        if not enabledActions & ButtonEvent.kOnRelease:
-            return
-        wasButtonReleased = hidDevice.getRawButtonReleased(button)
-        if wasButtonReleased:
-            self.logger.debug("__runOnReleased: %s:%s", hidDevice.getName, str(button))
-            self.__processEvent(entrys, ButtonEvent.kOnRelease)
-        
-    def __runWhilePressed(self, hidDevice: wpilib.interfaces.GenericHID, button, enabledActions, entrys):
+        for chord in [chord for chord in gestures.activeChords if released & chord]:
+            gestures.activeChords.remove(chord)
+            self.__processEvent(gestures.chords[chord], ButtonEvent.kOnRelease)
+
+        # only buttons no other event has been fired for yet can make a chord
+        fresh = (pressed | gestures.pending) & mask & gestures.chordBits
+        while fresh & pressed:
+            chord = self.__findChord(gestures, fresh, pressed)
+            if chord is None:
+                break
+            self.logger.debug("Chord %s:%s", hidDevice.getName(), bin(chord))
+            fresh &= ~chord
+            gestures.pending &= ~chord
+            gestures.consumed |= chord
+            gestures.activeChords.append(chord)
+            self.__processEvent(gestures.chords[chord], ButtonEvent.kOnPress)
+
+        for chord in gestures.activeChords:
+            self.__processEvent(gestures.chords[chord], ButtonEvent.kWhilePressed)
+
+    def __findChord(self, gestures, fresh, pressed):
+        """
+        Private: returns the registered chord with the most buttons made of fresh buttons,
+        one of them pressed this loop. None if there isn't one. Only the few buttons held
+        are searched, however many chords are registered.
+        """
+        best = None
+        bestSize = 0
+        chord = fresh
+        while chord:
+            if chord & pressed and chord in gestures.chords:
+                size = bin(chord).count("1")
+                if size > bestSize:
+                    best = chord
+                    bestSize = size
+            chord = (chord - 1) & fresh
+        return best
+
+    def __takePresses(self, gestures, mask, pressed, released, now):
+        """
+        Private: returns the presses that are single button presses this loop.
+        Chord buttons are held back until chordWindow runs out or they are released.
+        """
+        fresh = pressed & ~gestures.consumed
+        held = fresh & gestures.chordBits
+        for button in buttonBits(held):
+            gestures.pressTimes[button] = now
+        gestures.pending |= held
+
+        expired = gestures.pending & released
+        for button in buttonBits(gestures.pending & ~released):
+            if now - gestures.pressTimes[button] >= self.chordWindow:
+                expired |= 1 << (button - 1)
+        gestures.pending &= ~expired
+        presses = (fresh & ~held) | expired
+        for button in buttonBits(fresh & ~held):
+            gestures.pressTimes[button] = now
+        return presses
+
+    def __startLongPresses(self, hidDevice, gestures, presses, now):
         """
-        Private Processes event type
+        Private: schedules the long presses of the buttons just pressed
         """
-        if not enabledActions & ButtonEvent.kWhilePressed:
-            return
-        isButtonPressed = hidDevice.getRawButton(button)
-        if isButtonPressed:
-            self.logger.debug("__runWhilePressed: %s:%s", hidDevice.getName, str(button))
-            self.__processEvent(entrys, ButtonEvent.kWhilePressed)
-    def __runWhileReleased(self, hidDevice: wpilib.interfaces.GenericHID, button, enabledActions, entrys):
+        for button in buttonBits(presses & gestures.longPressMask):
+            heldFor = now - gestures.pressTimes[button]
+            gestures.longPressCalls[button] = [self.scheduler.callLater(threshold - heldFor, self.__fireLongPress, hidDevice, button, entry)
+                                               for threshold, entry in gestures.longPresses[button]]
+
+    def __cancelLongPresses(self, gestures, releases):
         """
-        Private Processes event type
+        Private: cancels the long presses of the buttons just released
+        """
+        for button in buttonBits(releases & gestures.longPressMask):
+            for call in gestures.longPressCalls.pop(button, ()):
+                call.cancel()
+
+    def __fireLongPress(self, hidDevice, button, entry):
+        """
+        Private: Scheduler call for a button still held after its threshold
+        """
+        self.logger.debug("%s: %s:%s", ButtonEvent.kOnLongPress, hidDevice.getName(), button)
+        self.__processEvent([entry], ButtonEvent.kOnLongPress)
+
+    def __runDoubleTaps(self, hidDevice, gestures, presses, now):
         """
-        if not enabledActions & ButtonEvent.kWhileReleased:
-            return
-        isButtonReleased = not hidDevice.getRawButton(button)
-        if isButtonReleased:
-            self.logger.debug("__runWhileReleased: %s:%s", hidDevice.getName, str(button))
-            self.__processEvent(entrys, ButtonEvent.kWhileReleased)
+        Private: fires the second of two presses within doubleTapWindow
+        """
+        for button in buttonBits(presses & gestures.doubleTapMask):
+            window = gestures.tapWindows.pop(button, None)
+            if window is not None and window.isPending():
+                # a third tap starts a new double-tap
+                window.cancel()
+                self.__runButtons(hidDevice, 1 << (button - 1), ButtonEvent.kOnDoubleTap)
+            else:
+                remaining = self.doubleTapWindow - (now - gestures.pressTimes[button])
+                gestures.tapWindows[button] = self.scheduler.callLater(remaining, gestures.tapWindows.pop, button, None)
+
+    def __runSequences(self, gestures, presses, now):
+        """
+        Private: advances every sequence in progress by this loop's presses
+        """
+        if now - gestures.lastStep > self.sequenceTimeout:
+            gestures.cursors = []
+        for button in buttonBits(presses):
+            gestures.lastStep = now
+            root = gestures.sequences
+            cursors = [node.next[button] for node in gestures.cursors + [root] if button in node.next]
+            for node in cursors:
+                if node.entries:
+                    self.__processEvent(node.entries, ButtonEvent.kOnSequence)
+            gestures.cursors = [node for node in cursors if node.next]
+
+    def __runDevice(self, hidDevice, gestures, now):
+        """
+        Private: processes one HID's buttons for this loop
+        """
+        mask = readButtons(hidDevice)
+        pressed = mask & ~gestures.last
+        released = gestures.last & ~mask
+        gestures.last = mask
+
+        if gestures.chords:
+            self.__runChords(hidDevice, gestures, mask, pressed, released, now)
+        presses = self.__takePresses(gestures, mask, pressed, released, now)
+        # released chord buttons fire no release, they never fired a press
+        releases = released & ~gestures.consumed
+        gestures.consumed &= mask
+
+        if presses & gestures.pressMask:
+            self.__runButtons(hidDevice, presses & gestures.pressMask, ButtonEvent.kOnPress)
+        if releases & gestures.releaseMask:
+            self.__runButtons(hidDevice, releases & gestures.releaseMask, ButtonEvent.kOnRelease)
+        whilePressed = mask & gestures.whilePressedMask & ~gestures.consumed & ~gestures.pending
+        if whilePressed:
+            self.__runButtons(hidDevice, whilePressed, ButtonEvent.kWhilePressed)
+        whileReleased = ~mask & gestures.whileReleasedMask
+        if whileReleased:
+            self.__runButtons(hidDevice, whileReleased, ButtonEvent.kWhileReleased)
+
+        if presses & gestures.longPressMask:
+            self.__startLongPresses(hidDevice, gestures, presses, now)
+        if releases & gestures.longPressMask:
+            self.__cancelLongPresses(gestures, releases)
+        if presses & gestures.doubleTapMask:
+            self.__runDoubleTaps(hidDevice, gestures, presses, now)
+        if presses and gestures.sequences.next:
+            self.__runSequences(gestures, presses, now)
 
     def execute(self):
         """
         Process button events each cycle
         """
-        for hidDevice in self.entrys:
-            for button in self.entrys[hidDevice]:
-                entrys = self.entrys[hidDevice][button]
-
-                enabledActions = self.enabledTypes[hidDevice][button]
-                
-                #check each event type
-                self.__runOnPressed(hidDevice, button, enabledActions, entrys)
-                self.__runOnReleased(hidDevice, button, enabledActions, entrys)
-                self.__runWhilePressed(hidDevice, button, enabledActions, entrys)
-                self.__runWhileReleased(hidDevice, button, enabledActions, entrys)
+        now = Timer.getFPGATimestamp()
+        for hidDevice, gestures in self.gestures.items():
+            self.__runDevice(hidDevice, gestures, now)
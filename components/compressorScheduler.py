@@ -0,0 +1,145 @@
+"""
+Decides when the compressor may run from a model of the air left in the tanks
+"""
+from wpilib import Timer
+import logging
+
+from magicbot import tunable, feedback
+from components.pneumatics import Pneumatics
+from components.driveTrain import DriveTrain
+from utils.eventBus import EventBus, StateChanged
+
+class CompressorScheduler:
+    """
+    Left on closed loop, the compressor starts whenever the pressure switch
+    says so, which is usually just as the drive train and the flywheel are
+    drawing the most current.
+
+    The pressure in the tanks is estimated instead. Every loader actuation
+    takes actuationCost psi out, and the compressor puts fillRate psi per
+    second back while it runs. When the compressor is allowed to run but
+    isn't, the pressure switch has stopped it and the tanks are full.
+
+    The compressor only runs when it is cheap to: the drive outputs are at
+    or under lowLoadOutput, nothing is shooting, and there was no hard
+    acceleration for accelerationHoldOff seconds. The exception is the
+    reserve, air for reserveActuations more loader actuations above
+    workingPressure. Under the reserve the compressor runs no matter what,
+    until there is a spare actuation's worth again.
+
+    Until the tanks are known to be full they are taken to be at
+    workingPressure, so a freshly booted robot pumps like it used to.
+    """
+    compatString = ["doof"]
+
+    pneumatics: Pneumatics
+    driveTrain: DriveTrain
+    eventBus: EventBus
+    logger: logging
+
+    # pressures in psi
+    fullPressure = tunable(120)
+    workingPressure = tunable(60)
+    actuationCost = tunable(2.5)
+    # psi per second while the compressor runs
+    fillRate = tunable(1.0)
+    reserveActuations = tunable(4)
+    lowLoadOutput = tunable(.4)
+    # drive output change per second that counts as hard acceleration
+    accelerationLimit = tunable(3.0)
+    accelerationHoldOff = tunable(.5)
+    # seconds between turning the compressor on and off for load changes
+    minSwitchTime = tunable(1.0)
+    # seconds allowed but not running before the tanks are taken to be full
+    fullSettleTime = tunable(.5)
+
+    def setup(self):
+        self.pressure = self.workingPressure
+        self.protectingReserve = True
+        self.shooting = False
+        self.eventBus.subscribe(StateChanged, self.shooterStateChanged)
+
+    def on_enable(self):
+        now = Timer.getFPGATimestamp()
+        self.lastTime = now
+        self.lastSwitch = now - self.minSwitchTime
+        self.stoppedSince = None
+        self.accelerateUntil = 0
+        self.lastActuations = self.pneumatics.getLoaderActuations()
+        self.lastLoad = self.getDriveLoad()
+
+    def shooterStateChanged(self, event):
+        if event.machine == "ShooterLogic":
+            # done() publishes "", the shooter stopped
+            self.shooting = event.new not in ("", "idling")
+
+    def getDriveLoad(self):
+        return max(abs(self.driveTrain.getLeft()), abs(self.driveTrain.getRight()))
+
+    def getReservePressure(self):
+        return self.workingPressure + self.reserveActuations * self.actuationCost
+
+    @feedback
+    def getStoredPressure(self):
+        """Estimated, in psi."""
+        return round(self.pressure, 1)
+
+    @feedback
+    def getActuationsLeft(self):
+        """Loader actuations the stored air is good for."""
+        return max(0, int((self.pressure - self.workingPressure) / self.actuationCost))
+
+    @feedback
+    def isProtectingReserve(self):
+        return self.protectingReserve
+
+    def updatePressure(self, now, dt):
+        actuations = self.pneumatics.getLoaderActuations()
+        self.pressure -= (actuations - self.lastActuations) * self.actuationCost
+        self.lastActuations = actuations
+
+        if self.pneumatics.isCompressorRunning():
+            self.pressure += self.fillRate * dt
+            self.stoppedSince = None
+        elif not self.pneumatics.isCompressorAllowed():
+            self.stoppedSince = None
+        elif self.stoppedSince is None:
+            self.stoppedSince = now
+        elif now - self.stoppedSince >= self.fullSettleTime:
+            self.pressure = self.fullPressure
+        self.pressure = min(max(self.pressure, 0), self.fullPressure)
+
+    def execute(self):
+        now = Timer.getFPGATimestamp()
+        dt = now - self.lastTime
+        self.lastTime = now
+        self.updatePressure(now, dt)
+
+        load = self.getDriveLoad()
+        if dt > 0 and abs(load - self.lastLoad) / dt > self.accelerationLimit:
+            self.accelerateUntil = now + self.accelerationHoldOff
+        self.lastLoad = load
+
+        reserve = self.getReservePressure()
+        if self.pressure < reserve:
+            self.protectingReserve = True
+        elif self.pressure >= reserve + self.actuationCost:
+            self.protectingReserve = False
+
+        allowed = self.pneumatics.isCompressorAllowed()
+        if self.protectingReserve:
+            wanted = True
+        elif self.shooting or now < self.accelerateUntil:
+            wanted = False
+        elif now - self.lastSwitch < self.minSwitchTime:
+            wanted = allowed
+        else:
+            wanted = load <= self.lowLoadOutput
+
+        if wanted != allowed:
+            self.lastSwitch = now
+            self.logger.debug("%s compressor at %.1f psi", "Starting" if wanted else "Stopping", self.pressure)
+            if wanted:
+                self.pneumatics.startCompressor()
+            else:
+                self.pneumatics.stopCompressor()
@@ -0,0 +1,178 @@
+"""
+Polls CAN devices and gyros for faults and publishes their health
+"""
+from magicbot import tunable
+from networktables import NetworkTables
+import logging
+
+class DeviceKind:
+    kTalon = "talon"
+    kSparkMax = "sparkMax"
+    kNavx = "navx"
+    kUnknown = "unknown"
+
+class DeviceStatus:
+    """
+    Last known health of a single device
+    """
+    def __init__(self, subsystem, name, device):
+        self.subsystem = subsystem
+        self.name = name
+        self.device = device
+        self.kind = getDeviceKind(device)
+        self.healthy = device is not None
+        self.reason = "" if device is not None else "not created"
+        self.stickyFaults = 0
+        self.firmware = 0
+        self.busVoltage = 0.0
+        self.temperature = 0.0
+        self.errorCount = 0
+        self.pollCount = 0
+
+    def key(self):
+        return f"{self.subsystem}/{self.name}"
+
+def getDeviceKind(device):
+    """
+    Works out what kind of device this is without importing any vendor library
+    """
+    if device is None:
+        return DeviceKind.kUnknown
+    if hasattr(device, "getMotorTemperature"):
+        return DeviceKind.kSparkMax
+    if hasattr(device, "getTemperature") and hasattr(device, "getBusVoltage"):
+        return DeviceKind.kTalon
+    if hasattr(device, "isConnected") and hasattr(device, "getTempC"):
+        return DeviceKind.kNavx
+    return DeviceKind.kUnknown
+
+class DeviceHealth:
+    """
+    Round robins through every motor and gyro, polling one device per tick
+    so the CAN bus load is spread out. Other components can ask isHealthy()
+    to fall back when a device they need has failed.
+    """
+    isSource = True
+
+    subsystemMotors: dict
+    subsystemGyros: dict
+    logger: logging
+
+    devicesPerTick = tunable(1)
+    maxTemperature = tunable(80)
+    minBusVoltage = tunable(7)
+    maxPollErrors = tunable(3)
+
+    def setup(self):
+        self.statuses = {}
+        self.pollOrder = []
+        self.nextDevice = 0
+        self.table = NetworkTables.getTable("DeviceHealth")
+
+        for container in (self.subsystemMotors, self.subsystemGyros):
+            for subsystem, devices in container.items():
+                for name, device in devices.items():
+                    status = DeviceStatus(subsystem, name, device)
+                    self.statuses[status.key()] = status
+                    if device is None:
+                        self.logger.error("%s was never created, marking as failed", status.key())
+                        self.publish(status)
+                        continue
+                    if status.kind == DeviceKind.kUnknown:
+                        continue
+                    self.pollOrder.append(status)
+
+        self.logger.info("Monitoring %d of %d devices", len(self.pollOrder), len(self.statuses))
+
+    def isHealthy(self, subsystem, name):
+        """
+        Returns True if the device exists and its last poll was good
+        """
+        status = self.statuses.get(f"{subsystem}/{name}")
+        if status is None:
+            return False
+        return status.healthy
+
+    def getStatus(self, subsystem, name):
+        """
+        Returns the DeviceStatus for a device or None if it is not monitored
+        """
+        return self.statuses.get(f"{subsystem}/{name}")
+
+    def getFailedDevices(self):
+        return [status.key() for status in self.statuses.values() if not status.healthy]
+
+    def poll(self, status):
+        """
+        Reads faults, firmware, voltage and temperature for one device
+        """
+        device = status.device
+        try:
+            if status.kind == DeviceKind.kTalon:
+                import ctre
+                faults = ctre.StickyFaults()
+                device.getStickyFaults(faults)
+                status.stickyFaults = faults.toBitfield()
+                status.firmware = device.getFirmwareVersion()
+                status.busVoltage = device.getBusVoltage()
+                status.temperature = device.getTemperature()
+                responding = status.firmware > 0
+            elif status.kind == DeviceKind.kSparkMax:
+                status.stickyFaults = device.getStickyFaults()
+                status.firmware = device.getFirmwareVersion()
+                status.busVoltage = device.getBusVoltage()
+                status.temperature = device.getMotorTemperature()
+                responding = status.firmware > 0
+            else:
+                status.firmware = device.getFirmwareVersion()
+                status.temperature = device.getTempC()
+                responding = device.isConnected()
+        except Exception as e:
+            status.errorCount += 1
+            if status.errorCount >= self.maxPollErrors:
+                self.setHealth(status, False, f"poll failed: {e}")
+            return
+
+        status.errorCount = 0
+        status.pollCount += 1
+        if not responding:
+            self.setHealth(status, False, "not responding")
+        elif status.temperature > self.maxTemperature:
+            self.setHealth(status, False, "over temperature")
+        elif status.kind != DeviceKind.kNavx and status.busVoltage < self.minBusVoltage:
+            self.setHealth(status, False, "low bus voltage")
+        else:
+            self.setHealth(status, True, "")
+
+    def setHealth(self, status, healthy, reason):
+        if status.healthy != healthy:
+            if healthy:
+                self.logger.info("%s recovered", status.key())
+            else:
+                self.logger.error("%s failed: %s", status.key(), reason)
+        status.healthy = healthy
+        status.reason = reason
+
+    def publish(self, status):
+        """
+        Pushes the status of a device to NetworkTables
+        """
+        table = self.table.getSubTable(status.subsystem).getSubTable(status.name)
+        table.putBoolean("healthy", status.healthy)
+        table.putString("reason", status.reason)
+        table.putNumber("stickyFaults", status.stickyFaults)
+        table.putString("firmware", str(status.firmware))
+        table.putNumber("busVoltage", status.busVoltage)
+        table.putNumber("temperature", status.temperature)
+
+    def execute(self):
+        """
+        Polls the next devicesPerTick devices
+        """
+        if not self.pollOrder:
+            return
+        for _ in range(min(int(self.devicesPerTick), len(self.pollOrder))):
+            status = self.pollOrder[self.nextDevice]
+            self.nextDevice = (self.nextDevice + 1) % len(self.pollOrder)
+            self.poll(status)
+            self.publish(status)
@@ -15,7 +15,6 @@ class DriveTrain():
     # Note - The way we will want to do this will be to give this component motor description dictionaries from robotmap and then creating the motors with motorhelper. After that, we simply call wpilib' differential drive
     motors_driveTrain: dict
     driveMotorsMultiplier = tunable(.5)
-    gyros_system: dict
 
     def setup(self):
         self.tankLeftSpeed = 0
@@ -1,6 +1,8 @@
 from magicbot import tunable
 
 class Elevator:
+    compatString = ["doof"]
+
     motors_loader: dict
     downSpeed = tunable(-.4)
     upSpeed = tunable(.4)
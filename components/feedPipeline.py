@@ -0,0 +1,134 @@
+from components.shooterMotors import ShooterMotorCreation, Direction
+from components.breakSensors import Sensors, SensorKey
+from components.shooterFastLoop import ShooterFastLoop
+from utils.magicbotStrict import StrictStateMachine, state
+from magicbot import tunable, feedback
+import logging
+
+class FeedPipeline(StrictStateMachine):
+    """
+    Feeds balls into the flywheel one at a time as fast as it can recover.
+
+    The next ball is moved up to the staging sensor (second from the top)
+    while the flywheel spins up or recovers from the last shot. It is
+    released as soon as the measured velocity is back within tolerance.
+    Balls in the loader touch, so the shooting sensor can't tell one from
+    the next. A shot is counted when the flywheel slows by shotDrop below
+    tolerance as the ball hits it, and the loader stops right away so the
+    next ball waits at the top until the flywheel has recovered.
+
+    When ShooterFastLoop is running the release and stop are left to it,
+    so they happen within a few ms of the flywheel crossing the thresholds
+    instead of on the next 20 ms loop.
+
+    ShooterLogic calls feed() every loop it wants balls fired. When feed()
+    isn't called the pipeline stops and the loader is stopped.
+    """
+    compatString = ["doof"]
+
+    shooterMotors: ShooterMotorCreation
+    sensors: Sensors
+    shooterFastLoop: ShooterFastLoop
+    logger: logging
+
+    stagingSpeed = tunable(.4)
+    releaseSpeed = tunable(.6)
+    # rpm below tolerance the flywheel has to slow for a ball to count as shot
+    shotDrop = tunable(150)
+    # a released ball that hasn't reached the flywheel by now is restaged
+    releaseTimeout = tunable(.5)
+
+    targetSpeed = 0
+    tolerance = 0
+    feeding = False
+    shotCount = 0
+    interruptStates = ["idling"]
+
+    def feed(self, targetSpeed, tolerance):
+        """Keeps the pipeline firing at flywheel speed targetSpeed (rpm) +- tolerance."""
+        self.targetSpeed = targetSpeed
+        self.tolerance = tolerance
+        self.feeding = True
+        self.engage()
+
+    def isFlywheelReady(self):
+        return abs(self.shooterMotors.getShooterVelocity() - self.targetSpeed) <= self.tolerance
+
+    def isBallInFlywheel(self):
+        return self.shooterMotors.getShooterVelocity() < self.targetSpeed - self.tolerance - self.shotDrop
+
+    def isStaged(self):
+        return self.sensors.isTripped(SensorKey.kStagingSensor) or self.sensors.isTripped(SensorKey.kShootingSensor)
+
+    @feedback
+    def getShotCount(self):
+        return self.shotCount
+
+    @state(first = True, state_transitions = interruptStates + ['clearing', 'staging'])
+    def idling(self):
+        """Backs a ball off the flywheel before spinning up, otherwise starts staging."""
+        if self.sensors.isTripped(SensorKey.kShootingSensor):
+            self.next_state_now('clearing')
+        else:
+            self.next_state_now('staging')
+
+    @state(state_transitions = interruptStates + ['staging'])
+    def clearing(self):
+        """Reverses until the shooting sensor is clear so nothing touches the flywheel early."""
+        if self.sensors.isTripped(SensorKey.kShootingSensor):
+            self.shooterMotors.runLoader(self.stagingSpeed, Direction.kBackwards)
+        else:
+            self.shooterMotors.stopLoader()
+            self.next_state_now('staging')
+
+    @state(state_transitions = interruptStates + ['staged'])
+    def staging(self):
+        """Moves the top ball up to the staging sensor. Waits with the loader stopped when empty."""
+        if self.isStaged():
+            self.shooterMotors.stopLoader()
+            self.next_state_now('staged')
+        elif any(self.sensors.getTripped()):
+            self.shooterMotors.runLoader(self.stagingSpeed, Direction.kForwards)
+        else:
+            self.shooterMotors.stopLoader()
+
+    @state(state_transitions = interruptStates + ['releasing'])
+    def staged(self):
+        """Holds the staged ball until the flywheel is at speed."""
+        self.shooterMotors.stopLoader()
+        if self.shooterFastLoop.isRunning():
+            self.shooterFastLoop.arm(self.targetSpeed, self.tolerance, self.shotDrop, self.releaseSpeed)
+            if self.shooterFastLoop.getReleaseTime() is not None:
+                self.next_state_now('releasing')
+        elif self.isFlywheelReady():
+            self.next_state_now('releasing')
+
+    @state(state_transitions = interruptStates + ['staging'])
+    def releasing(self, state_tm):
+        """Pushes the staged ball into the flywheel until the flywheel slows from hitting it."""
+        if self.shooterFastLoop.isArmed():
+            shot = self.shooterFastLoop.getShotTime() is not None
+        else:
+            shot = self.isBallInFlywheel()
+        if shot:
+            self.shotCount += 1
+            self.shooterFastLoop.disarm()
+            self.shooterMotors.stopLoader()
+            self.next_state_now('staging')
+            return
+        if state_tm > self.releaseTimeout:
+            self.logger.warning("Ball did not reach the flywheel, restaging")
+            self.shooterFastLoop.disarm()
+            self.next_state_now('staging')
+            return
+        if not self.shooterFastLoop.isArmed():
+            self.shooterMotors.runLoader(self.releaseSpeed, Direction.kForwards)
+
+    def execute(self):
+        """Stops the loader the first loop nobody asked to feed."""
+        if not self.feeding and self.is_executing:
+            self.shooterFastLoop.disarm()
+            self.shooterMotors.stopLoader()
+        super().execute()
+        # cleared after the states run, next_state_now calls execute again
+        self.feeding = False
@@ -1,5 +1,6 @@
 from robotMap import XboxMap
 from components.shooterMotors import ShooterMotorCreation, Direction
+from utils.eventBus import EventBus, MechTriggersChanged
 from enum import Enum, auto
 from magicbot import tunable
 import logging
@@ -10,46 +11,53 @@ class Type(Enum):
     kLoader = auto()
 
 class FeederMap:
-    """Simple map that holds the logic for running elements of the feeder."""
+    """
+    Simple map that holds the logic for running elements of the feeder.
+    The direction the mech triggers ask for is only worked out when one
+    is pressed or released.
+    """
 
     compatString = ["doof"]
 
     shooterMotors: ShooterMotorCreation
     xboxMap: XboxMap
+    eventBus: EventBus
     logger: logging
 
     loaderMotorSpeed = tunable(.4)
     intakeMotorSpeed = tunable(.7)
 
+    def setup(self):
+        self.triggersChanged(MechTriggersChanged(*self.xboxMap.mechTriggers))
+        self.eventBus.subscribe(MechTriggersChanged, self.triggersChanged)
+
     def on_enable(self):
         pass
         # self.logger.setLevel(logging.DEBUG)
 
+    def triggersChanged(self, event):
+        """Right trigger alone runs forwards, left alone backwards, neither or both stops."""
+        if event.right and not event.left:
+            self.direction = Direction.kForwards
+        elif event.left and not event.right:
+            self.direction = Direction.kBackwards
+        else:
+            self.direction = None
+        self.logger.debug("Mech triggers now run the feeder %s", self.direction)
+
     def run(self, loaderFunc):
         """Called when execution of a feeder element is desired."""
         if loaderFunc == Type.kIntake:
-            if self.xboxMap.getMechRightTrig() > 0 and self.xboxMap.getMechLeftTrig() == 0:
-                self.shooterMotors.runIntake(self.intakeMotorSpeed, Direction.kForwards)
-                self.logger.debug("right trig intake", self.xboxMap.getMechRightTrig())
-
-            elif self.xboxMap.getMechLeftTrig() > 0 and self.xboxMap.getMechRightTrig() == 0:
-                self.shooterMotors.runIntake(self.intakeMotorSpeed, Direction.kBackwards)
-                self.logger.debug("left trig intake", self.xboxMap.getMechLeftTrig())
-
-            else:
+            if self.direction is None:
                 self.shooterMotors.stopIntake()
+            else:
+                self.shooterMotors.runIntake(self.intakeMotorSpeed, self.direction)
 
         if loaderFunc == Type.kLoader:
-            if self.xboxMap.getMechRightTrig() > 0 and self.xboxMap.getMechLeftTrig() == 0:
-                self.shooterMotors.runLoader(self.loaderMotorSpeed, Direction.kForwards)
-                self.logger.debug("right trig manual", self.xboxMap.getMechRightTrig())
-
-            elif self.xboxMap.getMechLeftTrig() > 0 and self.xboxMap.getMechRightTrig() == 0:
-                self.shooterMotors.runLoader(self.loaderMotorSpeed, Direction.kBackwards)
-                self.logger.debug("left trig manual", self.xboxMap.getMechLeftTrig())
-
-            else:
+            if self.direction is None:
                 self.shooterMotors.stopLoader()
+            else:
+                self.shooterMotors.runLoader(self.loaderMotorSpeed, self.direction)
 
     def execute(self):
         pass
@@ -0,0 +1,107 @@
+"""
+Keeps Python's cyclic garbage collector out of the enabled robot loop
+"""
+import gc
+import logging
+import time
+
+from magicbot import tunable, feedback
+
+class GcPolicy:
+    """
+    The cyclic collector runs whenever enough container objects have been
+    allocated since the last collection, which can land in the middle of
+    teleopPeriodic and push the loop over 20 ms.
+
+    freeze() moves everything created while booting into the permanent
+    generation so no collection walks it again. While enabled automatic
+    collection is turned off, or with disableWhileEnabled off only runs
+    after enabledThreshold allocations. Disabling restores the thresholds
+    and runs a full collection, so garbage left by autonomous is collected
+    before teleop. disabledPeriodic() collects the youngest generation
+    every loop while disabled.
+
+    Every collection is timed through gc.callbacks.
+    """
+    logger: logging
+
+    disableWhileEnabled = tunable(True)
+    enabledThreshold = tunable(50000)
+    # pauses longer than this while enabled are logged as warnings, in seconds
+    warnPause = tunable(.002)
+
+    def setup(self):
+        self.defaultThresholds = gc.get_threshold()
+        self.enabled = False
+        self.collectionStart = None
+        self.pauseCount = 0
+        self.enabledPauseCount = 0
+        self.worstEnabledPause = 0.0
+        self.lastPause = 0.0
+        if self.timeCollection not in gc.callbacks:
+            gc.callbacks.append(self.timeCollection)
+
+    def freeze(self):
+        """
+        Call once the robot has been created. Collects what boot left
+        behind, then freezes everything that is left.
+        """
+        start = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        self.logger.info("Froze %d boot objects in %.1f ms", gc.get_freeze_count(), (time.perf_counter() - start) * 1000)
+
+    def timeCollection(self, phase, info):
+        """gc.callbacks hook, called at the start and stop of every collection."""
+        if phase == "start":
+            self.collectionStart = time.perf_counter()
+            return
+        if self.collectionStart is None:
+            return
+        pause = time.perf_counter() - self.collectionStart
+        self.collectionStart = None
+        self.pauseCount += 1
+        self.lastPause = pause
+        if not self.enabled:
+            self.logger.debug("Generation %d collection took %.2f ms", info["generation"], pause * 1000)
+            return
+        self.enabledPauseCount += 1
+        self.worstEnabledPause = max(self.worstEnabledPause, pause)
+        if pause > self.warnPause:
+            self.logger.warning("Generation %d collection took %.2f ms while enabled", info["generation"], pause * 1000)
+
+    def on_enable(self):
+        self.enabled = True
+        if self.disableWhileEnabled:
+            gc.disable()
+        else:
+            gc.set_threshold(int(self.enabledThreshold), *self.defaultThresholds[1:])
+
+    def on_disable(self):
+        if self.enabled:
+            self.logger.info("%d collections while enabled, worst %.2f ms", self.enabledPauseCount, self.worstEnabledPause * 1000)
+        self.enabled = False
+        gc.set_threshold(*self.defaultThresholds)
+        gc.enable()
+        gc.collect()
+
+    def disabledPeriodic(self):
+        """Call every loop while disabled."""
+        gc.collect(0)
+
+    @feedback
+    def getEnabledGcPauses(self):
+        return self.enabledPauseCount
+
+    @feedback
+    def getWorstEnabledGcPause(self):
+        """Longest collection while enabled, in ms."""
+        return round(self.worstEnabledPause * 1000, 3)
+
+    @feedback
+    def getLastGcPause(self):
+        """In ms."""
+        return round(self.lastPause * 1000, 3)
+
+    def execute(self):
+        pass
@@ -0,0 +1,196 @@
+"""
+Estimate of where every ball in the loader is
+"""
+from components.shooterMotors import ShooterMotorCreation
+from components.breakSensors import Sensors
+from components.shooterFastLoop import ShooterFastLoop
+from magicbot import tunable, feedback
+from wpilib import Timer
+import logging
+
+class Indexer:
+    """
+    Tracks each ball in the loader as a position in meters up the track
+    from the loading sensor, bottom first.
+
+    Positions are moved every loop by the loader output the motor had
+    since the last loop, then corrected with the five break sensors. A
+    sensor tripping or clearing puts the nearest ball exactly one radius
+    from it. A sensor that is tripped with no ball near it adds one, and a
+    ball sitting in front of a clear sensor is dropped. Balls that run off
+    the top went into the flywheel. When ShooterFastLoop is running, edges
+    are placed at the time it saw them rather than at the start of the loop.
+
+    The loader counts as jammed when it has been running with balls in it
+    for jamFactor times as long as it takes to move one ball length
+    without any sensor changing.
+    """
+    compatString = ["doof"]
+    isSource = True
+
+    shooterMotors: ShooterMotorCreation
+    sensors: Sensors
+    shooterFastLoop: ShooterFastLoop
+    logger: logging
+
+    # Track geometry, in meters
+    sensorSpacing = tunable(.15)
+    ballDiameter = tunable(.18)
+    # belt speed at full loader output, m/s
+    beltSpeed = tunable(1.5)
+    # room left behind the bottom ball when packing, past what the next ball needs
+    packMargin = tunable(.02)
+    jamFactor = tunable(3.0)
+    minJamTime = tunable(.25)
+
+    sensorCount = 5
+    # estimates this close to a sensor are taken to be in front of it
+    positionSlack = .02
+    # longest loop the dead reckoning trusts, so a stall doesn't throw balls across the track
+    maxStep = .1
+
+    def on_enable(self):
+        self.lastTime = Timer.getFPGATimestamp()
+        self.lastChange = self.lastTime
+        # the sensors are read for the first time in execute, after Sensors is enabled
+        self.lastTripped = None
+        self.jammed = False
+        self.balls = []
+
+    def snapshot(self, tripped):
+        """
+        Rebuilds the estimate from the sensors alone, assuming the balls touch
+        """
+        self.balls = []
+        radius = self.ballDiameter / 2
+        for i, isTripped in enumerate(tripped):
+            position = self.sensorPosition(i)
+            if not isTripped:
+                continue
+            if self.balls and position - self.balls[-1] <= radius:
+                continue
+            if self.balls:
+                position = max(position, self.balls[-1] + self.ballDiameter)
+            self.balls.append(position)
+
+    def sensorPosition(self, index):
+        return index * self.sensorSpacing
+
+    def getTopPosition(self):
+        """Position a ball has to be past to be out of the shooting sensor and in the flywheel."""
+        return self.sensorPosition(self.sensorCount - 1) + self.ballDiameter / 2
+
+    def nearestBall(self, position):
+        """Index of the ball closest to position, None when empty."""
+        if not self.balls:
+            return None
+        return min(range(len(self.balls)), key = lambda i: abs(self.balls[i] - position))
+
+    def approachingBall(self, position, direction):
+        """
+        Index of the closest ball within a ball length short of position in
+        the direction of travel, None when no ball could be arriving there.
+        """
+        candidates = [i for i, ball in enumerate(self.balls)
+                      if 0 <= (position - ball) * direction <= self.ballDiameter + self.positionSlack]
+        if not candidates:
+            return None
+        return min(candidates, key = lambda i: abs(self.balls[i] - position))
+
+    def isPacked(self):
+        """
+        There is room for another ball right behind the bottom one, or the
+        top ball is at the staging sensor and the loader can't take more.
+        """
+        if not self.balls:
+            return True
+        if self.balls[-1] >= self.sensorPosition(self.sensorCount - 2):
+            return True
+        return self.balls[0] >= self.ballDiameter / 2 + self.packMargin
+
+    @feedback
+    def getBallCount(self):
+        return len(self.balls)
+
+    @feedback
+    def getBallPositions(self):
+        return [round(ball, 2) for ball in self.balls]
+
+    @feedback
+    def getGaps(self):
+        """Free track between each pair of balls, bottom first."""
+        return [round(upper - lower - self.ballDiameter, 2) for lower, upper in zip(self.balls, self.balls[1:])]
+
+    @feedback
+    def isJammed(self):
+        return self.jammed
+
+    def edgeTravel(self, index, since, output):
+        """
+        How far the belt has moved since break sensor index changed, if the
+        fast loop caught that change after since. 0 otherwise.
+        """
+        if not self.shooterFastLoop.isRunning():
+            return 0.0
+        edgeTime = self.shooterFastLoop.getEdgeTime(index)
+        if edgeTime is None or edgeTime < since:
+            return 0.0
+        return output * self.beltSpeed * (self.lastTime - edgeTime)
+
+    def correct(self, tripped, move, since, output):
+        """
+        Pulls the estimate back onto what the sensors see. since is when
+        the sensors were last read.
+        """
+        radius = self.ballDiameter / 2
+        direction = 1 if move >= 0 else -1
+        for i, isTripped in enumerate(tripped):
+            position = self.sensorPosition(i)
+            nearest = self.nearestBall(position)
+            distance = abs(self.balls[nearest] - position) if nearest is not None else None
+            if isTripped:
+                arriving = self.approachingBall(position, direction) if move != 0 else None
+                if not self.lastTripped[i] and arriving is not None:
+                    # leading edge of a ball we already know about
+                    self.balls[arriving] = position - radius * direction + self.edgeTravel(i, since, output)
+                elif distance is None or distance > radius + self.positionSlack:
+                    if i != 0:
+                        self.logger.warning("Untracked ball at break sensor %d", i + 1)
+                    self.balls.append(position - radius * direction if not self.lastTripped[i] else position)
+                    self.balls.sort()
+            elif distance is not None and distance < radius - self.positionSlack:
+                if self.lastTripped[i]:
+                    # trailing edge, the ball just left the beam
+                    self.balls[nearest] = position + radius * direction + self.edgeTravel(i, since, output)
+                else:
+                    self.logger.warning("Lost ball at %.2fm, break sensor %d is clear", self.balls[nearest], i + 1)
+                    self.balls.pop(nearest)
+
+    def execute(self):
+        now = Timer.getFPGATimestamp()
+        since = self.lastTime
+        dt = min(now - since, self.maxStep)
+        self.lastTime = now
+        tripped = self.sensors.getTripped()
+        output = self.shooterMotors.getLoaderOutput()
+        if self.lastTripped is None:
+            self.snapshot(tripped)
+            self.lastTripped = tripped
+
+        if tripped != self.lastTripped or output == 0 or not self.balls:
+            self.lastChange = now
+        speed = abs(output) * self.beltSpeed
+        jamTime = max(self.minJamTime, self.jamFactor * self.ballDiameter / speed) if speed > 0 else None
+        jammed = jamTime is not None and now - self.lastChange > jamTime
+        if jammed and not self.jammed:
+            self.logger.warning("Loader jammed with %d balls", len(self.balls))
+        self.jammed = jammed
+
+        move = 0 if self.jammed else output * self.beltSpeed * dt
+        self.balls = [ball + move for ball in self.balls]
+        self.correct(tripped, move, since, output)
+        self.lastTripped = tripped
+
+        bottom = -self.ballDiameter / 2 - self.positionSlack
+        top = self.getTopPosition() + self.positionSlack
+        self.balls = [ball for ball in self.balls if bottom <= ball <= top]
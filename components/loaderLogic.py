@@ -2,10 +2,13 @@ from robotMap import XboxMap
 from components.shooterMotors import ShooterMotorCreation, Direction
 from components.breakSensors import Sensors, State
 from components.feederMap import FeederMap, Type
-from magicbot import StateMachine, state, timed_state, tunable, feedback
+from components.indexer import Indexer
+from utils.magicbotStrict import StrictStateMachine, state
+from utils.eventBus import EventBus, BallEntered
+from magicbot import tunable, feedback
 import logging
 
-class LoaderLogic(StateMachine):
+class LoaderLogic(StrictStateMachine):
     """StateMachine-based loader. Has both automatic and manual modes."""
     compatString = ["doof"]
 
@@ -15,17 +18,27 @@ class LoaderLogic(StateMachine):
     logger: logging
     sensors: Sensors
     xboxMap: XboxMap
+    indexer: Indexer
+    eventBus: EventBus
 
     # Tunable
     automaticLoaderSpeed = tunable(.4)
 
     # Other variables
     isAutomatic = True
-    loaderStoppingDelay = .16
+    # the mode setters can be called from any state
+    interruptStates = ["checkForBall", "runLoaderManually", "shooting", "nextAction"]
+
+    def setup(self):
+        self.eventBus.subscribe(BallEntered, self.ballEntered)
 
     def on_enable(self):
         self.isAutomatic = True
 
+    def ballEntered(self, event):
+        if self.current_state == 'checkForBall':
+            self.next_state('loadBall')
+
     def setAutoLoading(self):
         """Runs sensor-based loading."""
         self.isAutomatic = True
@@ -52,41 +65,48 @@ class LoaderLogic(StateMachine):
         """Universal function for running the intake. Used in both manual and automatic."""
         self.feeder.run(Type.kIntake)
 
-    @state
+    @state(state_transitions = interruptStates)
     def runLoaderManually(self):
         """Trigger-based manual loader."""
         self.feeder.run(Type.kLoader)
 
-    @state(first = True)
-    def checkForBall(self):
-        """Checks for ball to enter the loader, runs the loader if entry sensor is broken."""
+    @state(first = True, state_transitions = interruptStates + ['loadBall'])
+    def checkForBall(self, initial_call):
+        """
+        Waits for a ball to enter the loader. ballEntered moves on to loading
+        when the entry sensor trips, a ball already there is loaded straight away.
+        """
         self.shooterMotors.stopLoader()
-        if self.sensors.loadingSensor(State.kTripped):
+        if initial_call and self.sensors.loadingSensor(State.kTripped):
             self.next_state('loadBall')
 
-    @state
+    @state(state_transitions = interruptStates + ['waitForBallIntake'])
     def loadBall(self):
         """Loads ball if ball has entered."""
         self.shooterMotors.runLoader(self.automaticLoaderSpeed, Direction.kForwards)
         self.next_state('waitForBallIntake')
 
-    @state
+    @state(state_transitions = interruptStates + ['packBall'])
     def waitForBallIntake(self):
         """Checks for intake to be completed."""
-        if self.sensors.loadingSensor(State.kNotTripped):
-            self.next_state('stopBall')
-
-    @timed_state(duration = loaderStoppingDelay, next_state = 'checkForBall')
-    def stopBall(self):
-        """Stops ball after a short delay."""
-        pass
+        if self.sensors.loadingSensor(State.kNotTripped) or self.indexer.isJammed():
+            self.next_state('packBall')
+
+    @state(state_transitions = interruptStates + ['checkForBall'])
+    def packBall(self):
+        """Stops once the next ball fits right behind this one, or the loader is full or jammed."""
+        if self.indexer.isJammed():
+            self.logger.warning("Loader jammed while loading, stopping")
+            self.next_state('checkForBall')
+        elif self.indexer.isPacked():
+            self.next_state('checkForBall')
 
-    @state
+    @state(state_transitions = interruptStates)
     def shooting(self):
         """While shooting, do nothing with the loader."""
         pass
 
-    @state
+    @state(state_transitions = interruptStates)
     def nextAction(self):
         """Determine what to do after shooting."""
         if self.isAutomatic:
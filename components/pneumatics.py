@@ -3,7 +3,8 @@ dsPos = DoubleSolenoid.Value
 import logging
 
 class Pneumatics:
-    
+    compatString = ["doof"]
+
     compressors_pneumatics: dict
     solenoids_pneumatics: dict
     logger: logging
@@ -16,9 +17,13 @@ class Pneumatics:
         """
         self.loaderSolenoid = self.solenoids_pneumatics["loader"]
         self.newLoaderValue = None
-        #turn on all compressors
-        self.logger.info("Starting compressor %s", self.compressors_pneumatics["compressor"])
-        self.compressors_pneumatics["compressor"].start()
+        self.loaderActuations = 0
+        #turn on all compressors, CompressorScheduler decides when they run after that
+        self.compressor = self.compressors_pneumatics["compressor"]
+        self.logger.info("Starting compressor %s", self.compressor)
+        self.compressor.start()
+        self.compressorAllowed = True
+        self.newCompressorAllowed = None
 
     def getLoaderDeployed(self):
         """
@@ -44,19 +49,56 @@ class Pneumatics:
         """
         Toggle the Loader from deployed to retracted or vice versa
         """
-        self.logger.warning("Changing solenoid")
+        self.logger.debug("Changing solenoid")
         self.newLoaderValue = (dsPos.kReverse if self.loaderSolenoid.get() == dsPos.kForward else dsPos.kForward)
 
+    def startCompressor(self):
+        """
+        Lets the compressor run closed loop, until the pressure switch says the tanks are full
+        """
+        self.newCompressorAllowed = True
+
+    def stopCompressor(self):
+        """
+        Keeps the compressor off however low the pressure is
+        """
+        self.newCompressorAllowed = False
+
+    def isCompressorAllowed(self):
+        return self.compressorAllowed
+
+    def isCompressorRunning(self):
+        """
+        True while the compressor motor is actually on
+        """
+        return self.compressor.enabled()
+
+    def getLoaderActuations(self):
+        """
+        Number of times the loader solenoid has changed position. Each one uses a cylinder's worth of air
+        """
+        return self.loaderActuations
+
     def getCompressorCurrent(self):
         """
         Returns how much current the compressor is currently drawing. Useful to not brown out
         """
-        return self.compressors_pneumatics["compressor"].getCompressorCurrent()
+        return self.compressor.getCompressorCurrent()
 
     def execute(self):
         """
-        Set loader if loader change was requested
+        Set loader and compressor if a change was requested
         """
         if self.newLoaderValue:
+            if self.loaderSolenoid.get() != self.newLoaderValue:
+                self.loaderActuations += 1
             self.loaderSolenoid.set(self.newLoaderValue)
             self.newLoaderValue = None
+
+        if self.newCompressorAllowed is not None and self.newCompressorAllowed != self.compressorAllowed:
+            self.compressorAllowed = self.newCompressorAllowed
+            if self.compressorAllowed:
+                self.compressor.start()
+            else:
+                self.compressor.stop()
+        self.newCompressorAllowed = None
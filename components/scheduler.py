@@ -0,0 +1,86 @@
+"""
+Runs delayed and periodic calls for other components
+"""
+from wpilib import Timer
+import logging
+import math
+
+from utils.timerWheel import TimerWheel
+
+class Scheduler:
+    """
+    Lets a component or a ButtonManager callback ask for "do X in 150 ms"
+    or "do X every 500 ms" instead of polling timestamps in execute.
+
+    Calls are kept in a TimerWheel ticking every resolution seconds, so
+    scheduling and cancelling cost the same however many are pending. Due
+    calls run from execute, once per loop, on the first loop at or after
+    their time. Scheduler runs before the components it calls into so
+    their requests act in the same loop.
+
+    Pending calls are dropped when the robot is disabled.
+    """
+    isSource = True
+
+    logger: logging
+
+    resolution = .005
+
+    def setup(self):
+        self.wheel = TimerWheel()
+        self.startTime = Timer.getFPGATimestamp()
+
+    def getTick(self, seconds):
+        """Wheel tick the FPGA time seconds falls in."""
+        return int((seconds - self.startTime) / self.resolution)
+
+    def toTicks(self, seconds):
+        return max(1, math.ceil(seconds / self.resolution - 1e-9))
+
+    def callLater(self, delay, callback, *args):
+        """
+        Calls callback(*args) once, delay seconds from now. Returns a
+        TimerHandle whose cancel() stops it.
+        """
+        return self.wheel.insert(self.getTick(Timer.getFPGATimestamp()) + self.toTicks(delay), callback, args)
+
+    def callEvery(self, period, callback, *args):
+        """
+        Calls callback(*args) every period seconds, the first time period
+        seconds from now, until the returned TimerHandle is cancelled. Calls
+        that fall behind are skipped rather than run back to back.
+        """
+        ticks = self.toTicks(period)
+        return self.wheel.insert(self.getTick(Timer.getFPGATimestamp()) + ticks, callback, args, ticks)
+
+    def cancel(self, handle):
+        """Same as handle.cancel(), None is ignored."""
+        if handle is not None:
+            handle.cancel()
+
+    def on_enable(self):
+        self.wheel = TimerWheel()
+        self.startTime = Timer.getFPGATimestamp()
+
+    def on_disable(self):
+        pending = self.wheel.getPendingCount()
+        if pending:
+            self.logger.info("Dropping %d scheduled calls", pending)
+        self.wheel.clear()
+
+    def run(self, handle):
+        # cancelled by an earlier call due the same tick
+        if handle.cancelled:
+            return
+        try:
+            handle.callback(*handle.args)
+        except Exception:
+            self.logger.exception("Scheduled call %s crashed", handle.callback)
+        if handle.period and not handle.cancelled:
+            self.wheel.reschedule(handle)
+
+    def execute(self):
+        target = self.getTick(Timer.getFPGATimestamp())
+        while self.wheel.now < target:
+            for handle in self.wheel.step():
+                self.run(handle)
@@ -0,0 +1,156 @@
+"""
+Flywheel sampling, ball release and break sensor edges at a few hundred Hz
+"""
+from magicbot import tunable, feedback
+from utils.fastLoop import FastLoop, DoubleBuffer
+import logging
+
+class ShooterFastLoop:
+    """
+    Runs the timing critical part of feeding on a FastLoop instead of the
+    50 Hz robot loop, so a release isn't up to 20 ms late.
+
+    FeedPipeline arms it with a target speed once a ball is staged. From
+    then until it is disarmed the fast loop owns the loader motor: it
+    starts the loader the first sample the flywheel is within tolerance and
+    stops it the first sample the flywheel dips from the ball hitting it.
+    ShooterMotorCreation leaves the loader alone while armed.
+
+    Setpoints go to the fast loop and samples come back through
+    DoubleBuffers. Every arm gets a new generation so the robot loop can
+    tell a release or shot from the current ball apart from an old one.
+    The time of the last change of every break sensor is published too.
+    """
+    compatString = ["doof"]
+    isSource = True
+
+    motors_shooter: dict
+    motors_loader: dict
+    digitalInput_breaksensors: dict
+    logger: logging
+
+    enabled = tunable(True)
+    rate = tunable(250)
+
+    sensorCount = 5
+
+    def setup(self):
+        self.flywheel = self.motors_shooter["shooterMotor"]
+        self.loaderMotor = self.motors_loader["loaderMotor"]
+        self.breakSensors = [self.digitalInput_breaksensors["sensor" + str(x)] for x in range(1, self.sensorCount + 1)]
+        self.loop = FastLoop(self.fastStep, name = "shooterFastLoop")
+        self.armed = False
+        self.generation = 0
+        self.setpoints = DoubleBuffer(armed = False, generation = 0, targetSpeed = 0, tolerance = 0,
+                                      shotDrop = 0, releaseSpeed = 0)
+        self.samples = DoubleBuffer(time = 0.0, velocity = 0.0, generation = 0, releasedAt = None, shotAt = None,
+                                    edgeTimes = (None,) * self.sensorCount)
+        self.snapshot = self.samples.read()
+
+        # only touched by the fast loop
+        self.fastGeneration = 0
+        self.releasedAt = None
+        self.shotAt = None
+        self.lastLevels = None
+        self.edgeTimes = [None] * self.sensorCount
+
+    def on_enable(self):
+        self.disarm()
+        if self.enabled:
+            self.loop.start(1 / self.rate)
+
+    def on_disable(self):
+        self.disarm()
+        self.loop.stop()
+
+    def isRunning(self):
+        return self.loop.isRunning()
+
+    def isArmed(self):
+        return self.armed
+
+    def arm(self, targetSpeed, tolerance, shotDrop, releaseSpeed):
+        """
+        Releases the staged ball as soon as the flywheel is at targetSpeed
+        +- tolerance and stops the loader once the flywheel slows by shotDrop
+        below that. Call every loop while the ball should be fired.
+        """
+        if not self.armed:
+            # ShooterMotorCreation stops writing the loader once armed, so
+            # take it over stopped rather than at whatever it last ran at
+            self.loaderMotor.set(0)
+            self.armed = True
+            self.generation += 1
+        self.setpoints.write(armed = True, generation = self.generation, targetSpeed = targetSpeed,
+                             tolerance = tolerance, shotDrop = shotDrop, releaseSpeed = releaseSpeed)
+
+    def disarm(self):
+        """
+        Hands the loader back to ShooterMotorCreation
+        """
+        if self.armed:
+            self.armed = False
+            self.setpoints.write(armed = False)
+
+    def getReleaseTime(self):
+        """FPGA time the armed ball was released, None before that."""
+        if not self.armed or self.snapshot["generation"] != self.generation:
+            return None
+        return self.snapshot["releasedAt"]
+
+    def getShotTime(self):
+        """FPGA time the armed ball hit the flywheel, None before that."""
+        if not self.armed or self.snapshot["generation"] != self.generation:
+            return None
+        return self.snapshot["shotAt"]
+
+    def getEdgeTime(self, index):
+        """FPGA time break sensor index last changed, None if it hasn't since enable."""
+        return self.snapshot["edgeTimes"][index]
+
+    @feedback
+    def getFastVelocity(self):
+        return self.snapshot["velocity"]
+
+    @feedback
+    def getFastLoopJitter(self):
+        """Mean, standard deviation, 99th percentile and worst start jitter in ms."""
+        return self.loop.stats.summary()
+
+    @feedback
+    def getFastLoopOverruns(self):
+        return self.loop.stats.overruns
+
+    def fastStep(self, now):
+        """
+        One fast loop iteration. Runs on the Notifier thread.
+        """
+        setpoints = self.setpoints.read()
+        velocity = self.flywheel.getEncoder().getVelocity()
+
+        levels = [sensor.get() for sensor in self.breakSensors]
+        if self.lastLevels is not None:
+            for i, (level, lastLevel) in enumerate(zip(levels, self.lastLevels)):
+                if level != lastLevel:
+                    self.edgeTimes[i] = now
+        self.lastLevels = levels
+
+        if setpoints["generation"] != self.fastGeneration:
+            self.fastGeneration = setpoints["generation"]
+            self.releasedAt = None
+            self.shotAt = None
+        if setpoints["armed"] and self.shotAt is None:
+            target = setpoints["targetSpeed"]
+            tolerance = setpoints["tolerance"]
+            if self.releasedAt is None and abs(velocity - target) <= tolerance:
+                self.releasedAt = now
+                self.loaderMotor.set(setpoints["releaseSpeed"])
+            elif self.releasedAt is not None and velocity < target - tolerance - setpoints["shotDrop"]:
+                self.shotAt = now
+                self.loaderMotor.set(0)
+
+        self.samples.write(time = now, velocity = velocity, generation = self.fastGeneration,
+                           releasedAt = self.releasedAt, shotAt = self.shotAt, edgeTimes = tuple(self.edgeTimes))
+
+    def execute(self):
+        self.snapshot = self.samples.read()
@@ -2,10 +2,16 @@ from robotMap import XboxMap
 from components.shooterMotors import ShooterMotorCreation, Direction
 from components.breakSensors import Sensors, State
 from components.feederMap import FeederMap, Type
-from magicbot import StateMachine, state, timed_state, tunable, feedback
+from components.deviceHealth import DeviceHealth
+from components.vision import Vision
+from components.shotTable import ShotTable
+from components.feedPipeline import FeedPipeline
+from utils.magicbotStrict import StrictStateMachine, state, timed_state
+from utils.eventBus import EventBus, ShooterAtSpeed
+from magicbot import tunable, feedback
 import logging
 
-class ShooterLogic(StateMachine):
+class ShooterLogic(StrictStateMachine):
     """StateMachine-based shooter. Has both manual and automatic modes."""
     compatString = ["doof"]
 
@@ -15,22 +21,39 @@ class ShooterLogic(StateMachine):
     logger: logging
     sensors: Sensors
     xboxMap: XboxMap
+    deviceHealth: DeviceHealth
+    vision: Vision
+    shotTable: ShotTable
+    feedPipeline: FeedPipeline
+    eventBus: EventBus
     speedTolerance = tunable(50)
 
     # Tunables
     shootingLoaderSpeed = tunable(.4)
     autoShootingSpeed = tunable(4800)
     teleShootingSpeed = tunable(5300)
+    alignTimeout = tunable(1.5)
 
     # Other variables
     isSetup = False
     isAutonomous = False
+    # flywheel speed picked when the current shot started, None when not shooting
+    shotSpeed = None
     shooterStoppingDelay = 3
+    atSpeed = False
+    # shootBalls and doneShooting can be called from any state
+    interruptStates = ["initShooting", "finishShooting"]
+
+    def setup(self):
+        self.eventBus.subscribe(ShooterAtSpeed, self.rumble)
 
     def on_enable(self):
         """Called when bot is enabled."""
         self.isAutonomous = False
         self.isSetup = True
+        self.shotSpeed = None
+        self.atSpeed = False
+        self.rumble(ShooterAtSpeed(False))
 
     def autonomousEnabled(self):
         """Indicates if the robot is in autonomous mode."""
@@ -40,35 +63,61 @@ class ShooterLogic(StateMachine):
         """Indicates if the robot is not in autonomous mode."""
         self.isAutonomous = False
 
+    def isShooterHealthy(self):
+        """Checks that the flywheel motor has not failed."""
+        return self.deviceHealth.isHealthy("shooter", "shooterMotor")
+
     def shootBalls(self):
         """Executes smart shooter."""
         if self.shooterMotors.isLoaderRunning() or self.shooterMotors.isShooterRunning():
             return False
+        if not self.isShooterHealthy():
+            self.logger.warning("Shooter motor has failed, not shooting")
+            return False
         self.next_state('initShooting')
         return True
 
+    def getShootingSpeed(self):
+        """
+        Flywheel speed for the shot in progress. Otherwise the shot table speed
+        for the target range, or the fixed speed for the mode without a target.
+        """
+        if self.shotSpeed is not None:
+            return self.shotSpeed
+        if self.vision.hasTarget:
+            return self.shotTable.getSpeed(self.vision.distance)
+        if self.isAutonomous:
+            return self.autoShootingSpeed
+        return self.teleShootingSpeed
+
+    def isManualLoading(self):
+        """The mech driver is running the loader with a trigger, which overrides the feed pipeline."""
+        return self.xboxMap.getMechRightTrig() > 0 or self.xboxMap.getMechLeftTrig() > 0
+
     def doneShooting(self):
         """Finishes shooting process and reverts back to appropriate mode."""
         self.next_state('finishShooting')
 
     @feedback
     def isShooterUpToSpeed(self):
-        """Determines if the shooter is up to speed, then rumbles controller and publishes to NetworkTables."""
-        if self.isAutonomous:
-            shootSpeed = self.autoShootingSpeed - self.speedTolerance
-        elif not self.isAutonomous:
-            shootSpeed = self.teleShootingSpeed - self.speedTolerance
-        if not self.isSetup:
-            return False
-        atSpeed = bool(self.shooterMotors.shooterMotor.getEncoder().getVelocity() >= shootSpeed)
-        rumble  = 0
-        if atSpeed and not self.isAutonomous:
-            rumble = .3
+        """Whether the shooter was up to speed at the start of this loop. Published to NetworkTables."""
+        return self.atSpeed
+
+    def checkShooterSpeed(self):
+        """Publishes ShooterAtSpeed when the shooter gets up to speed or drops below it."""
+        shootSpeed = self.getShootingSpeed() - self.speedTolerance
+        atSpeed = self.isSetup and self.isShooterHealthy() and self.shooterMotors.getShooterVelocity() >= shootSpeed
+        if atSpeed != self.atSpeed:
+            self.atSpeed = atSpeed
+            self.eventBus.publish(ShooterAtSpeed(atSpeed))
+
+    def rumble(self, event):
+        """Rumbles the mech controller while the shooter is up to speed in teleop."""
+        rumble = .3 if event.atSpeed and not self.isAutonomous else 0
         self.xboxMap.mech.setRumble(self.xboxMap.mech.RumbleType.kLeftRumble, rumble)
         self.xboxMap.mech.setRumble(self.xboxMap.mech.RumbleType.kRightRumble, rumble)
-        return atSpeed
 
-    @state
+    @state(state_transitions = interruptStates + ['alignToTarget'])
     def initShooting(self):
         """Smart shooter initialization (reversing if necessary)."""
         if self.sensors.shootingSensor(State.kTripped):
@@ -76,49 +125,69 @@ class ShooterLogic(StateMachine):
 
         else:
             self.shooterMotors.stopLoader()
-            self.next_state('alignToTarget')
-
-    @state
-    def alignToTarget(self):
-        """Aligns turret and/or drive train to the goal."""
-        self.next_state('runShooter')
-        #NOTE: This is a temporary placeholder until we can get limelight alignment successfully implemented.
-        #      Useful logic would include: determining if the limelight can see the target before attempting
-        #      alignment, especially for autonomous.
-
-    @state
-    def runShooter(self):
+            self.next_state_now('alignToTarget')
+
+    @state(state_transitions = interruptStates + ['runShooter'])
+    def alignToTarget(self, state_tm):
+        """
+        Turns the drive train to the goal. Shoots straight away if the limelight
+        can't see the target, or after alignTimeout if alignment doesn't settle.
         """
-        Runs shooter to a certain speed, then lets drivers control loading if in teleop.
-        If in autonomous, run shooter automatically.
+        if not self.vision.hasTarget:
+            self.next_state_now('runShooter')
+        elif self.vision.align() or state_tm > self.alignTimeout:
+            self.next_state_now('runShooter')
+
+    @state(state_transitions = interruptStates + ['autonomousShoot'])
+    def runShooter(self, initial_call):
+        """
+        Runs shooter to a certain speed while the feed pipeline stages the next
+        ball, releasing it once the flywheel is in tolerance. In teleop the
+        triggers still load manually. In autonomous, moves on once up to speed.
+        The speed is picked once when the shot starts so it doesn't chase range noise.
         """
+        if not self.isShooterHealthy():
+            self.next_state('finishShooting')
+            return
+
+        if initial_call:
+            self.shotSpeed = None
+            self.shotSpeed = self.getShootingSpeed()
+            self.shotTable.startShot(self.vision.distance if self.vision.hasTarget else None, self.shotSpeed)
+
         if not self.isAutonomous:
-            self.shooterMotors.runShooter(self.teleShootingSpeed)
-            self.feeder.run(Type.kLoader)
+            self.shooterMotors.runShooter(self.getShootingSpeed())
+            if self.isManualLoading():
+                self.feeder.run(Type.kLoader)
+            else:
+                self.feedPipeline.feed(self.getShootingSpeed(), self.speedTolerance)
 
         elif self.isAutonomous:
-            self.shooterMotors.runShooter(self.autoShootingSpeed)
+            self.shooterMotors.runShooter(self.getShootingSpeed())
+            self.feedPipeline.feed(self.getShootingSpeed(), self.speedTolerance)
             if self.isShooterUpToSpeed():
                 self.next_state('autonomousShoot')
 
-    @timed_state(duration = shooterStoppingDelay, next_state = 'finishShooting')
+    @timed_state(duration = shooterStoppingDelay, next_state = 'finishShooting', state_transitions = interruptStates)
     def autonomousShoot(self):
         """Shoot balls when shooter is up to speed. Strictly for autonomous use."""
-        self.shooterMotors.runLoader(self.shootingLoaderSpeed, Direction.kForwards)
+        self.feedPipeline.feed(self.getShootingSpeed(), self.speedTolerance)
 
-    @state
+    @state(state_transitions = interruptStates + ['idling'])
     def finishShooting(self):
         """Stops shooter-related motors and moves to idle state."""
         self.shooterMotors.stopLoader()
         self.shooterMotors.stopShooter()
+        self.shotSpeed = None
         self.next_state('idling')
 
-    @state(first = True)
+    @state(first = True, state_transitions = interruptStates)
     def idling(self):
         """First state. Does nothing here. StateMachine returns to this state when not shooting."""
         pass
 
     def execute(self):
         """Constantly runs state machine. Necessary for function."""
+        self.checkShooterSpeed()
         self.engage()
         super().execute()
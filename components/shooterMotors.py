@@ -1,3 +1,4 @@
+from components.shooterFastLoop import ShooterFastLoop
 import logging
 from enum import Enum, auto
 
@@ -16,6 +17,7 @@ class ShooterMotorCreation:
     logger: logging
     motors_shooter: dict
     motors_loader: dict
+    shooterFastLoop: ShooterFastLoop
 
     def on_enable(self):
         """
@@ -81,6 +83,18 @@ class ShooterMotorCreation:
         """
         self.shooter = False
 
+    def getShooterVelocity(self):
+        """
+        Measured flywheel speed in rpm
+        """
+        return self.shooterMotor.getEncoder().getVelocity()
+
+    def getLoaderOutput(self):
+        """
+        Output the loader motor was last set to, negative when backwards
+        """
+        return self.loaderMotor.get()
+
     def isIntakeRunning(self):
         return self.intake
 
@@ -99,7 +113,10 @@ class ShooterMotorCreation:
         elif self.intake == False:
             self.intakeMotor.set(0)
 
-        if self.loader:
+        if self.shooterFastLoop.isArmed():
+            # the fast loop is releasing a ball and owns the loader
+            pass
+        elif self.loader:
             self.loaderMotor.set(self.loaderSpeed)
         elif self.loader == False:
             self.loaderMotor.set(0)
@@ -0,0 +1,182 @@
+"""
+Distance to flywheel speed table with online calibration
+"""
+from magicbot import tunable, feedback
+import logging
+import bisect
+import os
+import yaml
+import utils.math
+
+class ShotTable:
+    """
+    Sorted distance and speed arrays loaded from shotTablePath, interpolated
+    with a bisect per lookup. hoodAngles is an optional third column for
+    when the shooter gets a hood.
+
+    shotTablePath is the deployed config and is only read. Calibration is
+    saved to calibratedShotTablePath, outside the configs directory so a
+    deploy doesn't wipe it, and loaded over the config when there is one.
+
+    ShooterLogic calls startShot with the range and speed of every shot.
+    The driver then marks it made, short or long. A made shot pulls the
+    table toward the speed used at that range, adding a point if none is
+    close. A miss moves the nearest point by missAdjustment. Changes are
+    saved with save() when the robot is disabled.
+    """
+    compatString = ["doof"]
+
+    shotTablePath: str
+    calibratedShotTablePath: str
+    logger: logging
+
+    # blend of the used speed into the table when a shot is made
+    learningRate = tunable(.5)
+    missAdjustment = tunable(75)
+    # points closer than this (m) are updated instead of adding a new one
+    mergeDistance = tunable(.25)
+
+    # used when the file is missing or bad
+    defaultDistances = [2.0, 7.0]
+    defaultSpeeds = [4400, 5800]
+
+    def setup(self):
+        self.distances = list(self.defaultDistances)
+        self.speeds = list(self.defaultSpeeds)
+        self.hoodAngles = None
+        self.lastShot = None
+        self.dirty = False
+        self.load(self.shotTablePath)
+        if os.path.isfile(self.calibratedShotTablePath) and self.load(self.calibratedShotTablePath):
+            self.logger.info("Using calibrated shot table %s", self.calibratedShotTablePath)
+
+    def load(self, path):
+        """
+        Reads the table from path, keeping the current one if it is bad
+        """
+        try:
+            with open(path) as file:
+                data = yaml.safe_load(file)
+            distances = [float(x) for x in data["distances"]]
+            speeds = [float(x) for x in data["speeds"]]
+            hoodAngles = data.get("hoodAngles")
+        except (OSError, KeyError, TypeError, ValueError, yaml.YAMLError) as e:
+            self.logger.error("Could not load shot table %s. Err %s", path, e)
+            return False
+        if len(distances) < 2 or len(speeds) != len(distances) or \
+                (hoodAngles is not None and len(hoodAngles) != len(distances)) or \
+                any(a >= b for a, b in zip(distances, distances[1:])):
+            self.logger.error("Shot table %s needs matching columns with increasing distances", path)
+            return False
+        self.distances = distances
+        self.speeds = speeds
+        self.hoodAngles = hoodAngles
+        return True
+
+    def save(self):
+        """
+        Writes the table to calibratedShotTablePath if calibration changed it
+        """
+        if not self.dirty:
+            return False
+        data = {"distances": self.distances, "speeds": [round(x) for x in self.speeds]}
+        if self.hoodAngles is not None:
+            data["hoodAngles"] = self.hoodAngles
+        path = self.calibratedShotTablePath
+        tempPath = path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            with open(tempPath, "w") as file:
+                file.write("# Distance to target (m) -> flywheel speed (rpm). Updated by shot calibration.\n")
+                yaml.safe_dump(data, file, default_flow_style = None)
+            os.replace(tempPath, path)
+        except OSError as e:
+            self.logger.error("Could not save shot table %s. Err %s", path, e)
+            return False
+        self.dirty = False
+        self.logger.info("Saved shot table to %s", path)
+        return True
+
+    def getSpeed(self, distance):
+        return utils.math.interpolate(self.distances, self.speeds, distance)
+
+    def getHoodAngle(self, distance):
+        """
+        Hood angle for distance, None if the table has no hood column
+        """
+        if self.hoodAngles is None:
+            return None
+        return utils.math.interpolate(self.distances, self.hoodAngles, distance)
+
+    def startShot(self, distance, speed):
+        """
+        Remembers the shot the next mark applies to. distance is None when
+        the range isn't known, those shots can't be calibrated.
+        """
+        self.lastShot = None if distance is None else (distance, speed)
+
+    def nearestIndex(self, distance):
+        """
+        Index of the point within mergeDistance of distance, None if there isn't one
+        """
+        i = bisect.bisect_left(self.distances, distance)
+        if i == len(self.distances) or (i > 0 and distance - self.distances[i - 1] < self.distances[i] - distance):
+            i -= 1
+        if abs(self.distances[i] - distance) > self.mergeDistance:
+            return None
+        return i
+
+    def insertPoint(self, distance, speed):
+        """
+        Adds a point keeping the columns sorted and returns its index
+        """
+        hoodAngle = self.getHoodAngle(distance)
+        i = bisect.bisect_left(self.distances, distance)
+        self.distances.insert(i, distance)
+        self.speeds.insert(i, speed)
+        if self.hoodAngles is not None:
+            self.hoodAngles.insert(i, hoodAngle)
+        return i
+
+    def markMade(self):
+        if self.lastShot is None:
+            self.logger.warning("No ranged shot to mark as made")
+            return
+        distance, speed = self.lastShot
+        i = self.nearestIndex(distance)
+        if i is None:
+            self.insertPoint(distance, speed)
+        else:
+            self.speeds[i] += (speed - self.speeds[i]) * self.learningRate
+        self.logger.info("Shot at %.2fm and %.0frpm made", distance, speed)
+        self.lastShot = None
+        self.dirty = True
+
+    def markMissed(self, direction):
+        """
+        direction is 1 for a shot that fell short and -1 for one that went long
+        """
+        if self.lastShot is None:
+            self.logger.warning("No ranged shot to mark as missed")
+            return
+        distance, speed = self.lastShot
+        i = self.nearestIndex(distance)
+        if i is None:
+            i = self.insertPoint(distance, speed)
+        self.speeds[i] += direction * self.missAdjustment
+        self.logger.info("Shot at %.2fm and %.0frpm missed %s", distance, speed, "short" if direction > 0 else "long")
+        self.lastShot = None
+        self.dirty = True
+
+    def markMissedShort(self):
+        self.markMissed(1)
+
+    def markMissedLong(self):
+        self.markMissed(-1)
+
+    @feedback
+    def getPointCount(self):
+        return len(self.distances)
+
+    def execute(self):
+        pass
@@ -0,0 +1,64 @@
+"""
+Publishes state machine traces and dumps them to file at the end of a match
+"""
+import os
+import time
+
+from magicbot import tunable
+from networktables import NetworkTables
+import logging
+
+from utils.stateTracing import StateTraces
+from utils.asyncLogging import defaultLogDir
+
+class StateTraceReporter:
+    """
+    Pushes the dwell times and transition counts of every traced state
+    machine to NetworkTables every publishPeriod seconds. The full traces are
+    written to the log directory when the robot is disabled.
+    """
+    logger: logging
+    stateTraces: StateTraces
+
+    publishPeriod = tunable(1.0)
+
+    def setup(self):
+        self.table = NetworkTables.getTable("StateTrace")
+        self.lastPublish = 0
+        self.logDir = defaultLogDir()
+
+    def publish(self):
+        for name, trace in self.stateTraces.items():
+            table = self.table.getSubTable(name)
+            table.putString("currentState", trace.currentState)
+            for state, histogram in trace.dwellHistograms.items():
+                stateTable = table.getSubTable(state)
+                stateTable.putNumber("dwellTotal", trace.dwellTotals[state])
+                stateTable.putNumberArray("dwellHistogram", histogram)
+            for (old, new), count in trace.transitionCounts.items():
+                table.getSubTable("transitions").putNumber(f"{old or 'stopped'}->{new or 'stopped'}", count)
+
+    def dump(self):
+        """
+        Writes all traces to <logDir>/stateTrace-<time>.json
+        """
+        if not self.stateTraces:
+            return
+        path = self.logDir + os.path.sep + time.strftime("stateTrace-%Y%m%d-%H%M%S.json")
+        try:
+            os.makedirs(self.logDir, exist_ok = True)
+            self.stateTraces.dump(path)
+            self.logger.info("Wrote state traces to %s", path)
+        except OSError as e:
+            self.logger.error("Could not write state traces to %s. Err %s", path, e)
+
+    def on_disable(self):
+        self.publish()
+        self.dump()
+
+    def execute(self):
+        now = time.monotonic()
+        if now - self.lastPublish < self.publishPeriod:
+            return
+        self.lastPublish = now
+        self.publish()
@@ -0,0 +1,120 @@
+"""
+Limelight targeting for the shooter
+"""
+from components.driveTrain import DriveTrain
+from magicbot import tunable, feedback
+from wpilib import Timer
+import collections
+import logging
+import math
+
+class Vision:
+    """
+    Reads the limelight's target (tv, tx, ty, tl) from networktables.
+
+    tx is measured when the frame was captured, so it is added to the gyro
+    heading at capture time (looked up in a short heading history) to get
+    the field heading of the target. Turning while the frame was processed
+    then doesn't make the alignment overshoot.
+    """
+    compatString = ["doof"]
+    isSource = True
+
+    cameras_vision: dict
+    gyros_system: dict
+    driveTrain: DriveTrain
+    logger: logging
+
+    # Camera mounting, in meters and degrees
+    cameraHeight = tunable(0.6)
+    targetHeight = tunable(2.5)
+    cameraPitch = tunable(25.0)
+    # Time from exposure to the start of processing, tl doesn't include it
+    captureLatency = tunable(11)
+
+    alignP = tunable(.03)
+    alignMinOutput = tunable(.08)
+    alignMaxOutput = tunable(.5)
+    alignTolerance = tunable(1.0)
+
+    # seconds of heading history kept for latency compensation
+    historyTime = 1.0
+
+    def setup(self):
+        self.table = self.cameras_vision["limelight"]
+        self.gyro = self.gyros_system.get("navx")
+        self.headings = collections.deque()
+        self.hasTarget = False
+        self.targetHeading = 0.0
+        self.distance = None
+
+    def getHeading(self):
+        if self.gyro is None:
+            return 0.0
+        return self.gyro.getAngle()
+
+    def headingAt(self, time):
+        """
+        Gyro heading at time, interpolated from the history. Frames are only
+        a few loops old so this walks back from the newest sample.
+        """
+        newer = None
+        for sample in reversed(self.headings):
+            if sample[0] <= time:
+                if newer is None or newer[0] == sample[0]:
+                    return sample[1]
+                fraction = (time - sample[0]) / (newer[0] - sample[0])
+                return sample[1] + (newer[1] - sample[1]) * fraction
+            newer = sample
+        return newer[1] if newer is not None else self.getHeading()
+
+    @feedback
+    def getDistance(self):
+        """
+        Distance to the target in meters, -1 without a target
+        """
+        if not self.hasTarget:
+            return -1
+        return self.distance
+
+    @feedback
+    def getHeadingError(self):
+        """
+        Degrees the robot has to turn to face the target, positive is clockwise
+        """
+        if not self.hasTarget:
+            return 0.0
+        return self.targetHeading - self.getHeading()
+
+    def isAligned(self):
+        return self.hasTarget and abs(self.getHeadingError()) <= self.alignTolerance
+
+    def align(self):
+        """
+        Turns the drive train toward the target. Returns True once aligned.
+        Call every loop while aligning.
+        """
+        if not self.hasTarget:
+            return False
+        error = self.getHeadingError()
+        if abs(error) <= self.alignTolerance:
+            self.driveTrain.setArcade(0, 0)
+            return True
+        rotation = min(self.alignMaxOutput, max(self.alignMinOutput, abs(error) * self.alignP))
+        self.driveTrain.setArcade(0, math.copysign(rotation, error))
+        return False
+
+    def execute(self):
+        now = Timer.getFPGATimestamp()
+        self.headings.append((now, self.getHeading()))
+        while self.headings[0][0] < now - self.historyTime:
+            self.headings.popleft()
+
+        self.hasTarget = self.table.getNumber("tv", 0) >= 1
+        if not self.hasTarget:
+            return
+        tx = self.table.getNumber("tx", 0)
+        ty = self.table.getNumber("ty", 0)
+        latency = (self.table.getNumber("tl", 0) + self.captureLatency) / 1000
+        self.targetHeading = self.headingAt(now - latency) + tx
+        self.distance = (self.targetHeight - self.cameraHeight) / math.tan(math.radians(self.cameraPitch + ty))
@@ -2,9 +2,10 @@
 Team 3200 Robot base class
 """
 # Module imports:
+from utils import importTimer # must stay first, times every import after it when enabled
 import wpilib
 from wpilib import XboxController
-from magicbot import MagicRobot, tunable
+from magicbot import MagicRobot, tunable, feedback
 
 # Component imports:
 from components.driveTrain import DriveTrain
@@ -18,20 +19,41 @@ from components.loaderLogic import LoaderLogic
 from components.elevator import Elevator
 from components.scorpionLoader import ScorpionLoader
 from components.feederMap import FeederMap
+from components.deviceHealth import DeviceHealth
+from components.stateTraceReporter import StateTraceReporter
+from components.vision import Vision
+from components.shotTable import ShotTable
+from components.feedPipeline import FeedPipeline
+from components.indexer import Indexer
+from components.shooterFastLoop import ShooterFastLoop
+from components.gcPolicy import GcPolicy
+from components.scheduler import Scheduler
+from components.compressorScheduler import CompressorScheduler
 
 # Other imports:
 from robotMap import RobotMap, XboxMap
-from utils.componentUtils import testComponentCompatibility
-from utils.motorHelper import createMotor
-from utils.sensorFactories import gyroFactory, breaksensorFactory
-from utils.acturatorFactories import compressorFactory, solenoidFactory
+from utils.eventBus import EventBus
+from utils.stateTracing import StateTraces
+from utils.componentUtils import testComponentCompatibility, injectDisabledComponents, isComponentEnabled
+from utils import deviceRegistry
+from utils.deviceSpecs import ConfigError
+from utils import componentOrder
+from utils.asyncLogging import startAsyncLogging, defaultLogDir
+from utils.overrunSampler import OverrunSampler
 import utils.math
+import os
+import time
 
 class MyRobot(MagicRobot):
     """
     Base robot class of Magic Bot Type
     """
+    vision: Vision
+    shotTable: ShotTable
+    shooterFastLoop: ShooterFastLoop
+    indexer: Indexer
     shooter: ShooterLogic
+    feedPipeline: FeedPipeline
     loader: LoaderLogic
     feeder: FeederMap
     sensors: Sensors
@@ -40,23 +62,35 @@ class MyRobot(MagicRobot):
     winch: Winch
     buttonManager: ButtonManager
     pneumatics: Pneumatics
+    compressorScheduler: CompressorScheduler
     elevator: Elevator
     scorpionLoader: ScorpionLoader
+    deviceHealth: DeviceHealth
+    stateTraceReporter: StateTraceReporter
+    gcPolicy: GcPolicy
+    scheduler: Scheduler
 
     sensitivityExponent = tunable(1.8)
+    overrunBudget = tunable(0.025)
 
     def createObjects(self):
         """
         Robot-wide initialization code should go here. Replaces robotInit
         """
+        self.logPipeline = startAsyncLogging()
+        self.overrunSampler = OverrunSampler()
         self.map = RobotMap()
-        self.xboxMap = XboxMap(XboxController(1), XboxController(0))
+        self.eventBus = EventBus()
+        self.stateTraces = StateTraces()
+        self.xboxMap = XboxMap(XboxController(1), XboxController(0), self.eventBus)
+        config = self.map.configMapper
+        shotTableFile = config.getSubsystem("/").get("shotTable", "shotTable.yml")
+        # the configs directory is replaced on every deploy, calibration is kept with the logs
+        self.shotTablePath = config.configDir + os.path.sep + shotTableFile
+        self.calibratedShotTablePath = defaultLogDir() + os.path.sep + "calibrated-" + shotTableFile
 
-        self.instantiateSubsystemGroup("motors", createMotor)
-        self.instantiateSubsystemGroup("gyros", gyroFactory)
-        self.instantiateSubsystemGroup("digitalInput", breaksensorFactory)
-        self.instantiateSubsystemGroup("compressors", compressorFactory)
-        self.instantiateSubsystemGroup("solenoids", solenoidFactory)
+        self.createDevices()
+        importTimer.logReport()
 
         # Check each componet for compatibility
         testComponentCompatibility(self, ShooterLogic)
@@ -65,13 +99,81 @@ class MyRobot(MagicRobot):
         testComponentCompatibility(self, Winch)
         testComponentCompatibility(self, ButtonManager)
         testComponentCompatibility(self, Pneumatics)
+        testComponentCompatibility(self, CompressorScheduler)
         testComponentCompatibility(self, Elevator)
         testComponentCompatibility(self, ScorpionLoader)
+        testComponentCompatibility(self, Vision)
+        testComponentCompatibility(self, ShotTable)
+        testComponentCompatibility(self, FeedPipeline)
+        testComponentCompatibility(self, Indexer)
+        testComponentCompatibility(self, ShooterFastLoop)
+        testComponentCompatibility(self, Sensors)
+        testComponentCompatibility(self, LoaderLogic)
+        testComponentCompatibility(self, FeederMap)
+
+    def _create_components(self):
+        """
+        Creates the components like MagicRobot, then orders them so the ones
+        making requests execute before the ones acting on them. See
+        utils.componentOrder. Components disabled in createObjects aren't
+        in the list at all, they only get their variables injected.
+        Everything made up to here lives for the whole run, so gcPolicy
+        freezes it.
+        """
+        super()._create_components()
+        injectDisabledComponents(self)
+        self._components, graph = componentOrder.sortComponents(self._components)
+        componentOrder.logOrder(self._components, graph)
+        self.gcPolicy.freeze()
+
+    @feedback
+    def droppedLogRecords(self):
+        """
+        Number of log records dropped because the logging queue was full
+        """
+        return self.logPipeline.getDroppedCount()
+
+    @feedback
+    def loopOverruns(self):
+        """
+        Number of loop iterations that went over overrunBudget
+        """
+        return self.overrunSampler.getOverrunCount()
+
+    def robotPeriodic(self):
+        """
+        Runs at the end of every loop in every mode
+        """
+        super().robotPeriodic()
+        self.overrunSampler.budget = self.overrunBudget
+        self.overrunSampler.tick()
+
+    def disabledInit(self):
+        """
+        Writes the stacks sampled during loop overruns to the log directory
+        and any shot table calibration back to the configs
+        """
+        if isComponentEnabled(self, "shotTable"):
+            self.shotTable.save()
+        path = defaultLogDir() + os.path.sep + time.strftime("overruns-%Y%m%d-%H%M%S.folded")
+        try:
+            os.makedirs(defaultLogDir(), exist_ok = True)
+            if self.overrunSampler.write(path):
+                self.logger.info("Wrote loop overrun stacks to %s", path)
+        except OSError as e:
+            self.logger.error("Could not write overrun stacks to %s. Err %s", path, e)
+
+    def disabledPeriodic(self):
+        """
+        Collects garbage while nothing is timing critical
+        """
+        self.gcPolicy.disabledPeriodic()
 
     def autonomousInit(self):
         """Run when autonomous is enabled."""
         self.shooter.autonomousEnabled()
-        self.loader.stopLoading()
+        if isComponentEnabled(self, "loader"):
+            self.loader.stopLoading()
 
     def teleopInit(self):
         # Register button events for doof
@@ -88,6 +190,11 @@ class MyRobot(MagicRobot):
         self.buttonManager.registerButtonEvent(self.xboxMap.mech, XboxController.Button.kBumperLeft, ButtonEvent.kOnRelease, self.elevator.stop)
         self.buttonManager.registerButtonEvent(self.xboxMap.drive, XboxController.Button.kBumperLeft, ButtonEvent.kOnPress, self.driveTrain.enableCreeperMode)
         self.buttonManager.registerButtonEvent(self.xboxMap.drive, XboxController.Button.kBumperLeft, ButtonEvent.kOnRelease, self.driveTrain.disableCreeperMode)
+        # Shot calibration, the driver calls the last shot
+        if isComponentEnabled(self, "shotTable"):
+            self.buttonManager.registerButtonEvent(self.xboxMap.drive, XboxController.Button.kA, ButtonEvent.kOnPress, self.shotTable.markMade)
+            self.buttonManager.registerButtonEvent(self.xboxMap.drive, XboxController.Button.kX, ButtonEvent.kOnPress, self.shotTable.markMissedShort)
+            self.buttonManager.registerButtonEvent(self.xboxMap.drive, XboxController.Button.kY, ButtonEvent.kOnPress, self.shotTable.markMissedLong)
 
         self.shooter.autonomousDisabled()
 
@@ -121,17 +228,30 @@ class MyRobot(MagicRobot):
         """
         pass
 
+    def createDevices(self):
+        """
+        Checks every device entry in the config, then creates each group
+        registered in deviceRegistry. Bad entries stop boot with a single
+        ConfigError listing all of them before any hardware is touched.
+        """
+        errors = deviceRegistry.validateConfig(self.map.configMapper)
+        if errors:
+            raise ConfigError(errors)
+        for groupName in deviceRegistry.getGroups():
+            self.instantiateSubsystemGroup(groupName, deviceRegistry.getGroupFactory(groupName))
+
     def instantiateSubsystemGroup(self, groupName, factory):
         """
         For each subsystem find all groupNames and call factory.
-        Each one is saved to groupName_subsystem and subsystem_groupName
+        Each one is saved to groupName_subsystem and subsystem_groupName.
+        factory also gets the group's devices created so far on this robot,
+        so followers only find masters of the same robot.
         """
         config = self.map.configMapper
         containerName = "subsystem" + groupName[0].upper() + groupName[1:]
         
         if not hasattr(self, containerName):
             setattr(self, containerName, {})
-            self.subsystemGyros = {}
 
         #note this is a dicontary refernce, so changes to it
         #are changes to self.<containerName>
@@ -139,8 +259,9 @@ class MyRobot(MagicRobot):
 
         subsystems = config.getSubsystems()
         createdCount = 0
+        devices = {}
         for subsystem in subsystems:
-            items = {key:factory(descp) for (key, descp) in config.getGroupDict(subsystem, groupName).items()}
+            items = {key:factory(descp, devices) for (key, descp) in config.getGroupDict(subsystem, groupName).items()}
             if(len(items) == 0):
                 continue
             container[subsystem] = items
@@ -1,5 +1,6 @@
 from utils import configMapper
 from wpilib import XboxController
+from utils.eventBus import MechTriggersChanged
 
 class RobotMap():
     """
@@ -13,11 +14,14 @@ class RobotMap():
 
 class XboxMap():
     """
-    Holds the mappings to TWO Xbox controllers, one for driving, one for mechanisms
+    Holds the mappings to TWO Xbox controllers, one for driving, one for mechanisms.
+    Publishes MechTriggersChanged on eventBus when a mech trigger is pressed or released.
     """
-    def __init__(self, Xbox1: XboxController, Xbox2: XboxController):
+    def __init__(self, Xbox1: XboxController, Xbox2: XboxController, eventBus = None):
         self.drive = Xbox1
         self.mech = Xbox2
+        self.eventBus = eventBus
+        self.mechTriggers = None
         self.controllerInput()
         #Button mappings
 
@@ -43,6 +47,12 @@ class XboxMap():
         self.mechLeftTrig = self.mech.getRawAxis(XboxController.Axis.kLeftTrigger)
         self.mechDPad = self.mech.getPOV()
 
+        triggers = (self.mechLeftTrig > 0, self.mechRightTrig > 0)
+        if triggers != self.mechTriggers:
+            self.mechTriggers = triggers
+            if self.eventBus is not None:
+                self.eventBus.publish(MechTriggersChanged(*triggers))
+
     def getDriveController(self):
         return self.drive
 
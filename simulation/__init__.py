@@ -0,0 +1,4 @@
+"""
+Headless simulation of MyRobot against stand-in devices and a stepped clock.
+Run with `python -m simulation.runner --scenario match`
+"""
@@ -0,0 +1,37 @@
+"""
+Fake FPGA clock for headless simulation
+"""
+import magicbot.state_machine
+import wpilib
+
+class SteppedClock:
+    """
+    Clock that only moves when step() is called. install() points the
+    magicbot state machine timer and wpilib's FPGA timestamp at it so timed
+    states expire in simulated time instead of wall time.
+    """
+    def __init__(self, start = 0.0):
+        self.now = start
+        self.patched = []
+
+    def get(self):
+        return self.now
+
+    def step(self, dt):
+        self.now += dt
+
+    def install(self):
+        if self.patched:
+            return
+        self.patched = [(magicbot.state_machine, "getTime", vars(magicbot.state_machine)["getTime"]),
+                        (wpilib.Timer, "getFPGATimestamp", vars(wpilib.Timer)["getFPGATimestamp"])]
+        magicbot.state_machine.getTime = self.get
+        wpilib.Timer.getFPGATimestamp = staticmethod(self.get)
+
+    def uninstall(self):
+        """
+        Puts the real clocks back
+        """
+        for owner, name, original in self.patched:
+            setattr(owner, name, original)
+        self.patched = []
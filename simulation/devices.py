@@ -0,0 +1,471 @@
+"""
+Stand-ins for the CTRE, REV and navX devices, the RIO digital inputs and the
+Xbox controllers. installVendorStandIns() must run before robot or
+utils.motorHelper is imported so the feedback classes subclass the stand-ins.
+"""
+import enum
+import sys
+import types
+
+import wpilib
+from wpilib.interfaces import SpeedController
+
+# every device created since the last resetDevices(), stepped once per tick
+devices = []
+
+# started SimNotifiers, called at their period by advance()
+notifiers = []
+
+# names that are configuration calls on the real devices and do nothing here
+noOpPrefixes = ("config", "enable", "setSensorPhase", "setNeutralMode", "setIdleMode",
+                "setSecondaryCurrentLimit", "setSmartCurrentLimit", "burnFlash", "restoreFactoryDefaults",
+                "setStatusFramePeriod", "clearStickyFaults")
+
+def stepDevices(dt):
+    """
+    Advances the physics of every device by dt seconds
+    """
+    for device in devices:
+        device.stepPhysics(dt)
+
+def advance(dt, clock):
+    """
+    Steps the devices and clock by dt. Running notifiers are called when
+    they are due, with the devices and clock stepped up to that time first.
+    """
+    end = clock.get() + dt
+    for notifier in notifiers:
+        if notifier.nextTime is None:
+            notifier.nextTime = clock.get() + notifier.period
+    while notifiers:
+        notifier = min(notifiers, key = lambda n: n.nextTime)
+        if notifier.nextTime > end - 1e-9:
+            break
+        step = notifier.nextTime - clock.get()
+        if step > 0:
+            stepDevices(step)
+            clock.step(step)
+        notifier.nextTime += notifier.period
+        notifier.handler()
+    remaining = end - clock.get()
+    if remaining > 0:
+        stepDevices(remaining)
+        clock.step(remaining)
+
+def resetDevices():
+    devices.clear()
+    notifiers.clear()
+
+def _noOp(*args, **kwargs):
+    return 0
+
+class SimSpeedController(SpeedController):
+    """
+    Records what the robot code asks of a motor. Accepts both the wpilib
+    set(speed) and the ctre set(mode, value) forms.
+    """
+    followMode = None
+
+    def __init__(self, channel = None):
+        super().__init__()
+        self.channel = channel
+        self.mode = None
+        self.output = 0.0
+        self.maxOutput = 0.0
+        self.inverted = False
+        self.master = None
+        devices.append(self)
+
+    def __getattr__(self, name):
+        if name.startswith(noOpPrefixes):
+            return _noOp
+        raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+
+    def set(self, *args, **kwargs):
+        if "value" in kwargs:
+            self.mode = kwargs.get("mode")
+            value = kwargs["value"]
+        elif len(args) >= 2:
+            self.mode, value = args[0], args[1]
+        else:
+            value = args[0] if args else kwargs.get("speed", 0.0)
+
+        if self.followMode is not None and self.mode == self.followMode:
+            self.master = value
+            return
+        self.output = value
+        self.maxOutput = max(self.maxOutput, abs(value))
+
+    def get(self):
+        return self.output
+
+    def setVoltage(self, output):
+        self.set(output / 12.0)
+
+    def setInverted(self, isInverted):
+        self.inverted = isInverted
+
+    def getInverted(self):
+        return self.inverted
+
+    def disable(self):
+        self.output = 0.0
+
+    def stopMotor(self):
+        self.output = 0.0
+
+    def stepPhysics(self, dt):
+        pass
+
+class StickyFaults:
+    def toBitfield(self):
+        return 0
+
+class SimTalonSRX(SimSpeedController):
+    """
+    WPI_TalonSRX stand-in
+    """
+    firmware = 0x1400
+
+    def __init__(self, channel):
+        super().__init__(channel)
+        self.followMode = ControlMode.Follower
+        self.position = 0.0
+
+    def getStickyFaults(self, faults):
+        return 0
+
+    def getFirmwareVersion(self):
+        return self.firmware
+
+    def getBusVoltage(self):
+        return 12.5
+
+    def getTemperature(self):
+        return 30.0
+
+    def getSelectedSensorPosition(self, pidIdx = 0):
+        return int(self.position)
+
+    def getSelectedSensorVelocity(self, pidIdx = 0):
+        return int(self.output) if self.mode in (ControlMode.Velocity, TalonFXControlMode.Velocity) else 0
+
+    def stepPhysics(self, dt):
+        if self.mode in (ControlMode.Velocity, TalonFXControlMode.Velocity):
+            # native units per 100ms
+            self.position += self.output * dt * 10
+
+class SimTalonFX(SimTalonSRX):
+    """
+    WPI_TalonFX stand-in
+    """
+    def __init__(self, channel):
+        super().__init__(channel)
+        self.followMode = TalonFXControlMode.Follower
+
+class SimSparkMaxEncoder:
+    def __init__(self, motor):
+        self.motor = motor
+
+    def getVelocity(self):
+        return self.motor.velocity
+
+    def getPosition(self):
+        return self.motor.position
+
+class SimSparkMaxPIDController:
+    def __init__(self, motor):
+        self.motor = motor
+        self.gains = {}
+
+    def setP(self, value, slot = 0):
+        self.gains[("P", slot)] = value
+
+    def setI(self, value, slot = 0):
+        self.gains[("I", slot)] = value
+
+    def setD(self, value, slot = 0):
+        self.gains[("D", slot)] = value
+
+    def setFF(self, value, slot = 0):
+        self.gains[("FF", slot)] = value
+
+    def setOutputRange(self, minimum, maximum, slot = 0):
+        pass
+
+    def setReference(self, value, controlType, slot = 0):
+        self.motor.controlType = controlType
+        self.motor.reference = value
+        self.motor.maxOutput = max(self.motor.maxOutput, abs(value))
+        return 0
+
+class SimSparkMax(SimSpeedController):
+    """
+    CANSparkMax stand-in. Spins up like a first order system towards the
+    velocity or duty cycle it was given.
+    """
+    freeSpeed = 5676
+    timeConstant = 0.25
+
+    def __init__(self, channel, motorType = None):
+        super().__init__(channel)
+        self.motorType = motorType
+        self.controlType = None
+        self.reference = 0.0
+        self.velocity = 0.0
+        self.maxVelocity = 0.0
+        self.position = 0.0
+        self.encoder = SimSparkMaxEncoder(self)
+        self.pidController = SimSparkMaxPIDController(self)
+
+    def set(self, speed):
+        self.controlType = None
+        super().set(speed)
+
+    def getEncoder(self, *args):
+        return self.encoder
+
+    def getPIDController(self):
+        return self.pidController
+
+    def follow(self, master, invert = False):
+        self.master = master
+        return 0
+
+    def getStickyFaults(self):
+        return 0
+
+    def getFirmwareVersion(self):
+        return 0x1050000
+
+    def getBusVoltage(self):
+        return 12.5
+
+    def getMotorTemperature(self):
+        return 30.0
+
+    def targetVelocity(self):
+        if self.master is not None:
+            return self.master.targetVelocity()
+        if self.controlType == ControlType.kVelocity:
+            return max(-self.freeSpeed, min(self.freeSpeed, self.reference))
+        if self.controlType == ControlType.kDutyCycle:
+            return self.reference * self.freeSpeed
+        if self.controlType is None:
+            return self.output * self.freeSpeed
+        return 0.0
+
+    def stepPhysics(self, dt):
+        self.velocity += (self.targetVelocity() - self.velocity) * min(1.0, dt / self.timeConstant)
+        self.maxVelocity = max(self.maxVelocity, self.velocity)
+        self.position += self.velocity / 60 * dt
+
+class SimAHRS:
+    """
+    navx.AHRS stand-in
+    """
+    def __init__(self):
+        self.yaw = 0.0
+        devices.append(self)
+
+    @classmethod
+    def create_spi(cls, *args, **kwargs):
+        return cls()
+
+    @classmethod
+    def create_i2c(cls, *args, **kwargs):
+        return cls()
+
+    def isConnected(self):
+        return True
+
+    def getTempC(self):
+        return 25.0
+
+    def getFirmwareVersion(self):
+        return "3.1.400"
+
+    def getYaw(self):
+        return self.yaw
+
+    def getAngle(self):
+        return self.yaw
+
+    def reset(self):
+        self.yaw = 0.0
+
+    def stepPhysics(self, dt):
+        pass
+
+class SimDigitalInput:
+    """
+    RIO digital input stand-in. The break sensors read True when nothing is
+    in the beam.
+    """
+    def __init__(self, channel):
+        self.channel = channel
+        self.value = True
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def getChannel(self):
+        return self.channel
+
+class SimNotifier:
+    """
+    wpilib.Notifier stand-in. advance() calls the handler on the simulated
+    clock instead of a thread, so runs stay repeatable.
+    """
+    def __init__(self, handler):
+        self.handler = handler
+        self.period = None
+        self.nextTime = None
+
+    def startPeriodic(self, period):
+        self.period = period
+        self.nextTime = None
+        if self not in notifiers:
+            notifiers.append(self)
+
+    def stop(self):
+        if self in notifiers:
+            notifiers.remove(self)
+
+class SimXboxController(wpilib.XboxController):
+    """
+    XboxController whose buttons, axes and POV are set by the scenario
+    instead of read from the driver station
+    """
+    def __init__(self, port):
+        super().__init__(port)
+        self.simPort = port
+        self.buttons = 0
+        self.pressedLatch = 0
+        self.releasedLatch = 0
+        self.axes = [0.0] * 6
+        self.pov = -1
+        self.rumble = {}
+
+    def setButton(self, button, down):
+        bit = 1 << (int(button) - 1)
+        if down and not self.buttons & bit:
+            self.buttons |= bit
+            self.pressedLatch |= bit
+        elif not down and self.buttons & bit:
+            self.buttons &= ~bit
+            self.releasedLatch |= bit
+
+    def setAxis(self, axis, value):
+        self.axes[int(axis)] = value
+
+    def setPOV(self, value):
+        self.pov = value
+
+    def getButtons(self):
+        """Stands in for the driver station's button bitmask of this controller."""
+        return self.buttons
+
+    def getRawButton(self, button):
+        return bool(self.buttons >> (int(button) - 1) & 1)
+
+    def getRawButtonPressed(self, button):
+        bit = 1 << (int(button) - 1)
+        pressed = bool(self.pressedLatch & bit)
+        self.pressedLatch &= ~bit
+        return pressed
+
+    def getRawButtonReleased(self, button):
+        bit = 1 << (int(button) - 1)
+        released = bool(self.releasedLatch & bit)
+        self.releasedLatch &= ~bit
+        return released
+
+    def getRawAxis(self, axis):
+        return self.axes[int(axis)]
+
+    def getPOV(self, pov = 0):
+        return self.pov
+
+    def setRumble(self, rumbleType, value):
+        self.rumble[rumbleType] = value
+
+    def getName(self):
+        return f"SimXbox{self.simPort}"
+
+class ControlMode(enum.Enum):
+    PercentOutput = 0
+    Position = 1
+    Velocity = 2
+    Current = 3
+    Follower = 5
+    MotionProfile = 6
+    MotionMagic = 7
+    Disabled = 15
+
+class TalonFXControlMode(enum.Enum):
+    PercentOutput = 0
+    Position = 1
+    Velocity = 2
+    Current = 3
+    Follower = 5
+    MotionProfile = 6
+    MotionMagic = 7
+    Disabled = 15
+
+class ControlType(enum.Enum):
+    kDutyCycle = 0
+    kVelocity = 1
+    kVoltage = 2
+    kPosition = 3
+
+class MotorType(enum.Enum):
+    kBrushed = 0
+    kBrushless = 1
+
+class IdleMode(enum.Enum):
+    kCoast = 0
+    kBrake = 1
+
+class CurrentLimitConfiguration:
+    def __init__(self, enable = False, currentLimit = 0, triggerThresholdCurrent = 0, triggerThresholdTime = 0):
+        self.enable = enable
+        self.currentLimit = currentLimit
+        self.triggerThresholdCurrent = triggerThresholdCurrent
+        self.triggerThresholdTime = triggerThresholdTime
+
+def _makeModule(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+def installVendorStandIns():
+    """
+    Replaces the ctre, rev and navx modules with the stand-ins
+    """
+    sys.modules["ctre"] = _makeModule("ctre", WPI_TalonSRX = SimTalonSRX, WPI_TalonFX = SimTalonFX,
+                                      ControlMode = ControlMode, TalonFXControlMode = TalonFXControlMode,
+                                      FeedbackDevice = type("FeedbackDevice", (int,), {}),
+                                      VelocityMeasPeriod = type("VelocityMeasPeriod", (int,), {}),
+                                      StatorCurrentLimitConfiguration = CurrentLimitConfiguration,
+                                      SupplyCurrentLimitConfiguration = CurrentLimitConfiguration,
+                                      StickyFaults = StickyFaults)
+    sys.modules["rev"] = _makeModule("rev", CANSparkMax = SimSparkMax, ControlType = ControlType,
+                                     MotorType = MotorType, IdleMode = IdleMode)
+    sys.modules["navx"] = _makeModule("navx", AHRS = SimAHRS)
+
+def installRobotStandIns(robotModule):
+    """
+    Points the sensor factory, the fast loop, the button manager and robot.py
+    at the stand-in digital inputs, notifier and controllers. Must run before robotInit.
+    """
+    import utils.sensorFactories
+    import utils.fastLoop
+    import components.buttonManager
+    utils.sensorFactories.di = SimDigitalInput
+    utils.fastLoop.Notifier = SimNotifier
+    components.buttonManager.readButtons = SimXboxController.getButtons
+    robotModule.XboxController = SimXboxController
@@ -0,0 +1,58 @@
+"""
+Balls moving along doof's loader past the five break sensors
+"""
+from simulation.devices import devices
+
+class SimIndexer:
+    """
+    Moves balls along the loader track with the loader motor output and
+    sets the break sensors they cover. A ball that runs off the top goes
+    into the flywheel, which records the shot and takes speed off it.
+    Positions are in meters from the loading sensor.
+    """
+    sensorPositions = (0.0, 0.15, 0.3, 0.45, 0.6)
+    exitPosition = 0.75
+    # a ball covers a sensor this far either side of its center
+    ballRadius = 0.09
+    # belt speed at full loader output, m/s
+    beltSpeed = 1.5
+    # fraction of flywheel speed a shot takes away
+    shotLoss = 0.2
+
+    def __init__(self, sensors, loaderMotor, flywheel, balls = ()):
+        self.sensors = sensors
+        self.loaderMotor = loaderMotor
+        self.flywheel = flywheel
+        self.balls = sorted(balls)
+        self.time = 0.0
+        # (time, flywheel velocity) of every ball that left the top
+        self.shots = []
+        self.updateSensors()
+        devices.append(self)
+
+    def addBall(self):
+        """
+        Pushes a ball in from the intake until it just breaks the loading
+        sensor, or up against the bottom ball if that is still in the way
+        """
+        position = -self.ballRadius + 0.01
+        if self.balls:
+            position = min(position, self.balls[0] - 2 * self.ballRadius)
+        self.balls.insert(0, position)
+        self.updateSensors()
+
+    def updateSensors(self):
+        for sensor, position in zip(self.sensors, self.sensorPositions):
+            covered = any(abs(ball - position) <= self.ballRadius for ball in self.balls)
+            sensor.set(not covered)
+
+    def stepPhysics(self, dt):
+        self.time += dt
+        move = self.loaderMotor.output * self.beltSpeed * dt
+        # balls reversed out past the loading sensor drop back into the intake
+        self.balls = [ball + move for ball in self.balls if ball + move > -2 * self.ballRadius]
+        while self.balls and self.balls[-1] >= self.exitPosition:
+            self.balls.pop()
+            self.shots.append((self.time, self.flywheel.velocity))
+            self.flywheel.velocity *= 1 - self.shotLoss
+        self.updateSensors()
@@ -0,0 +1,43 @@
+"""
+Limelight stand-in that plays recorded target data into networktables
+"""
+import bisect
+import json
+import os
+
+from networktables import NetworkTables
+
+recordingDir = os.path.dirname(__file__) + os.path.sep + "recordings"
+
+def loadRecording(name):
+    """
+    Loads recordings/<name>.json. Frames are {"t", "tv", "tx", "ty", "tl"}
+    with t in seconds from the start of the recording.
+    """
+    with open(recordingDir + os.path.sep + name + ".json") as file:
+        return json.load(file)["frames"]
+
+class SimLimelight:
+    """
+    Publishes the frame of a recording that was current at a given time to
+    the table the robot's limelight device reads.
+    """
+    keys = ("tv", "tx", "ty", "tl")
+
+    def __init__(self, frames, tableName = "limelight"):
+        self.frames = frames
+        self.times = [frame["t"] for frame in frames]
+        self.table = NetworkTables.getTable(tableName)
+        self.publish({"tv": 0, "tx": 0.0, "ty": 0.0, "tl": 0.0})
+
+    def publish(self, frame):
+        for key in self.keys:
+            self.table.putNumber(key, frame[key])
+
+    def play(self, tm):
+        """
+        Publishes the last frame recorded at or before tm
+        """
+        i = bisect.bisect_right(self.times, tm) - 1
+        if i >= 0:
+            self.publish(self.frames[i])
@@ -0,0 +1,102 @@
+"""
+Runs every scenario against every robot config. Each config x scenario pair
+gets its own process because the simulated hardware and networktables are
+process wide and would leak between runs.
+
+python -m simulation.matrix --jobs 4 --json matrix.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import yaml
+
+from simulation.scenarios import scenarios
+
+configDir = os.path.dirname(__file__) + os.path.sep + ".." + os.path.sep + "configs"
+
+def findRobotConfigs():
+    """
+    Returns the yml files in configs/ that describe a whole robot. Files
+    without a compatibility key are pieces loaded by other configs.
+    """
+    robotConfigs = []
+    for fileName in sorted(os.listdir(configDir)):
+        if not fileName.endswith((".yml", ".yaml")):
+            continue
+        with open(configDir + os.path.sep + fileName) as file:
+            data = yaml.load(file, yaml.FullLoader)
+        if isinstance(data, dict) and "compatibility" in data:
+            robotConfigs.append(fileName)
+    return robotConfigs
+
+def runPair(pair):
+    """
+    Pool worker. Runs one scenario against one config in a fresh process.
+    """
+    config, scenario = pair
+    logging.basicConfig(level = logging.CRITICAL)
+    from simulation.runner import runScenario
+    result = runScenario(scenario, config)
+    result["config"] = config
+    return result
+
+def runMatrix(configs, scenarioNames, jobs = None):
+    """
+    Runs every config x scenario pair on a process pool and returns the
+    results in config then scenario order
+    """
+    pairs = list(itertools.product(configs, scenarioNames))
+    # one task per child so every pair starts from a clean interpreter
+    with multiprocessing.Pool(jobs, maxtasksperchild = 1) as pool:
+        return pool.map(runPair, pairs, chunksize = 1)
+
+def formatReport(results, wallTime):
+    lines = []
+    width = max(len(result["config"]) for result in results) if results else 0
+    for result in results:
+        lines.append(f"{result['config']:<{width}}  {result['scenario']:<16} {result['status']:<8} "
+                     f"{result['wallTime']:6.2f}s  {result['simulatedTime']:6.1f}s simulated")
+        # tracebacks are shortened to the exception, the json has them in full
+        for failure in result["failures"]:
+            lines.append("        " + failure.strip().splitlines()[-1])
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    cpuTime = sum(result["wallTime"] for result in results)
+    lines.append(f"{len(results)} runs: {summary}. {cpuTime:.2f}s of runs in {wallTime:.2f}s")
+    return "\n".join(lines)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run every scenario against every robot config")
+    parser.add_argument("--config", action = "append", help = "only run this config, may be repeated")
+    parser.add_argument("--scenario", action = "append", choices = sorted(scenarios),
+                        help = "only run this scenario, may be repeated")
+    parser.add_argument("--jobs", type = int, default = None, help = "worker processes, defaults to cpu count")
+    parser.add_argument("--json", help = "also write the results to this file")
+    args = parser.parse_args(argv)
+
+    configs = args.config or findRobotConfigs()
+    scenarioNames = args.scenario or sorted(scenarios)
+
+    start = time.perf_counter()
+    results = runMatrix(configs, scenarioNames, args.jobs)
+    wallTime = time.perf_counter() - start
+
+    print(formatReport(results, wallTime))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"wallTime": wallTime, "results": results}, file, indent = 1)
+
+    failed = [result for result in results if result["status"] not in ("passed", "skipped")]
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Runs MyRobot headless against the stand-in devices with a stepped clock.
+Every tick runs the same calls magicbot makes in a real match loop, but the
+clock only advances by the loop period so a match runs as fast as the CPU
+allows.
+
+python -m simulation.runner --scenario match --config doof.yml
+python -m simulation.runner --scenario teleopShooting --alloc    allocations per tick
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import traceback
+
+from networktables import NetworkTables
+
+from simulation import devices
+from simulation.clock import SteppedClock
+from simulation.scenarios import scenarios
+from utils.allocProfiler import AllocProfiler
+
+class HeadlessRunner:
+    """
+    Boots MyRobot and steps it through the modes of a scenario
+    """
+    period = 0.02
+    disabledTime = 0.5
+
+    def __init__(self, scenario, clock = None, allocProfiler = None):
+        self.scenario = scenario
+        self.clock = clock or SteppedClock()
+        self.allocProfiler = allocProfiler
+        self.robot = None
+        self.ticks = 0
+
+    def boot(self):
+        NetworkTables.startTestMode()
+        devices.installVendorStandIns()
+        devices.resetDevices()
+        self.clock.install()
+
+        import robot
+        devices.installRobotStandIns(robot)
+        self.robot = robot.MyRobot()
+        self.robot.robotInit()
+        if self.allocProfiler is not None:
+            self.allocProfiler.install(self.robot)
+        self.drive = self.robot.xboxMap.drive
+        self.mech = self.robot.xboxMap.mech
+
+    def getMotor(self, subsystem, name):
+        return self.robot.subsystemMotors.get(subsystem, {}).get(name)
+
+    def getSensor(self, subsystem, name):
+        return self.robot.subsystemDigitalInput.get(subsystem, {}).get(name)
+
+    def transitionCount(self, machine, old, new):
+        trace = self.robot.stateTraces.get(machine)
+        if trace is None:
+            return 0
+        return trace.transitionCounts.get((old, new), 0)
+
+    def sawTransition(self, machine, old, new):
+        return self.transitionCount(machine, old, new) > 0
+
+    def tick(self, mode, tm, body):
+        self.scenario.onStep(self, mode, tm)
+        body(tm)
+        self.robot.robotPeriodic()
+        if self.allocProfiler is not None:
+            self.allocProfiler.tick()
+        devices.advance(self.period, self.clock)
+        self.ticks += 1
+
+    def runMode(self, mode, duration, body):
+        tm = 0.0
+        while tm < duration:
+            self.tick(mode, tm, body)
+            tm += self.period
+
+    def runAutonomous(self, duration):
+        robot = self.robot
+        robot._on_mode_enable_components()
+        robot.autonomousInit()
+        robot._automodes._on_autonomous_enable()
+
+        def body(tm):
+            robot._automodes._on_iteration(tm)
+            robot._execute_components()
+            robot._update_feedback()
+
+        self.runMode("autonomous", duration, body)
+        robot._automodes.disable()
+        robot._on_mode_disable_components()
+
+    def runTeleop(self, duration):
+        robot = self.robot
+        robot._on_mode_enable_components()
+        robot.teleopInit()
+
+        def body(tm):
+            robot.teleopPeriodic()
+            robot._execute_components()
+            robot._update_feedback()
+
+        self.runMode("teleop", duration, body)
+        robot._on_mode_disable_components()
+
+    def runDisabled(self, duration):
+        robot = self.robot
+        robot._on_mode_disable_components()
+        robot.disabledInit()
+
+        def body(tm):
+            robot.disabledPeriodic()
+            robot._update_feedback()
+
+        self.runMode("disabled", duration, body)
+
+    def run(self):
+        """
+        Runs every mode of the scenario and returns a result dict
+        """
+        result = {"scenario": self.scenario.name, "status": "passed", "failures": [],
+                  "simulatedTime": 0.0, "wallTime": 0.0, "ticks": 0}
+        start = time.perf_counter()
+        try:
+            self.boot()
+            result["robot"] = self.robot.map.configMapper.getSubsystem("/")["compatibility"]
+            if not self.robot.map.configMapper.checkCompatibilty(self.scenario.compatibility):
+                result["status"] = "skipped"
+                return result
+
+            self.scenario.setup(self)
+            modeRunners = {"autonomous": self.runAutonomous, "teleop": self.runTeleop,
+                           "disabled": self.runDisabled}
+            for mode, duration in self.scenario.modes:
+                modeRunners[mode](duration)
+                self.runDisabled(self.disabledTime)
+
+            result["failures"] = self.scenario.check(self)
+            result["metrics"] = self.scenario.metrics(self)
+            if result["failures"]:
+                result["status"] = "failed"
+        except Exception:
+            result["status"] = "error"
+            result["failures"] = [traceback.format_exc()]
+        finally:
+            result["wallTime"] = time.perf_counter() - start
+            result["simulatedTime"] = self.clock.get()
+            result["ticks"] = self.ticks
+            self.clock.uninstall()
+            if self.allocProfiler is not None and self.allocProfiler.wrapped:
+                self.allocProfiler.uninstall()
+        return result
+
+def runScenario(name, config = None, allocProfiler = None):
+    """
+    Runs scenario name once. config picks the yml in configs/ like ~/robotConfig does.
+    """
+    if config is not None:
+        os.environ["ROBOT_CONFIG"] = config
+    return HeadlessRunner(scenarios[name](), allocProfiler = allocProfiler).run()
+
+def printResult(result):
+    print(f"{result['scenario']}: {result['status']} - simulated {result['simulatedTime']:.1f}s "
+          f"({result['ticks']} ticks) in {result['wallTime']:.2f}s")
+    for name, value in result.get("metrics", {}).items():
+        print(f"    {name}: {value}")
+    for failure in result["failures"]:
+        print("    " + failure)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run the robot headless through a scripted scenario")
+    parser.add_argument("--scenario", default = "match", choices = sorted(scenarios))
+    parser.add_argument("--config", help = "config file in configs/ to use instead of ~/robotConfig")
+    parser.add_argument("--list", action = "store_true", help = "list scenarios and exit")
+    parser.add_argument("--alloc", action = "store_true", help = "report allocations per tick by component and line")
+    parser.add_argument("--alloc-ticks", type = int, default = 200, help = "enabled ticks to measure with --alloc")
+    parser.add_argument("--alloc-warmup", type = int, default = 50, help = "enabled ticks to skip before measuring")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, scenario in sorted(scenarios.items()):
+            print(f"{name}: {scenario.description}")
+        return 0
+
+    logging.basicConfig(level = logging.WARNING)
+    allocProfiler = AllocProfiler(args.alloc_ticks, args.alloc_warmup) if args.alloc else None
+    result = runScenario(args.scenario, args.config, allocProfiler)
+    printResult(result)
+    if allocProfiler is not None:
+        print(allocProfiler.report())
+    return 0 if result["status"] in ("passed", "skipped") else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
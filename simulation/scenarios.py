@@ -0,0 +1,290 @@
+"""
+Scripted scenarios for the headless runner. Each scenario drives the
+controllers and sensors from onStep and returns failures from check.
+"""
+from wpilib import XboxController
+
+from simulation.limelight import SimLimelight, loadRecording
+from simulation.indexer import SimIndexer
+
+Button = XboxController.Button
+Axis = XboxController.Axis
+
+class Scenario:
+    """
+    Base scenario. modes is a list of (mode, seconds) run in order with a
+    short disabled period between and after them.
+    """
+    name = ""
+    description = ""
+    compatibility = ["all"]
+    modes = [("autonomous", 15.0), ("teleop", 135.0)]
+
+    def setup(self, sim):
+        pass
+
+    def onStep(self, sim, mode, tm):
+        """
+        Called before every tick with the seconds since mode started
+        """
+        pass
+
+    def check(self, sim):
+        """
+        Returns a list of failure messages, empty when the scenario passed
+        """
+        return []
+
+    def metrics(self, sim):
+        """
+        Returns {name: value} of measurements to report with the result
+        """
+        return {}
+
+    @staticmethod
+    def hold(tm, start, end):
+        return start <= tm < end
+
+def checkDriveMoved(sim):
+    failures = []
+    for name in ("leftMotor", "rightMotor"):
+        motor = sim.getMotor("driveTrain", name)
+        if motor is None or motor.maxOutput == 0:
+            failures.append(f"drive train {name} never moved")
+    return failures
+
+class AutonomousScenario(Scenario):
+    name = "autonomous"
+    description = "Default autonomous shoots the preloaded balls then backs up and turns"
+    compatibility = ["doof"]
+    modes = [("autonomous", 15.0)]
+
+    def check(self, sim):
+        failures = []
+        if not sim.sawTransition("ShooterLogic", "runShooter", "autonomousShoot"):
+            failures.append("shooter never reached speed in autonomous")
+        if not sim.sawTransition("Autonomous", "stop", ""):
+            failures.append("autonomous did not finish")
+        return failures + checkDriveMoved(sim)
+
+class TeleopShootingScenario(Scenario):
+    name = "teleopShooting"
+    description = "Mech driver holds A to spin up the flywheel and releases to stop"
+    compatibility = ["doof"]
+    modes = [("teleop", 10.0)]
+
+    def onStep(self, sim, mode, tm):
+        sim.mech.setButton(Button.kA, self.hold(tm, 1.0, 5.0))
+
+    def check(self, sim):
+        failures = []
+        shooter = sim.robot.shooter
+        flywheel = sim.getMotor("shooter", "shooterMotor")
+        target = shooter.teleShootingSpeed - shooter.speedTolerance
+        if flywheel.maxVelocity < target:
+            failures.append(f"flywheel peaked at {flywheel.maxVelocity:.0f} rpm, wanted {target}")
+        if not sim.sawTransition("ShooterLogic", "finishShooting", "idling"):
+            failures.append("shooter did not go back to idling after release")
+        if not sim.sawTransition("LoaderLogic", "shooting", "nextAction"):
+            failures.append("loader did not resume after shooting")
+        return failures
+
+class MatchScenario(Scenario):
+    name = "match"
+    description = "Full 150 second match: autonomous, then loading three balls, driving and shooting"
+    compatibility = ["doof"]
+
+    # seconds into teleop that a ball is pushed in front of the loading sensor
+    ballTimes = (3.0, 5.0, 7.0)
+    # checked against the indexer model once loading is done
+    inventoryTime = 35.0
+
+    def setup(self, sim):
+        sensors = [sim.getSensor("breaksensors", "sensor" + str(x)) for x in range(1, 6)]
+        self.indexer = SimIndexer(sensors, sim.getMotor("loader", "loaderMotor"),
+                                  sim.getMotor("shooter", "shooterMotor"))
+        self.pendingBalls = list(self.ballTimes)
+        self.inventory = None
+
+    def onStep(self, sim, mode, tm):
+        if mode != "teleop":
+            return
+        sim.mech.setButton(Button.kY, self.hold(tm, 1.0, 1.2))
+        if self.pendingBalls and tm >= self.pendingBalls[0]:
+            self.pendingBalls.pop(0)
+            self.indexer.addBall()
+        if self.inventory is None and tm >= self.inventoryTime:
+            self.inventory = (sim.robot.indexer.getBallCount(), len(self.indexer.balls))
+        sim.mech.setAxis(Axis.kRightTrigger, 1.0 if self.hold(tm, 2.0, 9.0) else 0.0)
+
+        driving = self.hold(tm, 20.0, 30.0)
+        sim.drive.setAxis(Axis.kLeftY, -0.8 if driving else 0.0)
+        sim.drive.setAxis(Axis.kRightY, -0.8 if driving else 0.0)
+        sim.drive.setButton(Button.kBumperLeft, self.hold(tm, 25.0, 30.0))
+
+        sim.mech.setButton(Button.kA, self.hold(tm, 40.0, 46.0))
+        sim.mech.setButton(Button.kBumperRight, self.hold(tm, 120.0, 122.0))
+        sim.mech.setPOV(0 if self.hold(tm, 125.0, 130.0) else -1)
+
+    def check(self, sim):
+        failures = AutonomousScenario().check(sim)
+        loads = sim.transitionCount("LoaderLogic", "checkForBall", "loadBall")
+        if loads < len(self.ballTimes):
+            failures.append(f"loaded {loads} of {len(self.ballTimes)} balls")
+        if self.inventory is None or self.inventory != (len(self.ballTimes), len(self.ballTimes)):
+            failures.append(f"indexer counted and loader held {self.inventory} balls, wanted {len(self.ballTimes)}")
+        if len(self.indexer.shots) != len(self.ballTimes):
+            failures.append(f"fired {len(self.indexer.shots)} of {len(self.ballTimes)} balls")
+        if sim.getMotor("loader", "intakeMotor").maxOutput == 0:
+            failures.append("intake never ran")
+        if sim.transitionCount("ShooterLogic", "alignToTarget", "runShooter") < 2:
+            failures.append("shooter was not used in teleop")
+        if sim.robot.driveTrain.creeperMode:
+            failures.append("creeper mode stuck on after bumper release")
+        if sim.getMotor("loader", "elevatorMotor").maxOutput == 0:
+            failures.append("elevator never ran")
+        if sim.getMotor("winch", "winchMotor").maxOutput == 0:
+            failures.append("winch never ran")
+        return failures
+
+class DriveScenario(Scenario):
+    name = "drive"
+    description = "Tank drive with both sticks on any robot"
+    modes = [("teleop", 5.0)]
+
+    def onStep(self, sim, mode, tm):
+        sim.drive.setAxis(Axis.kLeftY, -0.5 if self.hold(tm, 1.0, 3.0) else 0.0)
+        sim.drive.setAxis(Axis.kRightY, 0.5 if self.hold(tm, 1.0, 3.0) else 0.0)
+
+    def check(self, sim):
+        return checkDriveMoved(sim)
+
+class VisionShotScenario(Scenario):
+    name = "visionShot"
+    description = "Recorded limelight data: hold A to turn to the goal and shoot at the speed for its range"
+    compatibility = ["doof"]
+    modes = [("teleop", 8.0)]
+
+    # the recording is 4.2m from the goal
+    distance = 4.2
+
+    def setup(self, sim):
+        self.limelight = SimLimelight(loadRecording("limelightAlign"))
+        self.turned = False
+        self.errorAtShot = None
+
+    def onStep(self, sim, mode, tm):
+        self.limelight.play(tm)
+        sim.mech.setButton(Button.kA, self.hold(tm, 1.0, 6.0))
+        shooter = sim.robot.shooter
+        if sim.robot.driveTrain.arcadeRotation > 0:
+            self.turned = True
+        if shooter.current_state == "runShooter" and self.errorAtShot is None:
+            self.errorAtShot = sim.robot.vision.getHeadingError()
+
+    def check(self, sim):
+        failures = []
+        vision = sim.robot.vision
+        if not sim.sawTransition("ShooterLogic", "alignToTarget", "runShooter"):
+            failures.append("shooter never finished aligning")
+        if not self.turned:
+            failures.append("drive train never turned toward the target")
+        if self.errorAtShot is None or abs(self.errorAtShot) > vision.alignTolerance:
+            failures.append(f"started shooting {self.errorAtShot} degrees off target")
+        if abs(vision.distance - self.distance) > 0.1:
+            failures.append(f"range {vision.distance:.2f}m, recording is {self.distance}m")
+        expected = sim.robot.shotTable.getSpeed(self.distance)
+        commanded = sim.robot.shooterMotors.shooterSpeed
+        if abs(commanded - expected) > 50:
+            failures.append(f"flywheel commanded {commanded:.0f} rpm, {expected:.0f} expected at {self.distance}m")
+        return failures
+
+class RapidFireScenario(Scenario):
+    name = "rapidFire"
+    description = "Three balls in the loader: hold A and the feed pipeline fires each one as the flywheel recovers"
+    compatibility = ["doof"]
+    modes = [("teleop", 8.0)]
+
+    preloaded = (0.0, 0.18, 0.36)
+    # the shots have to be this quick after the first one
+    maxSpread = 2.0
+
+    def setup(self, sim):
+        sensors = [sim.getSensor("breaksensors", "sensor" + str(x)) for x in range(1, 6)]
+        self.indexer = SimIndexer(sensors, sim.getMotor("loader", "loaderMotor"),
+                                  sim.getMotor("shooter", "shooterMotor"), self.preloaded)
+
+    def onStep(self, sim, mode, tm):
+        sim.mech.setButton(Button.kA, self.hold(tm, 1.0, 7.0))
+
+    def check(self, sim):
+        failures = []
+        shooter = sim.robot.shooter
+        shots = self.indexer.shots
+        if len(shots) != len(self.preloaded):
+            failures.append(f"fired {len(shots)} of {len(self.preloaded)} balls")
+        target = shooter.teleShootingSpeed
+        for shotTime, velocity in shots:
+            if abs(velocity - target) > shooter.speedTolerance:
+                failures.append(f"ball released at {velocity:.0f} rpm, wanted {target} +- {shooter.speedTolerance}")
+        if len(shots) > 1 and shots[-1][0] - shots[0][0] > self.maxSpread:
+            rate = (len(shots) - 1) / (shots[-1][0] - shots[0][0])
+            failures.append(f"fired {rate:.2f} balls/s, too slow")
+        if sim.robot.feedPipeline.getShotCount() != len(shots):
+            failures.append(f"pipeline counted {sim.robot.feedPipeline.getShotCount()} shots, {len(shots)} fired")
+        return failures
+
+class LatencyScenario(Scenario):
+    name = "latency"
+    description = "Loops from a controller input to the first command of the motor it drives"
+    compatibility = ["doof"]
+    modes = [("teleop", 6.0)]
+
+    # name: (seconds into teleop, subsystem, motor)
+    probes = {"drive": (1.0, "driveTrain", "leftMotor"),
+              "elevator": (2.0, "loader", "elevatorMotor"),
+              "shooter": (3.0, "shooter", "shooterMotor")}
+    # loops of latency allowed, state machine transitions that have to wait a loop go here
+    allowedLoops = {"drive": 0, "elevator": 0, "shooter": 0}
+
+    def setup(self, sim):
+        self.tick = 0
+        self.inputTicks = {}
+        self.outputTicks = {}
+
+    def onStep(self, sim, mode, tm):
+        # outputs seen now were commanded in the previous loop
+        for name, (start, subsystem, motor) in self.probes.items():
+            if name in self.inputTicks and name not in self.outputTicks:
+                if sim.getMotor(subsystem, motor).maxOutput > 0:
+                    self.outputTicks[name] = self.tick - 1
+            if name not in self.inputTicks and tm >= start:
+                self.inputTicks[name] = self.tick
+
+        sim.drive.setAxis(Axis.kLeftY, -0.5 if self.hold(tm, 1.0, 1.5) else 0.0)
+        sim.mech.setButton(Button.kBumperRight, self.hold(tm, 2.0, 2.5))
+        sim.mech.setButton(Button.kA, self.hold(tm, 3.0, 5.0))
+        self.tick += 1
+
+    def getLatency(self, name):
+        if name not in self.outputTicks:
+            return None
+        return self.outputTicks[name] - self.inputTicks[name]
+
+    def check(self, sim):
+        failures = []
+        for name in self.probes:
+            latency = self.getLatency(name)
+            if latency is None:
+                failures.append(f"{name} motor never commanded")
+            elif latency > self.allowedLoops[name]:
+                failures.append(f"{name} took {latency} loops from input to motor, allowed {self.allowedLoops[name]}")
+        return failures
+
+    def metrics(self, sim):
+        return {name + "LatencyMs": round(self.getLatency(name) * sim.period * 1000)
+                for name in self.probes if self.getLatency(name) is not None}
+
+scenarios = {scenario.name: scenario for scenario in (AutonomousScenario, TeleopShootingScenario,
+                                                       MatchScenario, DriveScenario, VisionShotScenario,
+                                                       RapidFireScenario, LatencyScenario)}
@@ -0,0 +1,152 @@
+'''
+    Drives ButtonManager gestures from fake button bitmasks and a stepped
+    clock, with the Scheduler timing long-presses and double-taps.
+'''
+import logging
+
+import pytest
+
+import components.buttonManager
+import components.scheduler
+from components.buttonManager import ButtonManager, ButtonEvent
+from components.scheduler import Scheduler
+from simulation.devices import SimXboxController
+
+A, B, X, Y = 1, 2, 3, 4
+
+class Rig:
+    """A ButtonManager and Scheduler on one fake controller, stepped a loop at a time"""
+    period = .02
+
+    def __init__(self):
+        self.now = 0.0
+        self.calls = []
+        self.hid = SimXboxController(0)
+        self.scheduler = Scheduler()
+        self.scheduler.logger = logging.getLogger("scheduler")
+        self.scheduler.setup()
+        self.manager = ButtonManager()
+        self.manager.logger = logging.getLogger("buttonManager")
+        self.manager.scheduler = self.scheduler
+        self.manager.setup()
+
+    def getFPGATimestamp(self):
+        return self.now
+
+    def record(self, name):
+        def callback(action):
+            self.calls.append((name, action))
+        return callback
+
+    def run(self, seconds):
+        end = self.now + seconds - 1e-9
+        while self.now < end:
+            self.manager.execute()
+            self.scheduler.execute()
+            self.now += self.period
+
+    def press(self, *buttons):
+        for button in buttons:
+            self.hid.setButton(button, True)
+
+    def release(self, *buttons):
+        for button in buttons:
+            self.hid.setButton(button, False)
+
+    def names(self):
+        return [name for name, _ in self.calls]
+
+@pytest.fixture
+def rig(monkeypatch):
+    rig = Rig()
+    timer = type("Timer", (), {"getFPGATimestamp": staticmethod(rig.getFPGATimestamp)})
+    monkeypatch.setattr(components.buttonManager, "Timer", timer)
+    monkeypatch.setattr(components.scheduler, "Timer", timer)
+    monkeypatch.setattr(components.buttonManager, "readButtons", SimXboxController.getButtons)
+    rig.scheduler.on_enable()
+    return rig
+
+def registerSingles(rig, *buttons):
+    for button in buttons:
+        rig.manager.registerButtonEvent(rig.hid, button, ButtonEvent.kOnPress | ButtonEvent.kOnRelease, rig.record(button))
+
+def test_chordSuppressesItsButtons(rig):
+    registerSingles(rig, A, B)
+    rig.manager.registerChord(rig.hid, (A, B), ButtonEvent.kOnPress | ButtonEvent.kOnRelease, rig.record("A+B"))
+    rig.press(A)
+    rig.run(.02)
+    rig.press(B)
+    rig.run(.2)
+    rig.release(A)
+    rig.run(.1)
+    rig.release(B)
+    rig.run(.1)
+    assert rig.calls == [("A+B", ButtonEvent.kOnPress), ("A+B", ButtonEvent.kOnRelease)]
+
+def test_chordAfterWindowFiresSingles(rig):
+    registerSingles(rig, A, B)
+    rig.manager.registerChord(rig.hid, (A, B), ButtonEvent.kOnPress, rig.record("A+B"))
+    rig.press(A)
+    rig.run(rig.manager.chordWindow + .1)
+    rig.press(B)
+    rig.run(.2)
+    rig.release(A, B)
+    rig.run(.1)
+    assert rig.names() == [A, B, A, B]
+
+def test_pendingButtonDoesNotBlockAnotherChord(rig):
+    registerSingles(rig, A, X, Y)
+    rig.manager.registerChord(rig.hid, (A, B), ButtonEvent.kOnPress, rig.record("A+B"))
+    rig.manager.registerChord(rig.hid, (X, Y), ButtonEvent.kOnPress, rig.record("X+Y"))
+    rig.press(A)
+    rig.run(.02)
+    rig.press(X, Y)
+    rig.run(.2)
+    assert rig.names() == ["X+Y", A]
+
+def test_releaseCancelsLongPress(rig):
+    rig.manager.registerLongPress(rig.hid, A, .5, rig.record("long"))
+    rig.press(A)
+    rig.run(.3)
+    rig.release(A)
+    rig.run(1)
+    assert rig.calls == []
+
+    rig.press(A)
+    rig.run(.6)
+    assert rig.calls == [("long", ButtonEvent.kOnLongPress)]
+
+def test_doubleTapWindowExpires(rig):
+    rig.manager.registerButtonEvent(rig.hid, A, ButtonEvent.kOnDoubleTap, rig.record("double"))
+    for _ in range(2):
+        rig.press(A)
+        rig.run(.04)
+        rig.release(A)
+        rig.run(rig.manager.doubleTapWindow + .1)
+    assert rig.calls == []
+
+    rig.press(A)
+    rig.run(.04)
+    rig.release(A)
+    rig.run(.04)
+    rig.press(A)
+    rig.run(.04)
+    assert rig.calls == [("double", ButtonEvent.kOnDoubleTap)]
+
+def tap(rig, button):
+    rig.press(button)
+    rig.run(.04)
+    rig.release(button)
+    rig.run(.04)
+
+def test_sequenceResetsAfterTimeout(rig):
+    rig.manager.registerSequence(rig.hid, (X, Y, X), rig.record("sequence"))
+    tap(rig, X)
+    tap(rig, Y)
+    rig.run(rig.manager.sequenceTimeout + .1)
+    tap(rig, X)
+    assert rig.calls == []
+
+    tap(rig, Y)
+    tap(rig, X)
+    assert rig.calls == [("sequence", ButtonEvent.kOnSequence)]
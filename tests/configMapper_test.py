@@ -0,0 +1,91 @@
+'''
+    Checks ConfigMapper's extends merging, cycle detection and parse cache
+    against the small configs in tests/configFixtures.
+'''
+import os
+import shutil
+
+import pytest
+
+import utils.configMapper
+from utils.configMapper import ConfigMapper, ConfigIncludeError
+
+fixtureDir = os.path.join(os.path.dirname(__file__), "configFixtures")
+
+@pytest.fixture(autouse = True)
+def emptyCache(monkeypatch):
+    monkeypatch.setattr(utils.configMapper, "_parsed", {})
+    monkeypatch.setattr(utils.configMapper, "_resolved", {})
+
+def shooter(mapper):
+    """The shooter subsystem, which the mapper nests under its own name"""
+    return mapper.getSubsystem("shooter")["shooter"]
+
+def test_childOverridesParent():
+    mapper = ConfigMapper("child.yml", fixtureDir)
+    assert mapper.getSubsystem("/")["compatibility"] == ["child"]
+    assert shooter(mapper)["speed"] == 200
+    assert "extends" not in mapper.getSubsystem("/")
+
+def test_nestedMerge():
+    mapper = ConfigMapper("child.yml", fixtureDir)
+    motors = shooter(mapper)["motors"]
+    assert motors["flywheel"] == {"channel": 1, "type": "CANTalonFX", "inverted": True}
+    assert motors["loader"] == {"channel": 2, "type": "CANTalonSRX", "inverted": False}
+    assert motors["groups"] == ["motors"]
+    assert mapper.getSubsystems() == ["shooter"]
+
+    base = ConfigMapper("base.yml", fixtureDir)
+    assert shooter(base)["speed"] == 100
+    assert shooter(base)["motors"]["flywheel"]["inverted"] is False
+
+def test_extendsCycleRaises():
+    with pytest.raises(ConfigIncludeError, match = "cycleA.yml -> cycleB.yml -> cycleA.yml"):
+        ConfigMapper("cycleA.yml", fixtureDir)
+
+def test_changedFileIsReparsed(tmp_path):
+    for name in ("base.yml", "child.yml"):
+        shutil.copy(os.path.join(fixtureDir, name), tmp_path)
+    configDir = str(tmp_path)
+    basePath = configDir + os.path.sep + "base.yml"
+    childPath = configDir + os.path.sep + "child.yml"
+
+    assert shooter(ConfigMapper("child.yml", configDir))["motors"]["loader"]["channel"] == 2
+    parsed = utils.configMapper._parsed[basePath]
+    resolved = utils.configMapper._resolved[childPath]
+
+    # unchanged files come back from the cache
+    ConfigMapper("child.yml", configDir)
+    assert utils.configMapper._parsed[basePath] is parsed
+    assert utils.configMapper._resolved[childPath] is resolved
+
+    with open(basePath) as file:
+        text = file.read()
+    with open(basePath, "w") as file:
+        file.write(text.replace("channel: 2", "channel: 5"))
+    # make sure the mtime moves even on coarse clocks
+    mtime = parsed[0] + 1_000_000_000
+    os.utime(basePath, ns = (mtime, mtime))
+
+    mapper = ConfigMapper("child.yml", configDir)
+    assert shooter(mapper)["motors"]["loader"]["channel"] == 5
+    assert shooter(mapper)["speed"] == 200
+    assert utils.configMapper._parsed[basePath][0] == mtime
+    assert utils.configMapper._resolved[childPath] is not resolved
+    assert utils.configMapper._resolved[childPath][0][basePath] == mtime
+
+def test_groupDictIsNotMutatedAcrossCalls():
+    mapper = ConfigMapper("child.yml", fixtureDir)
+    first = mapper.getGroupDict("shooter", "motors")
+    assert set(first) == {"flywheel", "loader"}
+    first.pop("flywheel")
+    first["extra"] = {}
+
+    second = mapper.getGroupDict("shooter", "motors")
+    assert set(second) == {"flywheel", "loader"}
+    assert shooter(mapper)["motors"]["groups"] == ["motors"]
+    assert mapper.getGroupDict("shooter", "motors", "motors") == second
+
+    # a second mapper shares the parsed files and sees the same data
+    other = ConfigMapper("child.yml", fixtureDir)
+    assert other.getGroupDict("shooter", "motors") == second
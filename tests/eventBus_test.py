@@ -0,0 +1,118 @@
+'''
+    Checks which handlers EventBus.publish calls, and in what order, for
+    keyed and unkeyed subscriptions.
+'''
+import logging
+
+from utils.eventBus import EventBus, BallEntered, ShooterAtSpeed, StateChanged
+
+class Recorder:
+    """Handlers that append (name, event) to calls"""
+    def __init__(self):
+        self.calls = []
+
+    def handler(self, name):
+        def handle(event):
+            self.calls.append((name, event))
+        return handle
+
+    def names(self):
+        return [name for name, _ in self.calls]
+
+def test_unkeyedHandlersGetEveryEventOfTheirTopic():
+    bus = EventBus()
+    recorder = Recorder()
+    bus.subscribe(BallEntered, recorder.handler("ball"))
+    bus.subscribe(ShooterAtSpeed, recorder.handler("speed"))
+
+    entered = BallEntered()
+    bus.publish(entered)
+    bus.publish(ShooterAtSpeed(True))
+    bus.publish(ShooterAtSpeed(False))
+    assert recorder.names() == ["ball", "speed", "speed"]
+    assert recorder.calls[0][1] is entered
+    assert [event.atSpeed for _, event in recorder.calls[1:]] == [True, False]
+
+def test_stateChangedIsKeyedByMachineAndNewState():
+    bus = EventBus()
+    recorder = Recorder()
+    bus.subscribe(StateChanged, recorder.handler("firing"), key = ("ShooterLogic", "firing"))
+    bus.subscribe(StateChanged, recorder.handler("any"))
+
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    bus.publish(StateChanged("ShooterLogic", "firing", "idling"))
+    bus.publish(StateChanged("LoaderLogic", "idling", "firing"))
+    assert recorder.names() == ["any", "firing", "any", "any"]
+    assert recorder.calls[1][1].old == "idling"
+
+def test_handlersRunInSubscribeOrder():
+    bus = EventBus()
+    recorder = Recorder()
+    key = ("ShooterLogic", "firing")
+    bus.subscribe(StateChanged, recorder.handler("keyed 1"), key = key)
+    bus.subscribe(StateChanged, recorder.handler("unkeyed 1"))
+    bus.subscribe(StateChanged, recorder.handler("keyed 2"), key = key)
+    bus.subscribe(StateChanged, recorder.handler("unkeyed 2"))
+
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    # every unkeyed handler runs before the keyed ones
+    assert recorder.names() == ["unkeyed 1", "unkeyed 2", "keyed 1", "keyed 2"]
+
+def test_unsubscribe():
+    bus = EventBus()
+    recorder = Recorder()
+    ball = recorder.handler("ball")
+    firing = recorder.handler("firing")
+    bus.subscribe(BallEntered, ball)
+    bus.subscribe(StateChanged, firing, key = ("ShooterLogic", "firing"))
+
+    # the key has to match to unsubscribe
+    bus.unsubscribe(StateChanged, firing)
+    bus.unsubscribe(BallEntered, ball)
+    bus.publish(BallEntered())
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    assert recorder.names() == ["firing"]
+
+    bus.unsubscribe(StateChanged, firing, key = ("ShooterLogic", "firing"))
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    assert recorder.names() == ["firing"]
+    assert bus.handlers == {}
+
+def test_unsubscribeDuringPublishTakesEffectNextPublish():
+    bus = EventBus()
+    recorder = Recorder()
+    key = ("ShooterLogic", "firing")
+    later = recorder.handler("later")
+    keyed = recorder.handler("keyed")
+
+    def unsubscribeOthers(event):
+        recorder.calls.append(("first", event))
+        bus.unsubscribe(StateChanged, later)
+        bus.unsubscribe(StateChanged, keyed, key = key)
+        bus.subscribe(StateChanged, recorder.handler("added"))
+
+    bus.subscribe(StateChanged, unsubscribeOthers)
+    bus.subscribe(StateChanged, later)
+    bus.subscribe(StateChanged, keyed, key = key)
+
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    assert recorder.names() == ["first", "later", "keyed"]
+
+    recorder.calls.clear()
+    bus.unsubscribe(StateChanged, unsubscribeOthers)
+    bus.publish(StateChanged("ShooterLogic", "idling", "firing"))
+    assert recorder.names() == ["added"]
+
+def test_crashingHandlerDoesNotStopTheRest(caplog):
+    bus = EventBus()
+    recorder = Recorder()
+
+    def crash(event):
+        raise RuntimeError("broken handler")
+
+    bus.subscribe(BallEntered, crash)
+    bus.subscribe(BallEntered, recorder.handler("after"))
+    with caplog.at_level(logging.ERROR, logger = "eventBus"):
+        bus.publish(BallEntered())
+    assert recorder.names() == ["after"]
+    assert "BallEntered" in caplog.text
@@ -0,0 +1,109 @@
+'''
+    Checks DoubleBuffer never hands the reader a half written set of values
+    and JitterStats reports the percentiles and worst case it was fed.
+'''
+import sys
+import threading
+
+import pytest
+
+from utils.fastLoop import DoubleBuffer, JitterStats
+
+class SlowSlot(dict):
+    """
+    Slot that dict() copies key by key through __getitem__, since __iter__
+    is overridden, so another thread can run part way through the copy
+    """
+    def __iter__(self):
+        return super().__iter__()
+
+    def __getitem__(self, key):
+        return super().__getitem__(key)
+
+class RacingSlot(SlowSlot):
+    """Slot that runs onRead part way through being copied, like a writer thread would"""
+    onRead = None
+
+    def __getitem__(self, key):
+        if key == "b" and self.onRead is not None:
+            onRead, self.onRead = self.onRead, None
+            onRead()
+        return super().__getitem__(key)
+
+def test_readRetriesWhenWriterLapsIt():
+    buffer = DoubleBuffer(a = 0, b = 0)
+    buffer.slots = [RacingSlot(slot) for slot in buffer.slots]
+
+    def writeTwice():
+        # the second write lands in the slot being copied
+        buffer.write(a = 1, b = 1)
+        buffer.write(a = 2, b = 2)
+
+    buffer.slots[0].onRead = writeTwice
+    assert buffer.read() == {"a": 2, "b": 2}
+
+def test_readAfterOneWrite():
+    buffer = DoubleBuffer(a = 0, b = 0)
+    buffer.slots = [RacingSlot(slot) for slot in buffer.slots]
+    buffer.slots[0].onRead = lambda: buffer.write(a = 1)
+    # the write went into the other slot, but sequence moved so read copies again
+    assert buffer.read() == {"a": 1, "b": 0}
+    assert buffer.sequence == 1
+
+def test_threadedReadsAreNeverTorn():
+    writes = 50000
+    buffer = DoubleBuffer(a = 0, b = 0, c = 0)
+    buffer.slots = [SlowSlot(slot) for slot in buffer.slots]
+    done = threading.Event()
+    torn = []
+    reads = 0
+
+    def writer():
+        for i in range(1, writes + 1):
+            buffer.write(a = i, b = i, c = i)
+        done.set()
+
+    switchInterval = sys.getswitchinterval()
+    # switch threads as often as possible so reads and writes interleave
+    sys.setswitchinterval(1e-6)
+    try:
+        thread = threading.Thread(target = writer)
+        thread.start()
+        last = 0
+        while not done.is_set():
+            values = buffer.read()
+            reads += 1
+            if not values["a"] == values["b"] == values["c"] or values["a"] < last:
+                torn.append(values)
+            last = values["a"]
+        thread.join()
+    finally:
+        sys.setswitchinterval(switchInterval)
+
+    assert torn == []
+    assert reads > 0
+    assert buffer.read() == {"a": writes, "b": writes, "c": writes}
+
+def test_jitterPercentilesAndWorst():
+    stats = JitterStats()
+    assert stats.getPercentile(99) == 0.0
+    # 0.05 ms to 9.95 ms, one loop per bucket, half of them early
+    for i in range(100):
+        stats.add((i + .5) * stats.bucketWidth * (1 if i % 2 else -1))
+    stats.add(-.05)
+
+    assert stats.count == 101
+    assert stats.worst == pytest.approx(.05)
+    assert stats.getPercentile(50) == pytest.approx(51 * stats.bucketWidth)
+    assert stats.getPercentile(99) == pytest.approx(100 * stats.bucketWidth)
+    # past the last bucket only worst is known
+    assert stats.getPercentile(100) == pytest.approx(.05)
+    mean, stdDev, p99, worst = stats.summary()
+    assert p99 == pytest.approx(10)
+    assert worst == pytest.approx(50)
+    assert stdDev > 0
+
+    stats.reset()
+    stats.add(.00012)
+    assert stats.getPercentile(50) == pytest.approx(.00012)
+    assert stats.summary() == [.12, 0.0, .12, .12]
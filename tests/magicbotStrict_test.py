@@ -0,0 +1,66 @@
+'''
+    Checks the transition table StrictStateMachine compiles against the
+    state_transitions lists it was compiled from.
+'''
+import pytest
+
+from utils.magicbotStrict import StrictStateMachine, InvalidStateTable, state, timed_state
+from components.shooterLogic import ShooterLogic
+from components.loaderLogic import LoaderLogic
+
+def test_unknownTargetRaises():
+    with pytest.raises(InvalidStateTable):
+        class Broken(StrictStateMachine):
+            @state(first = True, state_transitions = ["nowhere"])
+            def start(self):
+                pass
+
+def test_orphanIsUnreachable():
+    class Orphaned(StrictStateMachine):
+        @state(first = True, state_transitions = ["running"])
+        def start(self):
+            pass
+
+        @state(state_transitions = ["start"])
+        def running(self):
+            pass
+
+        @state(state_transitions = ["start"])
+        def orphan(self):
+            pass
+
+    assert Orphaned.unreachableStates == ["orphan"]
+    assert '"orphan" [color=gray];' in Orphaned.toDot()
+
+def test_timedStateCanExpire():
+    class Timed(StrictStateMachine):
+        @state(first = True, state_transitions = ["waiting"])
+        def start(self):
+            pass
+
+        @timed_state(duration = 1, next_state = "start", state_transitions = ["waiting"])
+        def waiting(self):
+            pass
+
+    assert Timed.unreachableStates == []
+    machine = Timed()
+    machine._currentIndex = Timed._stateIndex["waiting"]
+    assert machine.valid_change("start")
+
+def stateTransitionsAllow(cls, current, target):
+    """
+    The check valid_change made before the table was compiled, straight
+    from the state's state_transitions list
+    """
+    transitions = getattr(cls, current).state_transitions
+    return target in transitions or len(transitions) == 0 or "any" in transitions or target == current
+
+@pytest.mark.parametrize("cls", [ShooterLogic, LoaderLogic])
+def test_validChangeMatchesStateTransitions(cls):
+    machine = cls()
+    for current in cls._stateNames:
+        machine._currentIndex = cls._stateIndex[current]
+        for target in cls._stateNames:
+            assert machine.valid_change(target) == stateTransitionsAllow(cls, current, target), f"{current} -> {target}"
+    machine._currentIndex = -1
+    assert all(machine.valid_change(target) for target in cls._stateNames)
@@ -0,0 +1,80 @@
+'''
+    Checks utils.timerWheel against brute force bookkeeping of when every
+    timer should come due.
+'''
+import random
+
+import pytest
+
+from utils.timerWheel import TimerWheel
+
+def runUntil(wheel, tick):
+    """Steps wheel up to tick, returns {args[0]: tick it came due}"""
+    fired = {}
+    while wheel.now < tick:
+        for handle in wheel.step():
+            fired[handle.args[0]] = wheel.now
+    return fired
+
+def test_randomTimersComeDueOnTheirTick():
+    # small wheels so timers cascade through every level
+    random.seed(1)
+    wheel = TimerWheel(slotBits = 3, levels = 4)
+    expected = {}
+    handles = []
+    for i in range(3000):
+        due = random.randint(0, 4000)
+        handles.append(wheel.insert(due, None, (i,)))
+        expected[i] = max(due, 1)
+    for handle in random.sample(handles, 500):
+        handle.cancel()
+        expected.pop(handle.args[0])
+
+    fired = runUntil(wheel, 1000)
+    for i in range(3000, 3200):
+        due = wheel.now + random.randint(0, 3000)
+        wheel.insert(due, None, (i,))
+        expected[i] = max(due, wheel.now + 1)
+    fired.update(runUntil(wheel, 4100))
+
+    assert fired == expected
+    assert wheel.getPendingCount() == 0
+
+def test_dueOrderIsInsertOrder():
+    wheel = TimerWheel()
+    for i in range(10):
+        wheel.insert(70, None, (i,))
+    handles = []
+    while not handles:
+        handles = wheel.step()
+    assert [handle.args[0] for handle in handles] == list(range(10))
+
+def test_rescheduleSkipsMissedPeriods():
+    wheel = TimerWheel()
+    handle = wheel.insert(5, None, (0,), period = 5)
+    runUntil(wheel, 17)
+    assert not handle.isPending()
+    wheel.reschedule(handle)
+    assert handle.due == 20
+    assert runUntil(wheel, 20) == {0: 20}
+
+def test_cancelledHandleIsNotPending():
+    wheel = TimerWheel()
+    handle = wheel.insert(3, None, (0,))
+    assert handle.isPending()
+    handle.cancel()
+    handle.cancel()
+    assert not handle.isPending()
+    assert runUntil(wheel, 10) == {}
+
+def test_clearCancelsEverything():
+    wheel = TimerWheel()
+    handles = [wheel.insert(i * 100, None, (i,)) for i in range(20)]
+    wheel.clear()
+    assert wheel.getPendingCount() == 0
+    assert all(handle.cancelled for handle in handles)
+
+def test_pastSpanRaises():
+    wheel = TimerWheel(slotBits = 2, levels = 2)
+    with pytest.raises(ValueError):
+        wheel.insert(wheel.getSpan() + 1, None)
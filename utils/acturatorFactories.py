@@ -2,41 +2,33 @@
 Contains helpers to create various acturators
 """
 
-import logging
-
 import wpilib
 
+def createCompressor(descp, devices):
+    return wpilib.Compressor()
+
+
+def _getPcm(descp):
+    pcm = 0
+    if pcm in descp:
+        pcm = descp["pcm"]
+    return pcm
+
+
+def createSolenoid(descp, devices):
+    return wpilib.Solenoid(_getPcm(descp), descp["channel"])
+
+
+def createDoubleSolenoid(descp, devices):
+    solenoid = wpilib.DoubleSolenoid(_getPcm(descp), descp["channel"]["forward"], descp["channel"]["reverse"])
+    if "default" in descp:
+        value = {"kOff":0, "kForward":1, "kReverse":2}[descp["default"]]
+        solenoid.set(wpilib.DoubleSolenoid.Value(value))
+    return solenoid
+
 
-def compressorFactory(descp):
-    """
-    Creates compressor objects from descp.
-    """
-    try:
-        if descp["type"] == "compressor":
-            return wpilib.Compressor()
-    except Exception as e:
-        logging.error("Failed to create compressor for %s err %s", descp, e)
-    return None
-
-
-def solenoidFactory(descp):
-    """
-    Creates single and double solenoids devices from descp
-    """
-    try:
-        pcm = 0
-        if pcm in descp:
-            pcm = descp["pcm"]
-        if descp["type"] == "solenoid":
-            return wpilib.Solenoid(pcm, descp["channel"])
-        if descp["type"] == "doubleSolenoid":
-            solenoid = wpilib.DoubleSolenoid(pcm, descp["channel"]["forward"], descp["channel"]["reverse"])
-            if "default" in descp:
-                value = {"kOff":0, "kForward":1, "kReverse":2}[descp["default"]]
-                solenoid.set(wpilib.DoubleSolenoid.Value(value))
-            return solenoid
-    except Exception as e:
-        logging.error("Failed to create solenoid %s. Err %s", descp, e)
-    
-    return None
-        
\ No newline at end of file
+def createAddressableLED(descp, devices):
+    leds = wpilib.AddressableLED(descp["channel"])
+    leds.setLength(descp["length"])
+    leds.start()
+    return leds
@@ -0,0 +1,138 @@
+"""
+Measures what the robot loop allocates per tick, per component and per source line
+"""
+import collections
+import os
+import tracemalloc
+
+repoRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.path.sep
+
+class CallStats:
+    """
+    Totals for one measured call over every tick it was measured
+    """
+    def __init__(self):
+        self.calls = 0
+        self.peakBytes = 0
+        self.blocks = 0
+        self.bytes = 0
+        # "file:line": [blocks, bytes]
+        self.lines = collections.defaultdict(lambda: [0, 0])
+
+class AllocProfiler:
+    """
+    Diagnostic mode that wraps every component's execute, plus the robot's
+    teleopPeriodic and feedback update. tracemalloc's traces are cleared
+    before each call, so the snapshot taken after it holds exactly what the
+    call allocated and hadn't freed yet.
+
+    Two numbers are kept per call. Blocks and bytes are what the call
+    allocated that was still alive when it returned, grouped by the
+    innermost line of robot code on the allocating stack, so an allocation
+    inside enum or logging is charged to the line that called it. A new
+    object replacing an old one counts even though memory use didn't grow.
+    Peak is the most memory the call had allocated at once, so it also
+    catches temporaries freed before the call returned. A hot path that
+    allocates nothing has both at zero.
+
+    The first warmup ticks are skipped so caches filling up aren't counted,
+    then ticks ticks are measured. The wrappers are instance attributes, so
+    uninstall() leaves the classes untouched. Tracing slows the loop by
+    orders of magnitude, don't leave it on in a match.
+    """
+    robotCalls = ("teleopPeriodic", "_update_feedback")
+    # threads running alongside the loop, their allocations aren't the loop's
+    ignoredFiles = ("*/utils/overrunSampler.py",)
+
+    def __init__(self, ticks = 200, warmup = 50, frames = 16):
+        self.ticks = ticks
+        self.warmup = warmup
+        self.frames = frames
+        self.tickCount = 0
+        self.calledThisTick = False
+        self.depth = 0
+        self.stats = collections.defaultdict(CallStats)
+        self.wrapped = []
+
+    def isMeasuring(self):
+        return self.warmup <= self.tickCount < self.warmup + self.ticks
+
+    def install(self, robot):
+        """
+        Starts tracing and wraps the calls robot makes every loop
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        for name, component in robot._components:
+            self.wrap(component, "execute", name)
+        for call in self.robotCalls:
+            self.wrap(robot, call, "robot." + call.lstrip("_"))
+
+    def uninstall(self):
+        for obj, attribute in self.wrapped:
+            del obj.__dict__[attribute]
+        self.wrapped = []
+        tracemalloc.stop()
+
+    def wrap(self, obj, attribute, name):
+        method = getattr(obj, attribute)
+        def measured(*args, **kwargs):
+            self.calledThisTick = True
+            # next_state_now runs execute again inside execute, that's part of the outer call
+            if self.depth or not self.isMeasuring():
+                return method(*args, **kwargs)
+            tracemalloc.clear_traces()
+            self.depth += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                peak = tracemalloc.get_traced_memory()[1]
+                self.record(name, tracemalloc.take_snapshot(), peak)
+        setattr(obj, attribute, measured)
+        self.wrapped.append((obj, attribute))
+
+    def record(self, name, snapshot, peakBytes):
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.peakBytes += peakBytes
+        # the profiler's own bookkeeping happens in this file
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, __file__)] +
+                                          [tracemalloc.Filter(False, pattern, all_frames = True)
+                                           for pattern in self.ignoredFiles])
+        for trace in snapshot.traces:
+            stats.blocks += 1
+            stats.bytes += trace.size
+            line = stats.lines[self.chargedLine(trace.traceback)]
+            line[0] += 1
+            line[1] += trace.size
+
+    def chargedLine(self, traceback):
+        """The innermost robot code frame of traceback as file:line."""
+        for frame in reversed(traceback):
+            if frame.filename.startswith(repoRoot) and frame.filename != __file__:
+                return f"{frame.filename[len(repoRoot):]}:{frame.lineno}"
+        return "<outside robot code>"
+
+    def tick(self):
+        """
+        Call once at the end of every loop iteration. Only loops that ran a
+        wrapped call count, so disabled time doesn't use up the ticks.
+        """
+        if self.calledThisTick:
+            self.tickCount += 1
+        self.calledThisTick = False
+
+    def report(self, linesPerCall = 5):
+        """
+        Returns the per tick averages as text, worst calls first
+        """
+        rows = []
+        for name, stats in sorted(self.stats.items(), key = lambda item: -item[1].peakBytes / item[1].calls):
+            calls = stats.calls
+            rows.append(f"{name}: {stats.blocks / calls:.2f} blocks, {stats.bytes / calls:.0f} bytes kept, "
+                        f"{stats.peakBytes / calls:.0f} bytes peak per tick over {calls} ticks")
+            lines = sorted(stats.lines.items(), key = lambda item: -item[1][1])
+            for line, (blocks, size) in lines[:linesPerCall]:
+                rows.append(f"    {line}: {blocks / calls:.2f} blocks, {size / calls:.0f} bytes")
+        return "\n".join(rows)
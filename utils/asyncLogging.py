@@ -0,0 +1,171 @@
+"""
+Moves log formatting and output off of the robot loop thread
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+from pathlib import Path
+
+_pipeline = None
+
+def defaultLogDir():
+    """
+    Directory logs and other match dumps are written to
+    """
+    return str(Path.home()) + os.path.sep + "logs"
+
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    """
+    Handler used by the loop thread. It only merges the message with its args
+    and puts the record on the queue. If the queue is full the record is
+    dropped and counted instead of blocking the loop.
+    """
+    def __init__(self, logQueue):
+        super().__init__(logQueue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Merges args into msg so the record can't change under the worker.
+        Timestamps, levels and tracebacks are formatted on the worker.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class DuplicateFilter(logging.Filter):
+    """
+    Suppresses repeats of the same message inside interval seconds. The next
+    message let through is tagged with how many repeats were hidden.
+    """
+    def __init__(self, interval, maxTracked = 1000):
+        super().__init__()
+        self.interval = interval
+        self.maxTracked = maxTracked
+        self.lastSeen = {}
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        entry = self.lastSeen.get(key)
+        if entry is not None and record.created - entry[0] < self.interval:
+            entry[1] += 1
+            return False
+
+        if entry is not None and entry[1] > 0:
+            record.msg = f"{record.msg} (repeated {entry[1]} times)"
+        if len(self.lastSeen) >= self.maxTracked:
+            self.lastSeen.clear()
+        self.lastSeen[key] = [record.created, 0]
+        return True
+
+class RateLimitedListener(logging.handlers.QueueListener):
+    """
+    Worker side of the pipeline. Rate limits duplicates, writes to the real
+    handlers and reports records the loop thread had to drop.
+    """
+    def __init__(self, logQueue, queueHandler, handlers, duplicateInterval):
+        super().__init__(logQueue, *handlers, respect_handler_level=True)
+        self.queueHandler = queueHandler
+        self.duplicateFilter = DuplicateFilter(duplicateInterval)
+        self.reportedDrops = 0
+
+    def handle(self, record):
+        dropped = self.queueHandler.dropped
+        if dropped != self.reportedDrops:
+            warning = logging.makeLogRecord({"name": __name__, "levelno": logging.WARNING,
+                                             "levelname": "WARNING",
+                                             "msg": f"Dropped {dropped - self.reportedDrops} log records, queue full"})
+            self.reportedDrops = dropped
+            super().handle(warning)
+
+        if self.duplicateFilter.filter(record):
+            super().handle(record)
+
+    def enqueue_sentinel(self):
+        # block instead of failing when the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+class AsyncLogPipeline:
+    """
+    Handle returned by startAsyncLogging
+    """
+    def __init__(self, queueHandler, listener, oldHandlers):
+        self.queueHandler = queueHandler
+        self.listener = listener
+        self.oldHandlers = oldHandlers
+        self.running = True
+
+    def getDroppedCount(self):
+        """
+        Returns the number of records dropped because the queue was full
+        """
+        return self.queueHandler.dropped
+
+    def stop(self):
+        """
+        Flushes the queue and puts the original handlers back on the root logger
+        """
+        global _pipeline
+        if not self.running:
+            return
+        self.running = False
+        root = logging.getLogger()
+        root.removeHandler(self.queueHandler)
+        self.listener.stop()
+        for handler in self.oldHandlers:
+            root.addHandler(handler)
+        _pipeline = None
+
+def startAsyncLogging(logDir = None, queueSize = 1000, duplicateInterval = 1.0,
+                      maxBytes = 1000000, backupCount = 5):
+    """
+    Replaces the root logger handlers with a queue. Whatever handlers the root
+    had (normally the console) plus a rotating file in logDir are run on a
+    worker thread. Calling it again returns the running pipeline.
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+
+    if logDir is None:
+        logDir = defaultLogDir()
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    root = logging.getLogger()
+    oldHandlers = root.handlers[:]
+    handlers = oldHandlers[:]
+    if not handlers:
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        handlers.append(console)
+
+    try:
+        os.makedirs(logDir, exist_ok = True)
+        fileHandler = logging.handlers.RotatingFileHandler(logDir + os.path.sep + "robot.log",
+                                                           maxBytes = maxBytes, backupCount = backupCount)
+        fileHandler.setFormatter(formatter)
+        handlers.append(fileHandler)
+    except OSError as e:
+        logging.error("Could not open log file in %s. Err %s", logDir, e)
+
+    logQueue = queue.Queue(queueSize)
+    queueHandler = LoopQueueHandler(logQueue)
+    listener = RateLimitedListener(logQueue, queueHandler, handlers, duplicateInterval)
+
+    for handler in oldHandlers:
+        root.removeHandler(handler)
+    root.addHandler(queueHandler)
+    listener.start()
+
+    _pipeline = AsyncLogPipeline(queueHandler, listener, oldHandlers)
+    atexit.register(_pipeline.stop)
+    return _pipeline
@@ -0,0 +1,83 @@
+"""
+Orders magicbot components so a request reaches the hardware in the loop it was made
+"""
+import logging
+import typing
+
+log = logging.getLogger("componentOrder")
+
+def isSource(component):
+    """
+    Sources set isSource = True. Their execute reads hardware or input that
+    the components injecting them act on, so they run before those.
+    """
+    return getattr(type(component), "isSource", False)
+
+def dependencyGraph(components):
+    """
+    Returns {name: set of component names that must execute after it} for
+    the (name, component) pairs MagicRobot created, inferred from injection.
+
+    A component that injects another makes requests of it, so it runs
+    first and the injected one acts on them in the same loop. A source is
+    the other way around.
+    """
+    names = {id(component): name for name, component in components}
+    after = {name: set() for name, _ in components}
+    for name, component in components:
+        for attribute in typing.get_type_hints(type(component)):
+            if attribute.startswith("_"):
+                continue
+            injected = getattr(component, attribute, None)
+            other = names.get(id(injected))
+            if other is None or other == name:
+                continue
+            if isSource(injected):
+                after[other].add(name)
+            else:
+                after[name].add(other)
+    return after
+
+def sortComponents(components):
+    """
+    Returns the components topologically sorted by dependencyGraph, and the
+    graph. Components that could go in either order keep sources first,
+    then declaration order. Components in a cycle are logged and left in
+    declaration order after the rest.
+    """
+    after = dependencyGraph(components)
+    index = {name: i for i, (name, _) in enumerate(components)}
+    byName = dict(components)
+    waitingOn = {name: 0 for name in after}
+    for successors in after.values():
+        for name in successors:
+            waitingOn[name] += 1
+
+    def priority(name):
+        return (not isSource(byName[name]), index[name])
+
+    ready = sorted((name for name, count in waitingOn.items() if count == 0), key = priority)
+    ordered = []
+    while ready:
+        name = ready.pop(0)
+        ordered.append(name)
+        for successor in after[name]:
+            waitingOn[successor] -= 1
+            if waitingOn[successor] == 0:
+                ready.append(successor)
+        ready.sort(key = priority)
+
+    if len(ordered) < len(components):
+        cycle = [name for name, _ in components if name not in ordered]
+        log.error("Components %s depend on each other in a cycle. Running them in declaration order", cycle)
+        ordered += cycle
+    return [(name, byName[name]) for name in ordered], after
+
+def logOrder(components, after):
+    """
+    Reports the execution order and what each component has to run before
+    """
+    log.info("Component execution order: %s", ", ".join(name for name, _ in components))
+    for name, _ in components:
+        if after[name]:
+            log.info("  %s runs before %s", name, ", ".join(sorted(after[name])))
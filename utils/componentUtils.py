@@ -2,16 +2,17 @@
 File to hold misc component helper commands
 """
 
-import components
+from magicbot.magic_tunable import setup_tunables
+import logging
 import typing
 
 def testComponentCompatibility(robot, component_type):
     """
     takes a robot and a component_type to check
-    If the component is not compatibile with the robot type, it will attempt to create basic bindings and
-    disable the on_enable and execute() methods of the compeont.
+    If the component is not compatibile with the robot type, it is created on the robot
+    ahead of MagicRobot so MagicRobot never sets it up, enables or executes it.
+    Call from createObjects, then injectDisabledComponents once the components are created.
     """
-    # Iterate over variables with type annotations
     if not hasattr(component_type, "compatString"):
         robot.logger.warn("%s has no compatString set. Assuming compatible", component_type)
         return
@@ -19,35 +20,62 @@ def testComponentCompatibility(robot, component_type):
     if robot.map.configMapper.checkCompatibilty(component_type.compatString):
         return
 
+    names = [n for n, ctyp in typing.get_type_hints(type(robot)).items() if ctyp is component_type and not n.startswith("_")]
+    if not names:
+        robot.logger.warn("%s is not compatible and not a component of %s", component_type, type(robot).__name__)
+        return
+
     robot.logger.warn("%s is not compatible. Disabling", component_type)
 
-    for n, inject_type in typing.get_type_hints(component_type).items():
-        # If the variable is private ignore it
-        if n.startswith("_"):
-            continue
-        # If the variable has been set, skip it
-        if hasattr(component_type, n):
-            continue
-
-        # Check for generic types from the typing module
-        origin = getattr(inject_type, "__origin__", None)
-        if origin is not None:
-            inject_type = origin
-
-        # If the type is not actually a type, give a meaningful error
-        if not isinstance(inject_type, type):
-            raise TypeError(
-                "Component %s has a non-type annotation on %s (%r); lone non-injection variable annotations are disallowed, did you want to assign a static variable?"
-                % (inject_type, n, inject_type)
-            )
-        
-        if not hasattr(robot, n):
-            #Create any injectables we need
-            robot.logger.info("Creating variable %s for robot", n)
-            setattr(robot, n, inject_type())
-
-    #First pass this will not always work can expand to make better
-    #This will let the component not use the real ones.
-    component_type.execute = components.dummyFunc
-    component_type.on_enable = components.dummyFunc
-    component_type.setup = components.dummyFunc
+    # MagicRobot skips annotations that are already set, so this instance stays out of
+    # its component list. It is still there for robot code that calls into it.
+    name = names[0]
+    component = component_type()
+    component.logger = logging.getLogger(name)
+    setattr(robot, name, component)
+    if "_disabledComponents" not in robot.__dict__:
+        robot._disabledComponents = []
+    robot._disabledComponents.append((name, component))
+
+def isComponentEnabled(robot, name):
+    """
+    False for a component testComponentCompatibility disabled. Those were never set up,
+    so robot code should check before calling into them.
+    """
+    return name not in dict(robot.__dict__.get("_disabledComponents", []))
+
+def injectDisabledComponents(robot):
+    """
+    Gives each component disabled by testComponentCompatibility its tunables and variables.
+    Variables the robot doesn't have, or has with another type, get a new stub of the
+    annotated type that only that component sees.
+    """
+    for name, component in robot.__dict__.get("_disabledComponents", []):
+        setup_tunables(component, name, "components")
+
+        # Iterate over variables with type annotations
+        for n, inject_type in typing.get_type_hints(type(component)).items():
+            # If the variable is private ignore it
+            if n.startswith("_"):
+                continue
+            # If the variable has been set, skip it
+            if hasattr(component, n):
+                continue
+
+            # Check for generic types from the typing module
+            origin = getattr(inject_type, "__origin__", None)
+            if origin is not None:
+                inject_type = origin
+
+            # If the type is not actually a type, give a meaningful error
+            if not isinstance(inject_type, type):
+                raise TypeError(
+                    "Component %s has a non-type annotation on %s (%r); lone non-injection variable annotations are disallowed, did you want to assign a static variable?"
+                    % (inject_type, n, inject_type)
+                )
+
+            injectable = robot._injectables.get(n, robot._injectables.get("%s_%s" % (name, n)))
+            if not isinstance(injectable, inject_type):
+                robot.logger.info("Creating stub %s for disabled component %s", n, name)
+                injectable = inject_type()
+            setattr(component, n, injectable)
@@ -4,6 +4,80 @@ from pprint import pprint
 import os
 from pathlib import Path
 
+class ConfigDict(dict):
+    """
+    dict loaded from a config file that remembers the file and line it started on
+    """
+    __slots__ = ("file", "line")
+
+class _MarkedLoader(yaml.FullLoader):
+    """
+    FullLoader that builds ConfigDicts so errors can point at the config line
+    """
+
+def _constructConfigDict(loader, node):
+    data = ConfigDict()
+    data.file = os.path.basename(node.start_mark.name)
+    data.line = node.start_mark.line + 1
+    yield data
+    data.update(loader.construct_mapping(node))
+
+_MarkedLoader.add_constructor("tag:yaml.org,2002:map", _constructConfigDict)
+
+class ConfigIncludeError(ValueError):
+    """
+    Raised when a config extends or includes itself, directly or not
+    """
+
+# path -> (mtime, data) for every config file parsed, shared by every ConfigMapper
+_parsed = {}
+
+# path -> ({path: mtime} of the file and everything it extends, data)
+_resolved = {}
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns
+
+def _parseFile(path):
+    """
+    Returns the parsed contents of path, only reading it again if it changed.
+    The result is shared and must not be modified.
+    """
+    mtime = _mtime(path)
+    cached = _parsed.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path) as file:
+        data = yaml.load(file, _MarkedLoader)
+    if data is None:
+        data = ConfigDict()
+    _parsed[path] = (mtime, data)
+    return data
+
+def _copyMark(source, data):
+    if isinstance(source, ConfigDict) and hasattr(source, "line"):
+        data.file = source.file
+        data.line = source.line
+    return data
+
+def deepMerge(base, override):
+    """
+    Returns base with override merged over it. Mappings are merged key by
+    key, anything else in override replaces what base had. Neither input is
+    modified and subtrees only one side has are shared, not copied.
+    """
+    merged = _copyMark(override, ConfigDict(base))
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            value = deepMerge(merged[key], value)
+        merged[key] = value
+    return merged
+
+def _checkCycle(fileName, chain):
+    if fileName in chain:
+        raise ConfigIncludeError("Config include cycle " + " -> ".join(chain + (fileName,)))
+    return chain + (fileName,)
+
 class ConfigMapper(object):
     def __init__(self, filename, configDir):
         """
@@ -11,15 +85,21 @@ class ConfigMapper(object):
         "/" holds global config
         "<subsystem>" holds configs for subsystems
         configDir points to folder with configs. Future work make it take a list and search.
+
+        A file can start with `extends: base.yml` (or a list of files) to be
+        deep merged over them, so robot variants only list what differs.
+        An entry with `type: yaml` and `file: x.yml` pulls that file in.
+        Parsed files are cached and shared between mappers, so the returned
+        data must be treated as read only.
         """
         self.configDir = configDir
-        initialData = self.__loadFile(filename)
+        initialData = self.__resolveFile(filename, ())
         log.debug("Intial data %s", initialData)
-        self.subsystems = self.__convertToSubsystems(initialData, "/")
+        self.subsystems = self.__convertToSubsystems(initialData, "/", (filename,))
         root = self.subsystems["/"]
         if not "compatibility" in root:
             log.warning("No Compatibility string found. Matching all")
-            self.subsystems["compatibility"] = ["any"]
+            root["compatibility"] = ["any"]
         if not isinstance(root["compatibility"], list):
             root["compatibility"] = [root["compatibility"]]
         
@@ -136,15 +216,59 @@ class ConfigMapper(object):
         """
         Loads a yaml or yml file and returns the contents as dictionary
         """
-        with open(self.configDir + os.path.sep + filename) as file:
-            values = yaml.load(file, yaml.FullLoader)
-            return values
+        return _parseFile(self.configDir + os.path.sep + filename)
 
+    def __resolveFile(self, filename, chain):
+        """
+        Loads a file and everything it extends, merged. chain holds the files
+        being resolved above this one to catch cycles.
+        """
+        chain = _checkCycle(filename, chain)
+        path = self.configDir + os.path.sep + filename
+        cached = _resolved.get(path)
+        if cached is not None and all(_mtime(dep) == mtime for dep, mtime in cached[0].items()):
+            return cached[1]
+
+        data = self.__loadFile(filename)
+        deps = {path: _mtime(path)}
+        if "extends" in data:
+            bases = data["extends"]
+            if not isinstance(bases, list):
+                bases = [bases]
+            merged = ConfigDict()
+            for base in bases:
+                log.info("%s extends %s", filename, base)
+                merged = deepMerge(merged, self.__resolveFile(base, chain))
+                deps.update(_resolved[self.configDir + os.path.sep + base][0])
+            data = deepMerge(merged, {key: value for key, value in data.items() if key != "extends"})
+        _resolved[path] = (deps, data)
+        return data
 
-    def __convertToSubsystems(self, inputData, defSubsystem):
+    def __include(self, entry, key, chain):
+        """
+        Returns a new entry with the file it names flattened into it. The root
+        mappings of the file are merged in and its other values set.
+        """
+        fileName = entry["file"]
+        if not entry.get("type") == "yaml":
+            log.error("Unknonw file type %s. Trying Yaml", entry.get("type"))
+        log.info("Loading %s into entry %s", fileName, key)
+        data = self.__resolveFile(fileName, chain)
+        included = _copyMark(entry, ConfigDict())
+        included.update((name, value) for name, value in entry.items() if name not in ("file", "type"))
+        #Flatten the root node of newly loaded yaml file.
+        for loadedKey, value in data.items():
+            if isinstance(value, dict):
+                included.update(value)
+            else:
+                included[loadedKey] = value
+        return included, _checkCycle(fileName, chain)
+
+    def __convertToSubsystems(self, inputData, defSubsystem, chain):
         """
         Takes a dictionary and searchs for subsystem types to create leafs of a new tree.
-        Loads files as "file" is encountered
+        Loads files as "file" is encountered. Builds new dicts instead of
+        changing inputData, which may be shared with other mappers.
         """
         if "subsystem" in inputData:
             subsystem = inputData["subsystem"]
@@ -154,34 +278,21 @@ class ConfigMapper(object):
         processedData = {}
         processedData[subsystem] = {}
 
-        for key in inputData:
+        for key, value in inputData.items():
+            entryChain = chain
 
             #if file, load file and walk
-            if isinstance(inputData[key], dict) and "file" in inputData[key]:
-                fileName = inputData[key].pop("file")
-                fileType = inputData[key].pop("type")
-                if not fileType == "yaml":
-                    log.error("Unknonw file type fileType. Trying Yaml")
-                log.info("Loading %s into entry %s", fileName, key)
-                data = self.__loadFile(fileName)
-                #Flatten the root node of newly loaded yaml file.
-                for loadedKey in data:
-                    if isinstance(data[loadedKey], dict):
-                        inputData[key].update(data[loadedKey])
-                    else:
-                        inputData[key][loadedKey] = data[loadedKey]
+            if isinstance(value, dict) and "file" in value:
+                value, entryChain = self.__include(value, key, chain)
 
             #if subsystem, walk subsystem
-            if "subsystem" in inputData[key] and isinstance(inputData[key], dict):
-                log.info("Walking subsystem")
+            if isinstance(value, dict) and "subsystem" in value:
+                log.debug("Walking subsystem %s", value["subsystem"])
                 #make a new subsystem
-                print("Crashing????")
-                print(inputData[key])
-                print(inputData[key]["subsystem"])
-                processedData[inputData[key]["subsystem"]] = self.__convertToSubsystems(inputData[key], inputData[key]["subsystem"])
+                processedData[value["subsystem"]] = self.__convertToSubsystems(value, value["subsystem"], entryChain)
 
             #copy field over if no special processing
-            processedData[subsystem][key] = inputData[key]
+            processedData[subsystem][key] = value
         
         return processedData
 
@@ -193,12 +304,19 @@ def findConfig():
     Please run 'echo (robotCfg.yml) > robotConfig' on the robot.
     This will tell the robot to use robotCfg file remove the () and use file name file.
     Files should be configs dir
+    Setting the ROBOT_CONFIG environment variable to a file name overrides robotConfig.
     """
     configPath = os.path.dirname(__file__) + os.path.sep + ".." +os.path.sep + "configs" + os.path.sep
     home = str(Path.home()) + os.path.sep
     defaultConfig = "doof.yml"
     robotConfigFile = home + "robotConfig"
-    
+
+    envConfig = os.environ.get("ROBOT_CONFIG")
+    if envConfig:
+        if os.path.isfile(configPath + envConfig):
+            log.info("Using %s config file from ROBOT_CONFIG", envConfig)
+            return envConfig, configPath
+        log.error("ROBOT_CONFIG is set to %s but %s does not exist", envConfig, configPath + envConfig)
 
     if not os.path.isfile(robotConfigFile):
         log.error("Could not find %s. Using default", robotConfigFile)
@@ -0,0 +1,174 @@
+"""
+CTRE Talon SRX and Talon FX creation. Only imported when a config uses them.
+Every function takes the MotorSpec compiled from the config entry.
+"""
+import ctre
+
+def createTalonSRX(spec, motors):
+    """
+    CANTalonSRX. If we want to use the built in encoder it is set up from "pid"
+    """
+    if spec.pid is not None:
+        motor = WPI_TalonSRXFeedback(spec)
+        motor.setupPid()
+    else:
+        motor = ctre.WPI_TalonSRX(spec.channel)
+    setTalonSRXCurrentLimits(motor, spec)
+    motors[str(spec.channel)] = motor
+    return motor
+
+def createTalonSRXFollower(spec, motors):
+    """
+    CANTalonSRXFollower. Follows the talon on masterChannel
+    """
+    motor = ctre.WPI_TalonSRX(spec.channel)
+    motor.set(mode = ctre.ControlMode.Follower, value = spec.masterChannel)
+    setTalonSRXCurrentLimits(motor, spec)
+    motors[str(spec.channel)] = motor
+    return motor
+
+def createTalonFX(spec, motors):
+    """
+    CANTalonFX
+    """
+    if spec.pid is not None:
+        motor = WPI_TalonFXFeedback(spec)
+        motor.setupPid()
+    else:
+        motor = ctre.WPI_TalonFX(spec.channel)
+    setTalonFXCurrentLimits(motor, spec)
+    return motor
+
+def createTalonFXFollower(spec, motors):
+    """
+    CANTalonFXFollower. Follows the talon on masterChannel
+    """
+    motor = ctre.WPI_TalonFX(spec.channel)
+    motor.set(mode = ctre.TalonFXControlMode.Follower, value = spec.masterChannel)
+    motors[str(spec.channel)] = motor
+    setTalonFXCurrentLimits(motor, spec)
+    return motor
+
+def setTalonFXCurrentLimits(motor, spec):
+    """
+    Sets current limits based off of "currentLimits"
+    in your motor and config of choice. Must be a Talon FX motor controller
+    In currentLimits, you need currentLimit, triggerThresholdCurrent, and triggerThresholdTime.
+    """
+    limits = spec.currentLimits
+    if limits is not None:
+        statorCurrentConfig = ctre.StatorCurrentLimitConfiguration(True, limits.currentLimit, limits.triggerThresholdCurrent, limits.triggerThresholdTime)
+        supplyCurrentConfig = ctre.SupplyCurrentLimitConfiguration(True, limits.currentLimit, limits.triggerThresholdCurrent, limits.triggerThresholdTime)
+        motor.configStatorCurrentLimit(statorCurrentConfig)
+        motor.configSupplyCurrentLimit(supplyCurrentConfig)
+
+def setTalonSRXCurrentLimits(motor, spec):
+    """
+    Sets current limits based off of "currentLimits"
+    in your motor and config of choice. Must be a Talon SRX motor controller
+    In currentLimits, you need absMax, absMaxTimeMs, maxNominal.
+    """
+    limits = spec.currentLimits
+    if limits is not None:
+        motor.configPeakCurrentLimit(limits.absMax, 10)
+        motor.configPeakCurrentDuration(limits.absMaxTimeMs, 10)
+        motor.configContinuousCurrentLimit(limits.maxNominal, 10)
+        motor.enableCurrentLimit(True)
+
+class WPI_TalonSRXFeedback(ctre.WPI_TalonSRX):#ctre.wpi_talonsrx.WPI_TalonSRX
+    """
+    Class used to setup TalonSRX motors if there are PID setting for it
+    """
+    def __init__(self, spec):
+        ctre.WPI_TalonSRX.__init__(self, spec.channel)
+        self.spec = spec
+        self.pid = None
+
+    def setupPid(self):
+        '''Sets up PID from spec.pid, which holds controlType, feedbackDevice,
+        sensorPhase, kPreScale, and P, I, D and F.'''
+        if self.spec.pid is None:
+            print("Motor channel %d has no PID"%(self.spec.channel))
+            return
+        self.pid = self.spec.pid
+        
+        #Takes a str and converts it to a ctre enum
+        if self.pid.controlType == "Position":
+            self.controlType = ctre.ControlMode.Position
+        elif self.pid.controlType == "Velocity":
+            self.controlType = ctre.ControlMode.Velocity
+        
+        
+        self.configSelectedFeedbackSensor(ctre.FeedbackDevice(self.pid.feedbackDevice), 0, 10)
+        self.setSensorPhase(self.pid.sensorPhase)
+        self.ControlType = self.pid.controlType
+        self.kPreScale = self.pid.kPreScale
+
+        #/* set the peak, nominal outputs, and deadband */
+        self.configNominalOutputForward(0, 10)
+        self.configNominalOutputReverse(0, 10)
+        self.configPeakOutputForward(1, 10)
+        self.configPeakOutputReverse(-1, 10)
+
+        self.configVelocityMeasurementPeriod(ctre.VelocityMeasPeriod(1), 10)
+        #/* set closed loop gains in slot0 */
+        self.config_kF(0, self.pid.kF, 10)
+        self.config_kP(0, self.pid.kP, 10)
+        self.config_kI(0, self.pid.kI, 10)
+        self.config_kD(0, self.pid.kD, 10)
+
+    def set(self, speed):
+        if self.pid != None:
+            return ctre.WPI_TalonSRX.set(self, self.controlType, speed * self.kPreScale)
+        else:
+            return ctre.WPI_TalonSRX.set(self, speed)
+
+class WPI_TalonFXFeedback(ctre.WPI_TalonFX):
+    def __init__(self, spec):
+        '''Sets up the basic Talon FX on spec.channel. Doesn't set up pid.'''
+        ctre.WPI_TalonFX.__init__(self, spec.channel)
+        self.spec = spec
+        self.pid = None
+        if spec.type == "CANTalonFXFollower":
+            self.controlType = ctre.TalonFXControlMode.Follower
+        else:
+            self.controlType = ctre.TalonFXControlMode.PercentOutput
+
+    def setupPid(self):
+        '''Sets up pid from spec.pid
+        (P, I, D, F, control type, sensorPhase, kPreScale, feedbackDevice)'''
+        if self.spec.pid is None:
+            print("Motor channel %d has no PID"%(self.spec.channel))
+            return
+        self.pid = self.spec.pid
+        
+        #Takes a str and converts it to a ctre enum for controltype.
+        if self.pid.controlType == "Position":
+            self.controlType = ctre.TalonFXControlMode.Position
+        elif self.pid.controlType == "Velocity":
+            self.controlType = ctre.TalonFXControlMode.Velocity
+        
+        self.configSelectedFeedbackSensor(ctre.FeedbackDevice(self.pid.feedbackDevice), 0, 10)
+        self.setSensorPhase(self.pid.sensorPhase)
+        self.kPreScale = self.pid.kPreScale
+
+        #/* set the peak, nominal outputs, and deadband */
+        self.configNominalOutputForward(0, 10)
+        self.configNominalOutputReverse(0, 10)
+        self.configPeakOutputForward(1, 10)
+        self.configPeakOutputReverse(-1, 10)
+        self.configVelocityMeasurementPeriod(ctre.VelocityMeasPeriod(1), 10)
+        #/* set closed loop gains in slot0 */
+        self.config_kF(0, self.pid.kF, 10)
+        self.config_kP(0, self.pid.kP, 10)
+        self.config_kI(0, self.pid.kI, 10)
+        self.config_kD(0, self.pid.kD, 10)
+
+    def set(self, speed):
+        """
+        Overrides the default set() to allow for controll using the pid loop
+        """
+        if self.pid != None:
+            return ctre.WPI_TalonFX.set(self, self.controlType, speed * self.kPreScale)
+        else:
+            return ctre.WPI_TalonFX.set(self, speed)
@@ -0,0 +1,180 @@
+"""
+Maps config "type" strings to the function that creates that device. Factories
+are given as "module:function" and only imported the first time a config
+entry of that type is created, so vendor libraries a robot doesn't use are
+never loaded.
+
+Each type belongs to a group, the config "groups" value it is listed under,
+and declares the keys its config entry needs, either as a dict of key types
+or as a spec class from deviceSpecs that the entry is compiled into. New
+device kinds only need a registerDevice call, robot.py creates every
+registered group.
+"""
+import importlib
+
+from utils.deviceSpecs import ConfigError, MotorSpec, location
+
+class DeviceType:
+    """
+    Registry entry for one config type string
+    """
+    def __init__(self, typeName, factory, group, required = None, optional = None, spec = None):
+        self.typeName = typeName
+        self.factory = factory
+        self.group = group
+        self.required = required or {}
+        self.optional = optional or {}
+        self.spec = spec
+
+    def getFactory(self):
+        if isinstance(self.factory, str):
+            moduleName, functionName = self.factory.split(":")
+            self.factory = getattr(importlib.import_module(moduleName), functionName)
+        return self.factory
+
+    def validate(self, descp):
+        """
+        Returns a list of problems with a config entry for this type
+        """
+        if self.spec is not None:
+            try:
+                self.spec.fromConfig(descp)
+            except ConfigError as e:
+                return e.problems
+            return []
+        errors = []
+        for key, keyType in self.required.items():
+            if key not in descp:
+                errors.append(f"missing {key}")
+            elif not isinstance(descp[key], keyType):
+                errors.append(f"{key} should be {_typeNames(keyType)}, got {descp[key]!r}")
+        for key, keyType in self.optional.items():
+            if key in descp and not isinstance(descp[key], keyType):
+                errors.append(f"{key} should be {_typeNames(keyType)}, got {descp[key]!r}")
+        return errors
+
+    def compile(self, descp):
+        """
+        Returns what the factory is given for descp, its spec if the type has one
+        """
+        if self.spec is not None:
+            return self.spec.fromConfig(descp)
+        return descp
+
+def _typeNames(keyType):
+    if isinstance(keyType, tuple):
+        return " or ".join(t.__name__ for t in keyType)
+    return keyType.__name__
+
+_types = {}
+
+# group name -> function called by instantiateSubsystemGroup for each entry
+_groups = {}
+
+def registerGroup(group, factory = "utils.deviceRegistry:createDevice"):
+    """
+    Adds a group. factory is called as factory(descp, devices) with each
+    config entry in the group, by default createDevice. devices is the
+    dict instantiateSubsystemGroup keeps for the group on one robot.
+    """
+    _groups[group] = factory
+
+def registerDevice(typeName, factory, group, required = None, optional = None, spec = None):
+    """
+    Adds or replaces the factory for typeName. factory is a callable or a
+    "module:function" string imported on first use. It is called as
+    factory(descp, devices) where devices holds the group's devices created
+    so far by channel. required and optional map config keys to the type or
+    tuple of types they must have. If spec is given the entry is compiled
+    with spec.fromConfig and the factory gets the spec instead of the dict.
+    """
+    if group not in _groups:
+        registerGroup(group)
+    _types[typeName] = DeviceType(typeName, factory, group, required, optional, spec)
+
+def getFactory(typeName):
+    """
+    Returns the factory for typeName, importing it if needed. None if the
+    type is unknown.
+    """
+    deviceType = _types.get(typeName)
+    if deviceType is None:
+        return None
+    return deviceType.getFactory()
+
+def getTypes():
+    return list(_types.keys())
+
+def getGroups():
+    return list(_groups.keys())
+
+def getGroupFactory(group):
+    factory = _groups[group]
+    if isinstance(factory, str):
+        moduleName, functionName = factory.split(":")
+        factory = _groups[group] = getattr(importlib.import_module(moduleName), functionName)
+    return factory
+
+def validate(descp, group = None):
+    """
+    Returns a list of problems with a config entry, empty if it is good
+    """
+    if not isinstance(descp, dict):
+        return [f"{descp!r} is not a device entry"]
+    if "type" not in descp:
+        return ["missing type"]
+    deviceType = _types.get(descp["type"])
+    if deviceType is None:
+        return [f"unknown type {descp['type']}"]
+    if group is not None and deviceType.group != group:
+        return [f"type {descp['type']} belongs in group {deviceType.group}, not {group}"]
+    return deviceType.validate(descp)
+
+def validateConfig(configMapper):
+    """
+    Checks every entry of every registered group in the config without
+    creating anything. Returns a list of "file:line subsystem/name: problem"
+    strings.
+    """
+    errors = []
+    for group in _groups:
+        for subsystem in configMapper.getSubsystems():
+            for name, descp in configMapper.getGroupDict(subsystem, group).items():
+                where = location(descp)
+                errors.extend(f"{where} {subsystem}/{name}: {error}".lstrip() for error in validate(descp, group))
+    return errors
+
+def createDevice(descp, devices = None):
+    """
+    Creates the device for a config entry. devices holds the group's
+    devices created so far by channel, followers find their master there.
+    Raises ConfigError if the entry is invalid. Errors creating the device
+    are not caught, a robot missing a device shouldn't finish booting.
+    """
+    errors = validate(descp)
+    if errors:
+        raise ConfigError(errors, location(descp))
+    deviceType = _types[descp["type"]]
+    if devices is None:
+        devices = {}
+    return deviceType.getFactory()(deviceType.compile(descp), devices)
+
+registerGroup("motors", "utils.motorHelper:createMotor")
+registerDevice("CANTalonSRX", "utils.ctreMotors:createTalonSRX", "motors", spec = MotorSpec)
+registerDevice("CANTalonSRXFollower", "utils.ctreMotors:createTalonSRXFollower", "motors", spec = MotorSpec)
+registerDevice("CANTalonFX", "utils.ctreMotors:createTalonFX", "motors", spec = MotorSpec)
+registerDevice("CANTalonFXFollower", "utils.ctreMotors:createTalonFXFollower", "motors", spec = MotorSpec)
+registerDevice("SparkMax", "utils.revMotors:createSparkMax", "motors", spec = MotorSpec)
+registerDevice("SparkMaxFollower", "utils.revMotors:createSparkMaxFollower", "motors", spec = MotorSpec)
+
+registerDevice("navx", "utils.sensorFactories:createNavx", "gyros", {"method": str})
+registerDevice("RIODigitalIn", "utils.sensorFactories:createDigitalInput", "digitalInput", {"channel": int})
+registerDevice("CANCoder", "utils.sensorFactories:createCANCoder", "encoders", {"channel": int})
+registerDevice("PDP", "utils.sensorFactories:createPDP", "powerDistribution", optional = {"module": int})
+registerDevice("limelight", "utils.sensorFactories:createLimelight", "cameras", optional = {"table": str})
+
+registerDevice("compressor", "utils.acturatorFactories:createCompressor", "compressors")
+registerDevice("solenoid", "utils.acturatorFactories:createSolenoid", "solenoids", {"channel": int})
+registerDevice("doubleSolenoid", "utils.acturatorFactories:createDoubleSolenoid", "solenoids", {"channel": dict})
+registerDevice("addressableLED", "utils.acturatorFactories:createAddressableLED", "leds",
+               {"channel": int, "length": int})
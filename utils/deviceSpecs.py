@@ -0,0 +1,175 @@
+"""
+Typed, read only descriptions of devices compiled from config entries.
+Compiling checks every key once when the config is loaded so a typo is
+reported with its file and line instead of a KeyError halfway through boot,
+and the factories and motor classes read attributes instead of dict keys.
+"""
+
+_number = (int, float)
+_required = object()
+
+class ConfigError(ValueError):
+    """
+    Raised when a config entry doesn't compile. problems holds every
+    problem found.
+    """
+    def __init__(self, problems, where = ""):
+        ValueError.__init__(self, f"{where} {'; '.join(problems)}".strip())
+        self.problems = problems
+        self.where = where
+
+def location(descp):
+    """
+    Returns "file:line" for an entry loaded by ConfigMapper, or "" if unknown
+    """
+    line = getattr(descp, "line", None)
+    if line is None:
+        return ""
+    return f"{descp.file}:{line}"
+
+class Spec:
+    """
+    Base for the specs. Attributes are set once by _read and can't be
+    changed afterwards.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read only")
+
+    def _read(self, descp, key, types, problems, default = _required, choices = None, attribute = None):
+        if key not in descp:
+            if default is _required:
+                problems.append(f"missing {key}")
+            value = None if default is _required else default
+        else:
+            value = descp[key]
+            if not isinstance(value, types):
+                problems.append(f"{key} is {value!r}, expected {_typeNames(types)}")
+            elif choices is not None and value not in choices:
+                problems.append(f"{key} is {value!r}, expected one of {', '.join(choices)}")
+        object.__setattr__(self, attribute or key, value)
+
+    def _checkKeys(self, descp, known, problems):
+        """
+        Reports keys nobody reads, usually a typo of one that is
+        """
+        for key in descp:
+            if key not in known:
+                problems.append(f"unknown key {key}")
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+def _typeNames(types):
+    if isinstance(types, tuple):
+        return " or ".join(t.__name__ for t in types)
+    return types.__name__
+
+class PidSpec(Spec):
+    """
+    Closed loop settings from a motor's "pid" entry. feedbackDevice is the
+    talon feedback device or the SparkMax pid slot.
+    """
+    __slots__ = ("controlType", "feedbackDevice", "kPreScale", "kP", "kI", "kD", "kF",
+                 "sensorPhase", "coastOnZero")
+
+    def __init__(self, descp, problems):
+        self._read(descp, "controlType", str, problems, choices = ("Position", "Velocity"))
+        self._read(descp, "feedbackDevice", int, problems)
+        for key in ("kPreScale", "kP", "kI", "kD", "kF"):
+            self._read(descp, key, _number, problems)
+        self._read(descp, "sensorPhase", bool, problems, False)
+        self._read(descp, "coastOnZero", bool, problems, False)
+        self._checkKeys(descp, self.__slots__, problems)
+
+class CurrentLimitSpec(Spec):
+    """
+    Current limits from a motor's "currentLimits" entry. Each motor family
+    uses its own keys, the ones it doesn't use are None.
+    """
+    __slots__ = ("family", "currentLimit", "triggerThresholdCurrent", "triggerThresholdTime",
+                 "absMax", "absMaxTimeMs", "maxNominal",
+                 "freeLimit", "stallLimit", "stallLimitRPM", "secondaryLimit")
+
+    families = {
+        "talonFX": ("currentLimit", "triggerThresholdCurrent", "triggerThresholdTime"),
+        "talonSRX": ("absMax", "absMaxTimeMs", "maxNominal"),
+        "rev": ("freeLimit", "stallLimit", "stallLimitRPM", "secondaryLimit"),
+    }
+
+    def __init__(self, descp, family, problems):
+        object.__setattr__(self, "family", family)
+        for key in self.__slots__[1:]:
+            if key in self.families[family]:
+                self._read(descp, key, _number, problems)
+            else:
+                object.__setattr__(self, key, None)
+        self._checkKeys(descp, self.families[family], problems)
+
+class MotorSpec(Spec):
+    """
+    Everything needed to create a motor from its config entry
+    """
+    __slots__ = ("type", "channel", "masterChannel", "motorType", "inverted", "idleBrake",
+                 "pid", "currentLimits", "where")
+
+    # type -> (current limit family, needs masterChannel, needs motorType)
+    motorTypes = {
+        "CANTalonSRX": ("talonSRX", False, False),
+        "CANTalonSRXFollower": ("talonSRX", True, False),
+        "CANTalonFX": ("talonFX", False, False),
+        "CANTalonFXFollower": ("talonFX", True, False),
+        "SparkMax": ("rev", False, True),
+        "SparkMaxFollower": ("rev", True, True),
+    }
+
+    configKeys = ("type", "channel", "masterChannel", "motorType", "inverted", "IdleBrake",
+                  "pid", "currentLimits")
+
+    def __init__(self, descp, problems):
+        self._read(descp, "type", str, problems, choices = tuple(self.motorTypes))
+        family, follower, needsMotorType = self.motorTypes.get(self.type, ("talonSRX", False, False))
+        object.__setattr__(self, "where", location(descp))
+        self._read(descp, "channel", int, problems)
+        self._read(descp, "masterChannel", int, problems, _required if follower else None)
+        if needsMotorType:
+            self._read(descp, "motorType", str, problems, choices = ("kBrushed", "kBrushless"))
+        else:
+            object.__setattr__(self, "motorType", None)
+        # rev followers are always set up through SparkMaxFeedback which needs it
+        self._read(descp, "inverted", bool, problems, _required if self.type == "SparkMaxFollower" else None)
+        self._read(descp, "IdleBrake", bool, problems, False, attribute = "idleBrake")
+
+        pid = descp.get("pid")
+        if pid is not None:
+            pid = self._compileNested(pid, "pid", problems, PidSpec)
+        object.__setattr__(self, "pid", pid)
+
+        limits = descp.get("currentLimits")
+        if limits is not None:
+            limits = self._compileNested(limits, "currentLimits", problems, CurrentLimitSpec, family)
+        object.__setattr__(self, "currentLimits", limits)
+        self._checkKeys(descp, self.configKeys, problems)
+
+    def _compileNested(self, descp, key, problems, specType, *args):
+        if not isinstance(descp, dict):
+            problems.append(f"{key} is {descp!r}, expected a mapping")
+            return None
+        nestedProblems = []
+        spec = specType(descp, *args, nestedProblems)
+        problems.extend(f"{key}: {problem}" for problem in nestedProblems)
+        return spec
+
+    @classmethod
+    def fromConfig(cls, descp):
+        """
+        Compiles a motor config entry. Raises ConfigError listing every
+        problem if it is invalid.
+        """
+        problems = []
+        spec = cls(descp, problems)
+        if problems:
+            raise ConfigError(problems, spec.where)
+        return spec
@@ -0,0 +1,100 @@
+"""
+In process publish/subscribe for sensor and state changes
+"""
+import logging
+
+log = logging.getLogger("eventBus")
+
+class Event:
+    """
+    Base of every topic. A topic is an Event subclass. getKey() narrows a
+    topic further, so a subscriber can ask for only some of its events.
+    """
+    __slots__ = ()
+
+    def getKey(self):
+        return None
+
+class BallEntered(Event):
+    """The loading sensor was just tripped."""
+    __slots__ = ()
+
+class ShooterAtSpeed(Event):
+    """The flywheel just got up to the shot speed, or just dropped below it."""
+    __slots__ = ("atSpeed",)
+
+    def __init__(self, atSpeed):
+        self.atSpeed = atSpeed
+
+class StateChanged(Event):
+    """
+    State machine machine (its class name) moved from state old to new.
+    Keyed by (machine, new).
+    """
+    __slots__ = ("machine", "old", "new")
+
+    def __init__(self, machine, old, new):
+        self.machine = machine
+        self.old = old
+        self.new = new
+
+    def getKey(self):
+        return (self.machine, self.new)
+
+class MechTriggersChanged(Event):
+    """One of the mech controller triggers was just pressed or released."""
+    __slots__ = ("left", "right")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+class EventBus:
+    """
+    Producers publish an event when something changes rather than having
+    every consumer poll it each loop. Handlers run right away, in the order
+    they subscribed, inside publish.
+
+    The topic to handlers table is rebuilt on subscribe, so publishing is
+    one dict lookup per topic and costs nothing when nobody is listening.
+    A handler that raises is logged and the rest still run.
+    """
+    def __init__(self):
+        self.handlers = {}
+
+    def subscribe(self, topic, handler, key = None):
+        """
+        Calls handler(event) for every topic event published, or only the
+        ones whose getKey() is key.
+        """
+        entry = topic if key is None else (topic, key)
+        self.handlers[entry] = self.handlers.get(entry, ()) + (handler,)
+
+    def unsubscribe(self, topic, handler, key = None):
+        entry = topic if key is None else (topic, key)
+        handlers = tuple(h for h in self.handlers.get(entry, ()) if h != handler)
+        if handlers:
+            self.handlers[entry] = handlers
+        else:
+            self.handlers.pop(entry, None)
+
+    def publish(self, event):
+        """
+        Calls the topic's handlers, then the ones for its key. Both are
+        looked up before any run, so subscribing or unsubscribing from a
+        handler takes effect from the next publish.
+        """
+        topic = type(event)
+        handlers = self.handlers.get(topic, ())
+        key = event.getKey()
+        keyed = () if key is None else self.handlers.get((topic, key), ())
+        for handler in handlers:
+            self.dispatch(handler, event)
+        for handler in keyed:
+            self.dispatch(handler, event)
+
+    def dispatch(self, handler, event):
+        try:
+            handler(event)
+        except Exception:
+            log.exception("%s crashed handling %s", handler, type(event).__name__)
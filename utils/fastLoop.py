@@ -0,0 +1,154 @@
+"""
+High rate loop on a wpilib Notifier and the buffers it talks to the robot loop through
+"""
+import logging
+import math
+import time
+
+from wpilib import Notifier, Timer
+
+log = logging.getLogger("fastLoop")
+
+class DoubleBuffer:
+    """
+    Hands a small dict of values from one writer thread to one reader
+    thread without either of them waiting on a lock.
+
+    The writer fills the slot the reader isn't pointed at and then bumps
+    sequence, which flips which slot is current. Once sequence has moved
+    the next write goes into the slot the reader was copying, so a reader
+    that sees sequence change at all while it copied copies again.
+    """
+    def __init__(self, **values):
+        self.slots = [dict(values), dict(values)]
+        self.sequence = 0
+
+    def write(self, **values):
+        """
+        Publishes values, keeping whatever was published before for the
+        keys not given. Only one thread may write.
+        """
+        sequence = self.sequence
+        back = self.slots[(sequence + 1) & 1]
+        back.update(self.slots[sequence & 1])
+        back.update(values)
+        self.sequence = sequence + 1
+
+    def read(self):
+        """
+        Returns a copy of the values last published
+        """
+        while True:
+            sequence = self.sequence
+            values = dict(self.slots[sequence & 1])
+            if self.sequence == sequence:
+                return values
+
+class JitterStats:
+    """
+    Running mean, standard deviation, percentiles and worst case of how late
+    each loop started, plus how many loops took longer than their period.
+
+    Percentiles come from a histogram of abs(jitter) in bucketWidth second
+    buckets, so adding stays constant time. Anything past the last bucket
+    lands in it.
+    """
+    bucketWidth = .0001
+    bucketCount = 200
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.worst = 0.0
+        self.overruns = 0
+        self.histogram = [0] * self.bucketCount
+
+    def add(self, jitter):
+        self.count += 1
+        delta = jitter - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (jitter - self.mean)
+        self.worst = max(self.worst, abs(jitter))
+        self.histogram[min(int(abs(jitter) / self.bucketWidth), self.bucketCount - 1)] += 1
+
+    def getStdDev(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def getPercentile(self, percent):
+        """
+        abs(jitter) that percent of loops started within, rounded up to the
+        bucket it falls in but never more than worst. Past the last bucket
+        that is worst.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank and bucket < self.bucketCount - 1:
+                return min((bucket + 1) * self.bucketWidth, self.worst)
+        return self.worst
+
+    def summary(self):
+        """
+        [mean, standard deviation, 99th percentile, worst] jitter in milliseconds
+        """
+        return [round(self.mean * 1000, 3), round(self.getStdDev() * 1000, 3),
+                round(self.getPercentile(99) * 1000, 3), round(self.worst * 1000, 3)]
+
+class FastLoop:
+    """
+    Calls callback(timestamp) every period seconds from a wpilib Notifier
+    thread. timestamp is the FPGA time the loop started, the same clock the
+    robot loop uses.
+
+    callback runs on another thread than the robot loop, so it may only
+    share state with it through a DoubleBuffer or plain attribute writes.
+    """
+    def __init__(self, callback, period = .004, name = "fastLoop"):
+        self.callback = callback
+        self.period = period
+        self.name = name
+        self.stats = JitterStats()
+        self.notifier = None
+        self.lastStart = None
+
+    def isRunning(self):
+        return self.notifier is not None
+
+    def start(self, period = None):
+        if period is not None:
+            self.period = period
+        if self.notifier is not None:
+            return
+        self.lastStart = None
+        self.notifier = Notifier(self.run)
+        self.notifier.startPeriodic(self.period)
+        log.info("Started %s at %.0f Hz", self.name, 1 / self.period)
+
+    def stop(self):
+        if self.notifier is None:
+            return
+        self.notifier.stop()
+        self.notifier = None
+        log.info("Stopped %s. Jitter mean, stddev, p99, worst (ms) %s, %d overruns in %d loops",
+                 self.name, self.stats.summary(), self.stats.overruns, self.stats.count)
+
+    def run(self):
+        start = time.perf_counter()
+        if self.lastStart is not None:
+            self.stats.add(start - self.lastStart - self.period)
+        self.lastStart = start
+        try:
+            self.callback(Timer.getFPGATimestamp())
+        except Exception:
+            log.exception("%s callback failed", self.name)
+        if time.perf_counter() - start > self.period:
+            self.stats.overruns += 1
@@ -0,0 +1,115 @@
+"""
+Per module import time report, like python -X importtime but readable from
+the robot log. Enable by setting ROBOT_IMPORT_TIMES=1 before starting robot.py.
+robot.py imports this module first so everything after it is timed.
+"""
+import importlib.abc
+import logging
+import os
+import sys
+import time
+
+log = logging.getLogger("importTimer")
+
+_timer = None
+
+class _TimedLoader:
+    """
+    Wraps a loader so creating and executing the module is timed
+    """
+    def __init__(self, loader, timer, name):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        if create is None:
+            return None
+        # extension modules do all their work here
+        return self._timer.timed(self._name, create, spec)
+
+    def exec_module(self, module):
+        return self._timer.timed(self._name, self._loader.exec_module, module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder that asks the other finders for the spec and wraps the
+    loader it gets back. Keeps cumulative and self time per module.
+    """
+    def __init__(self):
+        self.cumulative = {}
+        self.selfTime = {}
+        self.order = []
+        self.stack = []
+
+    def find_spec(self, name, path, target = None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self, name)
+                return spec
+        return None
+
+    def timed(self, name, func, arg):
+        if name not in self.cumulative:
+            self.order.append(name)
+            self.cumulative[name] = 0.0
+            self.selfTime[name] = 0.0
+        frame = [name, 0.0]
+        self.stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(arg)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            self.cumulative[name] += elapsed
+            self.selfTime[name] += elapsed - frame[1]
+            if self.stack:
+                self.stack[-1][1] += elapsed
+
+    def report(self, count = 25):
+        """
+        Returns the slowest count modules by cumulative time as text
+        """
+        total = sum(self.selfTime.values())
+        lines = [f"Imported {len(self.order)} modules in {total * 1000:.1f}ms",
+                 f"{'self ms':>9} {'total ms':>9}  module"]
+        slowest = sorted(self.order, key = self.cumulative.get, reverse = True)[:count]
+        for name in slowest:
+            lines.append(f"{self.selfTime[name] * 1000:9.2f} {self.cumulative[name] * 1000:9.2f}  {name}")
+        return "\n".join(lines)
+
+def install():
+    """
+    Starts timing imports. Anything imported before this is not counted.
+    """
+    global _timer
+    if _timer is None:
+        _timer = ImportTimer()
+        sys.meta_path.insert(0, _timer)
+    return _timer
+
+def installFromEnv():
+    """
+    Starts timing if ROBOT_IMPORT_TIMES is set
+    """
+    if os.environ.get("ROBOT_IMPORT_TIMES"):
+        return install()
+    return None
+
+def logReport(count = 25):
+    """
+    Logs the report if timing was started
+    """
+    if _timer is not None:
+        log.info("%s", _timer.report(count))
+
+installFromEnv()
@@ -1,20 +1,25 @@
 from magicbot.state_machine import * # noqa: F403,F401
 from magicbot.state_machine import StateMachine
 import magicbot.state_machine
+from utils.stateTracing import TracedStateMachine
 import functools
+import logging
 
 class InvalidStateTransition(Exception):
     pass
 
+class InvalidStateTable(Exception):
+    pass
+
 def state(f=None, *, first=False, must_finish=False, state_transitions=[]):
     """
         If this decorator is applied to a function in an object that inherits
         from :class:`.StateMachine`, it indicates that the function
         is a state. The state will continue to be executed until the
         ``next_state`` function is executed.
-        
+
         The decorated function can have the following arguments in any order:
-        
+
         - ``tm`` - The number of seconds since the state machine has started
         - ``state_tm`` - The number of seconds since this state has been active
           (note: it may not start at zero!)
@@ -24,7 +29,7 @@ def state(f=None, *, first=False, must_finish=False, state_transitions=[]):
         - ``state_transitions`` - Contains list of valid state transitions from
           this state. If a transition is invalid the change state will fail.
           if this is empty or "any" is used no limitation on transitions is enforced.
-        
+
         :param first: If True, this state will be ran first
         :type  first: bool
         :param must_finish: If True, then this state will continue executing
@@ -40,33 +45,151 @@ def state(f=None, *, first=False, must_finish=False, state_transitions=[]):
         f =  _strict_create_wrapper(f, first, must_finish, state_transitions)
     return f
 
+def timed_state(f=None, *, duration=None, next_state=None, first=False, must_finish=False, state_transitions=[]):
+    """
+        Strict version of magicbot's timed_state. See :func:`state` for
+        ``state_transitions``. ``next_state`` is always added to the
+        transitions so the state can expire into it.
+    """
+    if f is None:
+        return functools.partial(timed_state, duration=duration, next_state=next_state, first=first,
+                                 must_finish=must_finish, state_transitions=state_transitions)
+    wrapper = magicbot.state_machine.timed_state(f, duration=duration, next_state=next_state,
+                                                 first=first, must_finish=must_finish)
+    transitions = list(state_transitions)
+    if transitions and next_state is not None:
+        nextName = next_state if isinstance(next_state, str) else next_state.__name__
+        if nextName not in transitions:
+            transitions.append(nextName)
+    wrapper.state_transitions = transitions
+    return wrapper
+
 def _strict_create_wrapper(f, first, must_finish, state_transitions):
     wrapper = magicbot.state_machine._create_wrapper(f, first, must_finish)
-    wrapper.state_transitions = state_transitions
+    wrapper.state_transitions = list(state_transitions)
     return wrapper
 
+def _findStates(cls):
+    """
+    Returns [(name, wrapper)] for every state function on cls, base classes first
+    """
+    states = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if name.startswith("__") or not hasattr(value, "first") or not hasattr(value, "run"):
+                continue
+            states[name] = value
+    return list(states.items())
+
 
-class StrictStateMachine(StateMachine):
+class StrictStateMachine(TracedStateMachine, StateMachine):
     """
     Allows creation of state machines with strict state transitions. On a bad transition
     states will throw an exception. Use valid_change for checking mode changes.
+
+    The transition table is compiled once per class into a bitmask per state so
+    checking a transition is two list lookups. Unknown target states raise
+    InvalidStateTable when the class is created.
     """
+    _stateIndex = {}
+    _stateNames = []
+    _transitionMasks = []
+    _firstState = None
+    unreachableStates = []
+
+    # index of the current state, -1 when the machine is not running
+    _currentIndex = -1
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compileTransitions()
+
+    @classmethod
+    def _compileTransitions(cls):
+        """
+        Builds the state index, transition bitmasks and unreachable state list
+        """
+        states = _findStates(cls)
+        cls._stateNames = [name for name, _ in states]
+        cls._stateIndex = {name: i for i, name in enumerate(cls._stateNames)}
+        cls._firstState = None
+        allStates = (1 << len(states)) - 1
+
+        masks = []
+        for name, wrapper in states:
+            if wrapper.first:
+                cls._firstState = name
+            transitions = list(getattr(wrapper, "state_transitions", []))
+            # plain magicbot timed states can still expire into next_state
+            nextState = getattr(wrapper, "next_state", None)
+            if transitions and nextState is not None:
+                transitions.append(nextState if isinstance(nextState, str) else nextState.__name__)
+
+            if len(transitions) == 0 or "any" in transitions:
+                masks.append(allStates)
+                continue
+            mask = 1 << cls._stateIndex[name]
+            for target in transitions:
+                if target not in cls._stateIndex:
+                    raise InvalidStateTable(f"{cls.__name__}.{name} lists unknown state {target}")
+                mask |= 1 << cls._stateIndex[target]
+            masks.append(mask)
+        cls._transitionMasks = masks
+
+        cls.unreachableStates = []
+        if cls._firstState is None:
+            return
+        seen = 1 << cls._stateIndex[cls._firstState]
+        toVisit = [cls._stateIndex[cls._firstState]]
+        while toVisit:
+            newStates = masks[toVisit.pop()] & ~seen
+            seen |= newStates
+            toVisit.extend(i for i in range(len(masks)) if newStates >> i & 1)
+        cls.unreachableStates = [name for i, name in enumerate(cls._stateNames) if not seen >> i & 1]
+        if cls.unreachableStates:
+            logging.getLogger(__name__).warning("%s has unreachable states %s", cls.__name__, cls.unreachableStates)
+
+    @classmethod
+    def toDot(cls):
+        """
+        Returns the transition graph in graphviz DOT format. States with no
+        transition limits get a dashed edge to "any".
+        """
+        lines = [f"digraph {cls.__name__} {{"]
+        for i, name in enumerate(cls._stateNames):
+            attrs = []
+            if name == cls._firstState:
+                attrs.append("shape=doublecircle")
+            if name in cls.unreachableStates:
+                attrs.append("color=gray")
+            lines.append(f'    "{name}"' + (f" [{','.join(attrs)}]" if attrs else "") + ";")
+
+        allStates = (1 << len(cls._stateNames)) - 1
+        for i, name in enumerate(cls._stateNames):
+            mask = cls._transitionMasks[i]
+            if mask == allStates and len(cls._stateNames) > 1:
+                lines.append(f'    "{name}" -> "any" [style=dashed];')
+                continue
+            for j, target in enumerate(cls._stateNames):
+                if i != j and mask >> j & 1:
+                    lines.append(f'    "{name}" -> "{target}";')
+        lines.append("}")
+        return "\n".join(lines)
+
     def valid_change(self, state):
         """
         Used to check for valid state transition. Returns true if the transition is allowed
         otherwise returns false.
         """
         #when the current state has not been set, allow state to be set.
-        if self.current_state == "":
-            return True
-        stateFunc = getattr(self, self.current_state)
-        stateTransTbl = getattr(stateFunc, "state_transitions")
-        if state in stateTransTbl \
-            or len(stateTransTbl) == 0 \
-            or "any" in stateTransTbl \
-            or state == self.current_state:
+        if self._currentIndex < 0:
             return True
-        return False
+        if callable(state):
+            state = state.__name__
+        target = self._stateIndex.get(state)
+        if target is None:
+            return False
+        return bool(self._transitionMasks[self._currentIndex] >> target & 1)
 
     def next_state(self, name, force = False):
         """
@@ -74,7 +197,9 @@ class StrictStateMachine(StateMachine):
         Addes force variable to allow bypassing checks
         """
         if force or self.valid_change(name):
-            return super().next_state(name)
+            super().next_state(name)
+            self._currentIndex = self._stateIndex[name.__name__ if callable(name) else name]
+            return
         raise InvalidStateTransition(f"{self.current_state} to {name} is invalid")
     def next_state_now(self, name, force = False):
         """
@@ -84,3 +209,10 @@ class StrictStateMachine(StateMachine):
         if force or self.valid_change(name):
             return super().next_state_now(name)
         raise InvalidStateTransition(f"{self.current_state} to {name} is invalid")
+
+    def done(self):
+        """
+        See StateMachine. Clears the tracked state index
+        """
+        super().done()
+        self._currentIndex = -1
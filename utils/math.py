@@ -1,3 +1,4 @@
+import bisect
 
 def expScale(initVal, exp):
     """
@@ -12,3 +13,17 @@ def expScale(initVal, exp):
         val = val ** exp
         val *= -1
     return val
+
+def interpolate(xs, ys, x):
+    """
+    Linearly interpolates y at x from the sorted points xs and ys.
+    Values outside the table are clamped to the first or last y.
+    """
+    i = bisect.bisect_left(xs, x)
+    if i == 0:
+        return ys[0]
+    if i == len(xs):
+        return ys[-1]
+    x0, x1 = xs[i - 1], xs[i]
+    y0, y1 = ys[i - 1], ys[i]
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
@@ -0,0 +1,133 @@
+"""
+Samples the robot loop thread's stack while a tick is over budget
+"""
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+log = logging.getLogger("overrunSampler")
+
+class OverrunSampler:
+    """
+    Background thread that wakes every interval seconds. When the current
+    tick has run longer than budget it records the main thread's stack from
+    sys._current_frames(). Stacks are kept collapsed ("a;b;c") so write()
+    produces a file flamegraph.pl or speedscope can load directly.
+
+    Each sample is also counted against the innermost robot code function on
+    the stack (modules starting with modulePrefixes) so library frames like
+    enum or inspect get charged to the component that called them.
+
+    Call tick() once at the end of every loop iteration. The first call
+    starts the thread so boot time isn't counted as an overrun.
+    """
+    modulePrefixes = ("components.", "autonomous.", "utils.", "robot:", "robotMap:", "__main__:")
+
+    def __init__(self, budget = 0.025, interval = 0.002, maxDepth = 64):
+        self.budget = budget
+        self.interval = interval
+        self.maxDepth = maxDepth
+        self.threadId = threading.get_ident()
+        self.tickStart = time.perf_counter()
+        self.tickCount = 0
+        self.lastOverrunTick = -1
+        self.overruns = 0
+        self.stacks = collections.Counter()
+        self.functionSamples = collections.Counter()
+        self.codeNames = {}
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target = self.run, name = "overrunSampler", daemon = True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def tick(self):
+        """
+        Marks the start of a new loop iteration
+        """
+        self.tickStart = time.perf_counter()
+        self.tickCount += 1
+        if not self.running:
+            self.start()
+
+    def getOverrunCount(self):
+        """
+        Number of ticks that went over budget while sampling
+        """
+        return self.overruns
+
+    def frameName(self, frame):
+        code = frame.f_code
+        name = self.codeNames.get(code)
+        if name is None:
+            module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+            qualname = getattr(code, "co_qualname", None)
+            if qualname is None:
+                # before 3.11 the class has to come from self, only looked up once per function
+                qualname = code.co_name
+                if code.co_argcount and code.co_varnames[0] == "self":
+                    qualname = f"{type(frame.f_locals.get('self')).__name__}.{qualname}"
+            name = self.codeNames[code] = f"{module}:{qualname}"
+        return name
+
+    def sample(self):
+        frame = sys._current_frames().get(self.threadId)
+        if frame is None:
+            return
+        names = []
+        owner = None
+        while frame is not None and len(names) < self.maxDepth:
+            name = self.frameName(frame)
+            names.append(name)
+            if owner is None and name.startswith(self.modulePrefixes):
+                owner = name
+            frame = frame.f_back
+        self.functionSamples[owner or names[0]] += 1
+        names.reverse()
+        self.stacks[";".join(names)] += 1
+
+        tick = self.tickCount
+        if tick != self.lastOverrunTick:
+            self.lastOverrunTick = tick
+            self.overruns += 1
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+            if time.perf_counter() - self.tickStart >= self.budget:
+                self.sample()
+
+    def topFunctions(self, count = 10):
+        """
+        Returns [(function, samples)] for the robot code functions sampled most often
+        """
+        return self.functionSamples.most_common(count)
+
+    def write(self, path):
+        """
+        Writes the collapsed stacks to path and clears them. Returns False if
+        there was nothing to write.
+        """
+        if not self.stacks:
+            return False
+        stacks = self.stacks
+        self.stacks = collections.Counter()
+        with open(path, "w") as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        log.warning("%d loop overruns sampled, worst offenders %s", self.overruns, self.topFunctions(5))
+        self.functionSamples.clear()
+        return True
@@ -0,0 +1,137 @@
+"""
+REV SparkMax creation. Only imported when a config uses them.
+Every function takes the MotorSpec compiled from the config entry.
+"""
+import rev
+
+def createSparkMax(spec, motors):
+    """
+    SparkMax. Uses SparkMaxFeedback when "pid" is set
+    """
+    if spec.pid is not None:
+        motor = SparkMaxFeedback(spec, motors)
+        motor.setupPid()
+    else:
+        motor = rev.CANSparkMax(spec.channel, getattr(rev.MotorType, spec.motorType))
+
+    motors[str(spec.channel)] = motor
+    setREVCurrentLimits(motor, spec)
+    return motor
+
+def createSparkMaxFollower(spec, motors):
+    """
+    SparkMaxFollower. For masterChannel, use a motor object. MASTER MUST BE A "CANSparkMax" because blame rev
+    """
+    motor = SparkMaxFeedback(spec, motors)
+    motor.follow(motors.get(str(spec.masterChannel)), spec.inverted)
+    setREVCurrentLimits(motor, spec)
+    return motor
+
+def setREVCurrentLimits(motor, spec):
+    """
+    Sets current limits based off of "currentLimits"
+    in your motor and config of choice. Must be a REV motor controller
+    In currentLimits, you need freeLimit, stallLimit, stallLimitRPM and secondaryLimit
+    """
+    limits = spec.currentLimits
+    if limits is not None:
+        motor.setSecondaryCurrentLimit(limits.secondaryLimit)
+        motor.setSmartCurrentLimit(limits.stallLimit, limits.freeLimit, limits.stallLimitRPM)
+
+class SparkMaxFeedback(rev.CANSparkMax):
+    """
+    Class used to setup SparkMax motor if there are PID settings for it - MUST CALL setupPID
+    if you don't want it to crash. Great design decision on my part.
+    """
+    def __init__(self, spec, motors):
+        self.spec = spec
+        self.motorType = getattr(rev.MotorType, spec.motorType)
+
+        rev.CANSparkMax.__init__(self, spec.channel, self.motorType)
+        self.setInverted(bool(spec.inverted))
+        self.motors = motors
+        self.coasting = False
+
+    def setupPid(self):
+        '''Sets up the PIDF values and a pidcontroller to use to control the motor using pid.'''
+        if self.spec.pid is None:
+            print("Motor channel %d has no PID" % (self.spec.channel))
+            return
+        self.pid = self.spec.pid
+        pid = self.pid
+        
+        #Turns strings from pid in config into enums from rev library for control type
+        if pid.controlType == "Position":
+            self.ControlType = rev.ControlType.kPosition
+        elif pid.controlType == "Velocity":
+            self.ControlType = rev.ControlType.kVelocity
+
+        #If coastOnZero is true, when set() is called with a speed of 0, we will use DutyCycle
+        #And let the motor spin down by itself. (demonstrated in coast and stopcoast methods and within set())
+        self.coastOnZero = pid.coastOnZero
+
+        self.prevControlType = self.ControlType
+
+        self.encoder = self.getEncoder()
+        self.kPreScale = pid.kPreScale #Multiplier for the speed - lets you stay withing -1 to 1 for input but different outputs to pidController
+        self.slot = pid.feedbackDevice #slot for PID(F) configs. They range from 0-3.
+        self.PIDController = self.getPIDController() #creates pid controller
+
+        #Sets PID(F) values
+        self.PIDController.setP(pid.kP, self.slot)
+        self.PIDController.setI(pid.kI, self.slot)
+        self.PIDController.setD(pid.kD, self.slot)
+        self.PIDController.setFF(pid.kF, self.slot)
+        
+        #Generally just a way to overwrite previous settings on any motor controller - We don't brake often.
+        if self.spec.idleBrake:
+            self.setIdleMode(rev.IdleMode.kBrake)
+        else:
+            self.setIdleMode(rev.IdleMode.kCoast)
+        
+        #Configures output range - that's what Spark Maxes accept
+        self.PIDController.setOutputRange(-1, 1, self.slot)
+        self.PIDController.setReference(0 , self.ControlType, self.slot)
+
+    def setControlType(self, type: str):
+        """
+        Takes str type as argument, currently accepts Position, Velocity and Duty Cycle.
+        More can be added as necessary, following previous syntax in this method.
+        """
+        if type == "Position":
+            self.ControlType = rev.ControlType.kPosition
+        elif type == "Velocity":
+            self.ControlType = rev.ControlType.kVelocity
+        elif type == "Duty Cycle":
+            self.ControlType = rev.ControlType.kDutyCycle
+        else:
+            print("Unrecognized control type: ",self.ControlType)
+
+    def coast(self):
+        """
+        Stores the current control type, moves to Duty Cycle, sets to 0.
+        """
+        if self.coasting:
+            return
+        self.coasting = True
+        self.prevControlType = self.ControlType
+        self.setControlType("Duty Cycle")
+        self.PIDController.setReference(0, self.ControlType, self.slot)
+
+    def stopCoast(self):
+        """
+        Restores previous control type. Whatever it was.
+        """
+        if self.coasting:
+            self.ControlType = self.prevControlType
+        self.coasting = False
+
+    def set(self, speed):
+        """
+        Overrides the default set() to allow for control using the pid loop
+        """
+        if self.coastOnZero and speed == 0:
+            self.coast()
+        else:
+            self.stopCoast()
+        return self.PIDController.setReference(speed * self.kPreScale, self.ControlType, self.slot)
@@ -2,39 +2,37 @@
 Contains helpers to create various sensor types
 """
 
+import wpilib
 from wpilib import DigitalInput as di
-import logging
-import navx
 
-def gyroFactory(descp):
+def createNavx(descp, devices):
     """
-    Creates gyros from a gyro descp
+    Supports spi and i2c with default values. More can be added as needed.
     """
-    try:
-        if "navx" == descp["type"]:
-            """
-            Supports spi and i2c with default values. More can be added as needed.
-            """
-            method = descp["method"]
-            if method == "spi":
-                return navx.AHRS.create_spi()
-            if method == "i2c":
-                return navx.AHRS.create_i2c()
-            #invalid method, thorw a fit
-            raise ValueError(f"{method} method is invalid")
+    import navx
+    method = descp["method"]
+    if method == "spi":
+        return navx.AHRS.create_spi()
+    if method == "i2c":
+        return navx.AHRS.create_i2c()
+    #invalid method, thorw a fit
+    raise ValueError(f"{method} method is invalid")
 
-    except Exception as e:
-        logging.error("Failed to create gyro for %s. Error %s",descp, e)
-    return None
+def createDigitalInput(descp, devices):
+    return di(descp["channel"])
 
-def breaksensorFactory(descp):
+def createCANCoder(descp, devices):
+    import ctre
+    encoder = ctre.CANCoder(descp["channel"])
+    devices[str(descp["channel"])] = encoder
+    return encoder
+
+def createPDP(descp, devices):
+    return wpilib.PowerDistributionPanel(descp.get("module", 0))
+
+def createLimelight(descp, devices):
     """
-    Creates break sensors from a break sensor descp
+    The limelight only talks over networktables, so its device is the table
     """
-    try:
-        if "RIODigitalIn" in descp["type"]:
-            return di(descp["channel"])
-
-    except Exception as e:
-        logging.error("Failed to create IR Break sensor for %s. Error %s", descp, e)
-    return None
+    from networktables import NetworkTables
+    return NetworkTables.getTable(descp.get("table", "limelight"))
@@ -0,0 +1,112 @@
+"""
+Records state machine transitions and how long each state is held
+"""
+
+import bisect
+import collections
+import json
+
+import magicbot.state_machine
+
+from utils.eventBus import StateChanged
+
+# Upper edge of each dwell time histogram bucket in seconds
+dwellBuckets = (0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf"))
+
+class StateTrace:
+    """
+    Transition history, transition counts and per state dwell histograms
+    for one state machine
+    """
+    def __init__(self, name, maxTransitions = 256):
+        self.name = name
+        self.transitions = collections.deque(maxlen = maxTransitions)
+        self.transitionCounts = {}
+        self.dwellHistograms = {}
+        self.dwellTotals = {}
+        self.currentState = ""
+        self.enteredAt = 0.0
+
+    def observe(self, state, now):
+        """
+        Records a move into state at time now. "" means the machine stopped.
+        """
+        previous = self.currentState
+        if previous:
+            self.recordDwell(previous, now - self.enteredAt)
+        elif not state:
+            return
+
+        self.transitions.append((now, previous, state))
+        key = (previous, state)
+        self.transitionCounts[key] = self.transitionCounts.get(key, 0) + 1
+        self.currentState = state
+        self.enteredAt = now
+
+    def recordDwell(self, state, dwell):
+        histogram = self.dwellHistograms.get(state)
+        if histogram is None:
+            histogram = self.dwellHistograms[state] = [0] * len(dwellBuckets)
+            self.dwellTotals[state] = 0.0
+        histogram[bisect.bisect_left(dwellBuckets, dwell)] += 1
+        self.dwellTotals[state] += dwell
+
+    def toDict(self):
+        return {
+            "name": self.name,
+            "currentState": self.currentState,
+            "dwellBuckets": [str(edge) for edge in dwellBuckets],
+            "dwellHistograms": self.dwellHistograms,
+            "dwellTotals": self.dwellTotals,
+            "transitionCounts": {f"{old}->{new}": count for (old, new), count in self.transitionCounts.items()},
+            "transitions": list(self.transitions),
+        }
+
+class StateTraces(dict):
+    """
+    One robot's StateTraces by machine name. The robot creates it and
+    magicbot injects it into every TracedStateMachine, so two robots in
+    one interpreter keep separate traces.
+    """
+    def getTrace(self, name):
+        """
+        Returns the trace for name, creating it if needed
+        """
+        trace = self.get(name)
+        if trace is None:
+            trace = self[name] = StateTrace(name)
+        return trace
+
+    def dump(self, path):
+        """
+        Writes every trace to path as json
+        """
+        with open(path, "w") as file:
+            json.dump([trace.toDict() for trace in self.values()], file, indent = 1)
+
+class TracedStateMachine:
+    """
+    Mixin for magicbot state machines. Every next_state and done call is
+    recorded in the StateTrace named after the class. Put it before the
+    StateMachine base class. Machines with an eventBus injected also
+    publish StateChanged whenever the state actually changes.
+    """
+    stateTraces: StateTraces
+
+    def _traceTransition(self, name):
+        trace = self.__dict__.get("_stateTrace")
+        if trace is None:
+            trace = self._stateTrace = self.stateTraces.getTrace(type(self).__name__)
+        previous = trace.currentState
+        trace.observe(name, magicbot.state_machine.getTime())
+        eventBus = self.__dict__.get("eventBus")
+        if eventBus is not None and name != previous:
+            eventBus.publish(StateChanged(trace.name, previous, name))
+
+    def next_state(self, name):
+        super().next_state(name)
+        self._traceTransition(name.__name__ if callable(name) else name)
+
+    def done(self):
+        super().done()
+        self._traceTransition("")
@@ -0,0 +1,117 @@
+"""
+Hierarchical timer wheel, O(1) insert and cancel of timers counted in ticks
+"""
+
+class TimerHandle:
+    """
+    One scheduled call. Returned by TimerWheel.insert so it can be cancelled.
+    period is in ticks, 0 for a call that only runs once.
+    """
+    __slots__ = ("due", "period", "callback", "args", "slot", "cancelled")
+
+    def __init__(self, due, period, callback, args):
+        self.due = due
+        self.period = period
+        self.callback = callback
+        self.args = args
+        self.slot = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the call from running again. Safe to call more than once or from the callback."""
+        self.cancelled = True
+        if self.slot is not None:
+            del self.slot[self]
+            self.slot = None
+
+    def isPending(self):
+        return not self.cancelled and self.slot is not None
+
+class TimerWheel:
+    """
+    levels wheels of 2 ** slotBits slots each. A timer goes in the lowest
+    wheel whose slot count covers how far it is from now, in the slot its
+    due tick falls in. Every time now crosses the boundary of a higher
+    wheel's slot, that slot's timers cascade down into the wheels below
+    until they end up in the bottom wheel and come due.
+
+    Slots are dicts used as ordered sets, so inserting and cancelling are
+    both O(1) no matter how many timers there are. The default 4 wheels of
+    64 slots reach 2 ** 24 ticks ahead.
+    """
+    def __init__(self, slotBits = 6, levels = 4):
+        self.slotBits = slotBits
+        self.levels = levels
+        self.mask = (1 << slotBits) - 1
+        self.wheels = [[{} for _ in range(1 << slotBits)] for _ in range(levels)]
+        self.now = 0
+
+    def getSpan(self):
+        """Ticks ahead of now a timer can be."""
+        return (1 << (self.slotBits * self.levels)) - 1
+
+    def insert(self, due, callback, args = (), period = 0):
+        """
+        Schedules callback(*args) for tick due, at the earliest the next
+        tick. Returns its TimerHandle.
+        """
+        handle = TimerHandle(max(due, self.now + 1), period, callback, args)
+        self.place(handle)
+        return handle
+
+    def place(self, handle):
+        difference = handle.due ^ self.now
+        if handle.due - self.now > self.getSpan():
+            raise ValueError(f"Timer {handle.due - self.now} ticks ahead is past the wheel's span of {self.getSpan()}")
+        level = 0
+        while level < self.levels - 1 and difference >> (self.slotBits * (level + 1)):
+            level += 1
+        slot = self.wheels[level][(handle.due >> (self.slotBits * level)) & self.mask]
+        slot[handle] = None
+        handle.slot = slot
+
+    def reschedule(self, handle):
+        """
+        Puts a periodic handle that just ran back in, one period after it
+        was due. Periods that already went by are skipped.
+        """
+        handle.due += handle.period
+        if handle.due <= self.now:
+            handle.due += ((self.now - handle.due) // handle.period + 1) * handle.period
+        self.place(handle)
+
+    def step(self):
+        """
+        Advances now by one tick and returns the handles that came due, in
+        the order they were scheduled for that tick.
+        """
+        self.now += 1
+        now = self.now
+        boundary = 1
+        while boundary < self.levels and not now & ((1 << (self.slotBits * boundary)) - 1):
+            boundary += 1
+        # highest wheel first, its timers can land in the lower slots cascaded after it
+        for level in range(boundary - 1, 0, -1):
+            slot = self.wheels[level][(now >> (self.slotBits * level)) & self.mask]
+            handles = list(slot)
+            slot.clear()
+            for handle in handles:
+                self.place(handle)
+
+        slot = self.wheels[0][now & self.mask]
+        due = list(slot)
+        slot.clear()
+        for handle in due:
+            handle.slot = None
+        return due
+
+    def getPendingCount(self):
+        return sum(len(slot) for wheel in self.wheels for slot in wheel)
+
+    def clear(self):
+        for wheel in self.wheels:
+            for slot in wheel:
+                for handle in slot:
+                    handle.slot = None
+                    handle.cancelled = True
+                slot.clear()